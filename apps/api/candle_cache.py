@@ -0,0 +1,208 @@
+"""
+In-process кэш свечей для API.
+
+UI постоянно опрашивает одни и те же рынки: каждый запрос
+/api/candles/{market}/{interval} и /api/backtest/run шел в
+DataManager.get_candles и читал Parquet с диска заново.
+
+CandleCache держит последние DataFrame в памяти процесса:
+- Ключ: (market, interval, days_back)
+- LRU вытеснение при превышении max_bytes (размер DataFrame в памяти)
+- TTL по interval: 1m свечи устаревают быстро, 1d - редко
+- Счетчики hits / misses
+
+from_cache возвращается вместе с DataFrame из get / get_candles на каждый
+запрос: True - ответ из памяти процесса, False - загрузка через
+DataManager. Общий data_manager.last_from_cache не читается - его
+перезаписывают параллельные запросы.
+
+Пример:
+    candle_cache = CandleCache(max_bytes=256 * 1024 * 1024)
+
+    df, from_cache = candle_cache.get_candles(data_manager, 'BTC-PERP', '1h', days_back=7)
+"""
+
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import pandas as pd
+
+
+# TTL (секунды) по interval: примерно пока не закроется следующая свеча
+DEFAULT_TTL_SECONDS: Dict[str, float] = {
+    '1m': 30.0,
+    '5m': 60.0,
+    '15m': 120.0,
+    '1h': 300.0,
+    '4h': 900.0,
+    '1d': 3600.0
+}
+
+# TTL для interval которых нет в таблице
+FALLBACK_TTL_SECONDS = 60.0
+
+
+class CandleCache:
+    """
+    LRU кэш DataFrame свечей с бюджетом по байтам и TTL.
+
+    Записи и счетчики под lock, загрузка при промахе идет без
+    блокировки - медленный запрос одного рынка не держит остальные.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 256 * 1024 * 1024,
+        ttl_seconds: Optional[Dict[str, float]] = None,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Инициализация кэша.
+
+        max_bytes: Максимальный суммарный размер DataFrame в памяти.
+        ttl_seconds: TTL по interval (поверх DEFAULT_TTL_SECONDS).
+        clock: Источник времени в секундах (для тестов).
+        """
+        self.max_bytes = max_bytes
+        self.ttl_seconds = {**DEFAULT_TTL_SECONDS, **(ttl_seconds or {})}
+        self._clock = clock
+
+        # key -> (DataFrame, размер в байтах, время устаревания)
+        self._entries: 'OrderedDict[Tuple[str, str, int], Tuple[pd.DataFrame, int, float]]' = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        # Статистика
+        self.hits = 0
+        self.misses = 0
+
+    def get_candles(
+        self,
+        data_manager: Any,
+        market: str,
+        interval: str,
+        days_back: int,
+        force_refresh: bool = False
+    ) -> Tuple[Optional[pd.DataFrame], bool]:
+        """
+        Свечи из памяти или через data_manager.get_candles.
+
+        data_manager: Объект с get_candles(market, interval, days_back, force_refresh).
+        market: Рынок (например 'BTC-PERP').
+        interval: Timeframe (1m, 5m, 15m, 1h, 4h, 1d).
+        days_back: Дней истории.
+        force_refresh: Мимо кэша (и перезаписать его свежими данными).
+
+        Возвращает: (DataFrame или None, from_cache). from_cache = True если
+                    данные из памяти (без вызова data_manager).
+        """
+        key = (market, interval, int(days_back))
+
+        if not force_refresh:
+            cached, from_cache = self.get(key)
+            if from_cache:
+                return cached, True
+
+        df = data_manager.get_candles(
+            market=market,
+            interval=interval,
+            days_back=days_back,
+            force_refresh=force_refresh
+        )
+
+        if df is not None and len(df) > 0:
+            self.put(key, df)
+
+        return df, False
+
+    def get(self, key: Tuple[str, str, int]) -> Tuple[Optional[pd.DataFrame], bool]:
+        """
+        Свечи по ключу (market, interval, days_back).
+
+        Возвращает: (копия DataFrame, True) или (None, False) если записи
+                    нет / устарела.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is not None and entry[2] <= self._clock():
+                # Устарел - удаляем
+                self._remove(key)
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None, False
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            df = entry[0]
+
+        return df.copy(), True
+
+    def put(self, key: Tuple[str, str, int], df: pd.DataFrame):
+        """
+        Сохранить свечи (копию), вытеснить самые давно использованные.
+
+        DataFrame больше max_bytes не кэшируется.
+        """
+        df = df.copy()
+        nbytes = int(df.memory_usage(index=True, deep=True).sum())
+        ttl = self.ttl_seconds.get(key[1], FALLBACK_TTL_SECONDS)
+
+        with self._lock:
+            self._remove(key)
+
+            if nbytes > self.max_bytes:
+                return
+
+            self._entries[key] = (df, nbytes, self._clock() + ttl)
+            self._bytes += nbytes
+
+            while self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate(self, market: Optional[str] = None, interval: Optional[str] = None):
+        """
+        Удалить записи рынка / interval (None = любые).
+
+        Например после /api/data/fetch свежие свечи уже на диске.
+        """
+        with self._lock:
+            for key in list(self._entries):
+                if (market is None or key[0] == market) and (interval is None or key[1] == interval):
+                    self._remove(key)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Статистика кэша.
+
+        Возвращает: {'hits', 'misses', 'hit_rate', 'items', 'bytes', 'max_bytes'}.
+        """
+        with self._lock:
+            requests = self.hits + self.misses
+
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / requests if requests else 0.0,
+                'items': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes
+            }
+
+    def _remove(self, key: Tuple[str, str, int]):
+        """Удалить запись (вызывается под lock)."""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[1]
+
+    def __repr__(self) -> str:
+        """Строковое представление."""
+        return (
+            f"CandleCache("
+            f"items={len(self._entries)}, "
+            f"bytes={self._bytes}/{self.max_bytes})"
+        )
@@ -142,16 +142,27 @@ ev_calculator = EVCalculator(default_maker_bps=-1.5, default_taker_bps=4.5)
 # Data manager для работы с данными (импортируем здесь чтобы избежать циклических импортов)
 from core.data.manager import DataManager
 from core.backtest.engine import BacktestEngine
+from core.backtest.cache import BacktestCache
+from apps.api.candle_cache import CandleCache
 
 data_manager = DataManager()
 
+# Свечи в памяти процесса: UI опрашивает одни и те же рынки,
+# повторный запрос не читает Parquet заново (TTL по interval)
+candle_cache = CandleCache(max_bytes=256 * 1024 * 1024)
+
+# Кэш результатов backtest: одинаковый запрос (стратегия + params + данные)
+# возвращается без пересчета, новые свечи дают новый ключ
+backtest_cache = BacktestCache(directory=str(ROOT_DIR / "data" / "cache" / "backtests"))
+
 # ===== ROUTERS =====
 
 # Import and include candles router
 try:
     from apps.api.routes import candles
-    # Share data_manager with candles router
+    # Share data_manager and candle cache with candles router
     candles.data_manager = data_manager
+    candles.candle_cache = candle_cache
     app.include_router(candles.router)
     print("✅ Candles router included")
 except Exception as e:
@@ -408,8 +419,9 @@ async def get_candles(
                 detail=f"Invalid interval. Must be one of {valid_intervals}"
             )
         
-        # Загружаем данные через DataManager
-        df = data_manager.get_candles(
+        # Загружаем данные через DataManager (или из кэша в памяти)
+        df, from_cache = candle_cache.get_candles(
+            data_manager,
             market=market,
             interval=interval,
             days_back=days_back
@@ -437,7 +449,8 @@ async def get_candles(
             "market": market,
             "interval": interval,
             "candles": candles,
-            "count": len(candles)
+            "count": len(candles),
+            "from_cache": from_cache
         }
     
     except HTTPException:
@@ -446,6 +459,19 @@ async def get_candles(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/cache/stats")
+async def get_cache_stats():
+    """
+    Статистика кэшей (hits / misses / размер).
+    
+    GET /api/cache/stats
+    """
+    return {
+        "candles": candle_cache.stats(),
+        "backtests": backtest_cache.stats()
+    }
+
+
 @app.post("/api/data/fetch")
 async def fetch_data(request: Dict[str, Any]):
     """
@@ -465,13 +491,14 @@ async def fetch_data(request: Dict[str, Any]):
                 detail="market is required"
             )
         
-        # Загружаем с force_refresh
+        # Загружаем с force_refresh (свечи в памяти по этому рынку устарели)
         df = data_manager.get_candles(
             market=market,
             interval=interval,
             days_back=days_back,
             force_refresh=True
         )
+        candle_cache.invalidate(market=market, interval=interval)
         
         return {
             "status": "success",
@@ -538,8 +565,9 @@ async def run_backtest(request: Dict[str, Any]):
                 detail=f"Unknown strategy: {strategy_name}"
             )
         
-        # Загружаем данные
-        df = data_manager.get_candles(
+        # Загружаем данные (повторный backtest на тех же свечах - из памяти)
+        df, _ = candle_cache.get_candles(
+            data_manager,
             market=market,
             interval=interval,
             days_back=days_back
@@ -555,7 +583,8 @@ async def run_backtest(request: Dict[str, Any]):
         engine = BacktestEngine(
             strategy=strategy,
             initial_capital=initial_capital,
-            risk_per_trade=risk_per_trade
+            risk_per_trade=risk_per_trade,
+            cache=backtest_cache
         )
         
         # Запускаем backtest
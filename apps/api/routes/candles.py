@@ -23,6 +23,7 @@ router = APIRouter(prefix="/api/candles", tags=["candles"])
 
 # Will be set from main.py
 data_manager = None
+candle_cache = None
 
 
 class CandleResponse(BaseModel):
@@ -80,18 +81,19 @@ async def get_candles(
         end_time = int(datetime.now().timestamp() * 1000)
         start_time = int((datetime.now() - timedelta(days=days_back)).timestamp() * 1000)
         
-        # Use DataManager which handles caching automatically
+        # In-memory cache first, then DataManager (Parquet / Hyperliquid).
+        # from_cache (served from memory) comes back with the frame -
+        # data_manager.last_from_cache is shared and concurrent requests
+        # overwrite it
         try:
-            df = data_manager.get_candles(
+            df, from_cache = candle_cache.get_candles(
+                data_manager,
                 market=market,
                 interval=interval,
                 days_back=days_back,
                 force_refresh=force_refresh
             )
             
-            # Get cache status from DataManager
-            from_cache = data_manager.last_from_cache
-            
             if df is None or len(df) == 0:
                 raise HTTPException(
                     status_code=404,
@@ -113,10 +115,12 @@ async def get_candles(
             market=market,
             interval=interval,
             candles=candles,
-            from_cache=False,
+            from_cache=from_cache,
             count=len(candles)
         )
         
+    except HTTPException:
+        raise
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -0,0 +1,332 @@
+"""
+Content-addressed кэш результатов backtest.
+
+Один и тот же конфиг Tortoise прогоняется снова и снова: API
+/api/backtest/run, examples/generate_tortoise_report.py, каждый перезапуск
+optimizer. Результат backtest полностью определяется:
+- классом стратегии и ее params
+- настройками engine (capital, risk_per_trade, fee_rate, ...)
+- содержимым свечей
+
+Ключ кэша - sha256 от всех трех. Поэтому:
+- Повторный запуск с теми же данными возвращается из кэша сразу
+- Обновление данных (новые свечи) меняет content hash только у тех
+  окон, где данные реально изменились - остальные записи остаются валидными
+- Явная инвалидация не нужна: устаревшие записи вытесняются по LRU
+
+Два уровня:
+- Память: LRU (OrderedDict) на max_memory_items записей
+- Диск (опционально): pickle файл на запись, вытеснение самых давно
+  использованных файлов при превышении max_disk_bytes (до
+  DISK_LOW_WATER * max_disk_bytes). Размер директории считается один раз
+  при создании и дальше ведется инкрементально - put стоит O(1)
+
+Пример:
+    cache = BacktestCache(directory='data/cache/backtests')
+
+    engine = BacktestEngine(strategy=tortoise, cache=cache)
+    results = engine.run_backtest('BTC-PERP', btc_data)  # считается
+    results = engine.run_backtest('BTC-PERP', btc_data)  # из кэша
+"""
+
+import os
+import json
+import pickle
+import hashlib
+import tempfile
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Union
+
+import pandas as pd
+
+
+# Версия формата ключа: увеличить при изменении логики engine/метрик,
+# чтобы старые записи на диске перестали совпадать
+CACHE_KEY_VERSION = 1
+
+# При превышении max_disk_bytes вытесняем до этой доли бюджета - сканирование
+# директории происходит раз в много put, а не на каждый
+DISK_LOW_WATER = 0.8
+
+
+class BacktestCache:
+    """
+    Кэш результатов backtest: LRU в памяти + pickle файлы на диске.
+
+    Значения хранятся сериализованными (pickle bytes) - каждый get
+    возвращает независимую копию, изменение результата вызывающим кодом
+    не портит кэш.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        max_memory_items: int = 256,
+        max_disk_bytes: int = 512 * 1024 * 1024
+    ):
+        """
+        Инициализация кэша.
+
+        directory: Директория дискового уровня (None = только память).
+        max_memory_items: Максимум записей в памяти (LRU).
+        max_disk_bytes: Максимальный размер дискового уровня в байтах.
+        """
+        self.directory = directory
+        self.max_memory_items = max_memory_items
+        self.max_disk_bytes = max_disk_bytes
+
+        self._memory: 'OrderedDict[str, bytes]' = OrderedDict()
+
+        # Статистика
+        self.hits = 0
+        self.misses = 0
+
+        # Текущий размер дискового уровня (скан директории только здесь
+        # и при вытеснении)
+        self._disk_bytes = 0
+
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+            self._disk_bytes = self._scan_disk_bytes()
+
+    @staticmethod
+    def make_key(
+        strategy: Any,
+        data: Union[pd.DataFrame, str],
+        settings: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """
+        Ключ кэша для backtest.
+
+        strategy: Стратегия (класс + params) или класс стратегии.
+        data: Свечи на которых идет backtest (или уже посчитанный
+              data_fingerprint(data) - при многих ключах на одних данных).
+        settings: Настройки engine и прочее что влияет на результат
+                  (market, initial_capital, risk_per_trade, fee_rate, ...).
+
+        Возвращает: sha256 hex digest.
+        """
+        strategy_class = strategy if isinstance(strategy, type) else type(strategy)
+
+        payload = {
+            'version': CACHE_KEY_VERSION,
+            'strategy': f"{strategy_class.__module__}.{strategy_class.__qualname__}",
+            'params': getattr(strategy, 'params', None) if not isinstance(strategy, type) else None,
+            'settings': settings or {},
+            'data': data if isinstance(data, str) else data_fingerprint(data)
+        }
+
+        encoded = json.dumps(payload, sort_keys=True, default=repr).encode()
+        return hashlib.sha256(encoded).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Получить результат по ключу.
+
+        Возвращает: Копию сохраненного значения или None.
+        """
+        blob = self._memory.get(key)
+
+        if blob is not None:
+            self._memory.move_to_end(key)
+        else:
+            blob = self._read_disk(key)
+            if blob is not None:
+                self._remember(key, blob)
+
+        if blob is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return pickle.loads(blob)
+
+    def put(self, key: str, value: Any):
+        """
+        Сохранить результат.
+
+        key: Ключ (make_key).
+        value: Любой pickle'ящийся объект.
+        """
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+        self._remember(key, blob)
+        self._write_disk(key, blob)
+
+    def clear(self):
+        """Удалить все записи (память и диск)."""
+        self._memory.clear()
+
+        for entry in self._disk_entries():
+            _remove(entry.path)
+
+        self._disk_bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Статистика кэша.
+
+        Возвращает: {'hits', 'misses', 'memory_items', 'disk_items', 'disk_bytes'}.
+        """
+        entries = self._disk_entries()
+
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'memory_items': len(self._memory),
+            'disk_items': len(entries),
+            'disk_bytes': sum(entry.stat().st_size for entry in entries)
+        }
+
+    def _remember(self, key: str, blob: bytes):
+        """Положить в LRU память, вытеснить самые старые записи."""
+        self._memory[key] = blob
+        self._memory.move_to_end(key)
+
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+
+    def _path(self, key: str) -> str:
+        """Путь к файлу записи."""
+        return os.path.join(self.directory, f"{key}.pkl")
+
+    def _read_disk(self, key: str) -> Optional[bytes]:
+        """Прочитать запись с диска (и отметить как использованную)."""
+        if self.directory is None:
+            return None
+
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                blob = f.read()
+            # mtime = время последнего использования (для LRU вытеснения)
+            os.utime(path)
+        except OSError:
+            return None
+
+        return blob
+
+    def _write_disk(self, key: str, blob: bytes):
+        """
+        Атомарно записать файл.
+
+        Размер уровня обновляется инкрементально, директория сканируется
+        только когда бюджет превышен (_evict_disk).
+        """
+        if self.directory is None or len(blob) > self.max_disk_bytes:
+            return
+
+        path = self._path(key)
+
+        # Перезапись ключа: старый файл уходит из размера
+        try:
+            replaced_size = os.stat(path).st_size
+        except OSError:
+            replaced_size = 0
+
+        # Запись во временный файл + rename: параллельные процессы
+        # никогда не видят недописанный файл
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(blob)
+            os.replace(tmp_path, path)
+        except OSError:
+            _remove(tmp_path)
+            return
+
+        self._disk_bytes += len(blob) - replaced_size
+
+        if self._disk_bytes > self.max_disk_bytes:
+            self._evict_disk()
+
+    def _evict_disk(self):
+        """
+        Удалять самые давно использованные файлы до DISK_LOW_WATER * max_disk_bytes.
+
+        Размер пересчитывается по директории - записи других процессов
+        с тем же directory тоже учитываются.
+        """
+        entries = []
+        for entry in self._disk_entries():
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+        low_water = self.max_disk_bytes * DISK_LOW_WATER
+
+        if total > self.max_disk_bytes:
+            for _, size, path in sorted(entries):
+                if total <= low_water:
+                    break
+                _remove(path)
+                total -= size
+
+        self._disk_bytes = total
+
+    def _scan_disk_bytes(self) -> int:
+        """Суммарный размер файлов записей на диске (полный скан директории)."""
+        total = 0
+        for entry in self._disk_entries():
+            try:
+                total += entry.stat().st_size
+            except OSError:
+                continue
+        return total
+
+    def _disk_entries(self):
+        """Файлы записей на диске."""
+        if self.directory is None or not os.path.isdir(self.directory):
+            return []
+
+        return [
+            entry for entry in os.scandir(self.directory)
+            if entry.is_file() and entry.name.endswith('.pkl')
+        ]
+
+    def __getstate__(self):
+        """При передаче в worker процесс память не копируется (только диск)."""
+        state = self.__dict__.copy()
+        state['_memory'] = OrderedDict()
+        return state
+
+    def __repr__(self) -> str:
+        """Строковое представление."""
+        return (
+            f"BacktestCache("
+            f"memory={len(self._memory)}/{self.max_memory_items}, "
+            f"directory={self.directory})"
+        )
+
+
+def data_fingerprint(data: pd.DataFrame) -> str:
+    """
+    Content hash свечей.
+
+    Учитываются значения и dtypes колонок, но не индекс: окно
+    data.iloc[a:b] и тот же кусок загруженный отдельно дают один hash.
+
+    data: DataFrame со свечами.
+
+    Возвращает: sha256 hex digest.
+    """
+    digest = hashlib.sha256()
+    digest.update(repr([(str(name), str(dtype)) for name, dtype in data.dtypes.items()]).encode())
+    digest.update(str(len(data)).encode())
+
+    if len(data):
+        row_hashes = pd.util.hash_pandas_object(data, index=False).to_numpy()
+        digest.update(row_hashes.tobytes())
+
+    return digest.hexdigest()
+
+
+def _remove(path: str):
+    """Удалить файл, если его уже нет - не ошибка."""
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
@@ -2,17 +2,41 @@
 Backtesting Engine для тестирования стратегий на исторических данных.
 
 Функционал:
-- Симуляция сделок bar-by-bar
+- Симуляция сделок bar-by-bar (или vectorized сигналы через generate_signals)
 - Расчет P&L с учетом fees
 - Position sizing (risk-based)
 - Метрики: Sharpe, Drawdown, Win Rate, и т.д.
 - Equity curve tracking
 """
 
+import contextlib
+
 import pandas as pd
 import numpy as np
 from typing import Dict, List, Any, Optional
-from core.strategy.base import IStrategy, Signal, SignalSide, BarContext
+from core.strategy.base import IStrategy, Signal, SignalSide, BarContext, SignalArrays
+from core.backtest.feed import BarFeed
+from core.backtest.cache import BacktestCache
+
+
+# Первый кусок scan stop/target в vectorized режиме (дальше растет x2)
+FIRST_TOUCH_CHUNK = 64
+
+# pandas < 3: copy-on-write по умолчанию выключен (в pandas 3 включен всегда)
+_NEEDS_COPY_ON_WRITE = int(pd.__version__.split('.')[0]) < 3
+
+
+def _read_only_history():
+    """
+    Контекст для bar-by-bar цикла: запись в срез history не меняет источник.
+
+    На pandas < 3 включает copy-on-write на время цикла: изменение среза
+    копирует его, а .values среза только для чтения. На pandas >= 3
+    copy-on-write включен всегда - ничего не делает.
+    """
+    if _NEEDS_COPY_ON_WRITE:
+        return pd.option_context('mode.copy_on_write', True)
+    return contextlib.nullcontext()
 
 
 class BacktestEngine:
@@ -31,7 +55,10 @@ class BacktestEngine:
         strategy: IStrategy,
         initial_capital: float = 10000.0,
         risk_per_trade: float = 1.0,
-        fee_rate: float = 0.0005  # 0.05% (maker fee на многих биржах)
+        fee_rate: float = 0.0005,  # 0.05% (maker fee на многих биржах)
+        lookback: Optional[int] = None,
+        vectorized: bool = True,
+        cache: Optional[BacktestCache] = None
     ):
         """
         Инициализация backtesting engine.
@@ -40,11 +67,22 @@ class BacktestEngine:
         initial_capital: Начальный капитал в USD.
         risk_per_trade: Процент риска на сделку (1.0 = 1%).
         fee_rate: Комиссия биржи (0.0005 = 0.05%).
+        lookback: Сколько последних баров отдавать стратегии в history.
+                  None = берем strategy.required_history() (если None -
+                  вся история от начала до текущего бара).
+        vectorized: Использовать strategy.generate_signals если стратегия
+                    его поддерживает (False = всегда on_bar на каждом баре).
+        cache: BacktestCache для результатов (None = без кэша). Кэшируются
+               только IStrategy: ключ - класс + params стратегии, настройки
+               engine и content hash свечей.
         """
         self.strategy = strategy
         self.initial_capital = initial_capital
         self.risk_per_trade = risk_per_trade
         self.fee_rate = fee_rate
+        self.lookback = lookback
+        self.vectorized = vectorized
+        self.cache = cache
         
         # Текущее состояние
         self.equity = initial_capital
@@ -70,24 +108,108 @@ class BacktestEngine:
         print(f"   Период: {history['timestamp'].iloc[0].date()} - {history['timestamp'].iloc[-1].date()}")
         print(f"   Свечей: {len(history)}")
         
-        # Итерация по каждому бару
-        for i in range(len(history)):
-            # Получаем текущий бар
-            current_bar = history.iloc[i]
-            
+        # Тот же конфиг на тех же данных уже считался -> результат из кэша
+        cache_key = self._cache_key(market, history)
+        if cache_key is not None:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                self.trades = cached['trades']
+                self.equity_curve = cached['equity_curve']
+                self.equity = cached['metrics']['final_equity']
+                
+                print(f"\n⚡ Результат из кэша (сделок: {cached['metrics']['total_trades']})")
+                return cached
+        
+        # Колонки OHLCV -> NumPy массивы (один раз на весь backtest)
+        feed = BarFeed.from_dataframe(history)
+        
+        # Vectorized режим если стратегия умеет считать сигналы сразу
+        signal_arrays = self._generate_signals(market, history)
+        
+        if signal_arrays is not None:
+            self._run_vectorized(market, feed, signal_arrays)
+        else:
+            # Стратегия получает views на history: запись в них не должна
+            # портить исходные данные (и feed поверх тех же массивов)
+            with _read_only_history():
+                self._run_bar_by_bar(market, history, feed)
+        
+        # Закрываем все открытые позиции в конце
+        self._close_all_positions(
+            exit_price=float(feed.close[-1]),
+            timestamp=int(feed.timestamp[-1]),
+            reason='backtest_end'
+        )
+        
+        # Считаем метрики
+        metrics = self.calculate_metrics()
+        
+        print(f"\n✅ Backtest завершен!")
+        print(f"   Сделок: {metrics['total_trades']}")
+        print(f"   Win Rate: {metrics['win_rate']:.1f}%")
+        print(f"   Total P&L: ${metrics['total_pnl']:.2f}")
+        
+        results = {
+            'trades': self.trades,
+            'equity_curve': self.equity_curve,
+            'metrics': metrics
+        }
+        
+        if cache_key is not None:
+            self.cache.put(cache_key, results)
+        
+        return results
+    
+    def _cache_key(self, market: str, history: pd.DataFrame) -> Optional[str]:
+        """
+        Ключ кэша для backtest (None если кэш выключен или стратегия не IStrategy).
+        
+        Стратегия должна давать одинаковый результат на одинаковых
+        params и данных (состояние между backtests не влияет на сделки).
+        """
+        if self.cache is None or not isinstance(self.strategy, IStrategy):
+            return None
+        
+        return self.cache.make_key(self.strategy, history, {
+            'engine': 'BacktestEngine',
+            'market': market,
+            'initial_capital': self.initial_capital,
+            'risk_per_trade': self.risk_per_trade,
+            'fee_rate': self.fee_rate,
+            'lookback': self.lookback,
+            'vectorized': self.vectorized
+        })
+    
+    def _run_bar_by_bar(self, market: str, history: pd.DataFrame, feed: BarFeed):
+        """
+        Классический режим: strategy.on_bar на каждом баре.
+        
+        market: Рынок.
+        history: DataFrame с историческими данными.
+        feed: Колоночный feed тех же данных.
+        """
+        # Размер окна истории для стратегии (None = растущий prefix)
+        window = self._history_window()
+        
+        # Итерация по каждому бару (обычные Python скаляры, без iloc)
+        for i, (timestamp, open_, high, low, close, volume) in enumerate(feed.rows()):
             # Создаем BarContext для стратегии
             ctx = BarContext(
-                timestamp=int(current_bar['timestamp'].timestamp() * 1000),
+                timestamp=timestamp,
                 market=market,
-                open=current_bar['open'],
-                high=current_bar['high'],
-                low=current_bar['low'],
-                close=current_bar['close'],
-                volume=current_bar['volume']
+                open=open_,
+                high=high,
+                low=low,
+                close=close,
+                volume=volume
             )
             
-            # Получаем историю ДО текущего бара (не включая текущий)
-            history_slice = history.iloc[:i+1].copy()
+            # История до текущего бара включительно.
+            # iloc-срез - это view без копирования данных (O(1) на бар),
+            # поэтому общее время backtest растет линейно с числом баров.
+            # Источник защищен copy-on-write (см. _read_only_history).
+            start = 0 if window is None else max(0, i + 1 - window)
+            history_slice = history.iloc[start:i+1]
             
             # Генерируем сигналы через стратегию
             signals = self.strategy.on_bar(ctx, history_slice)
@@ -101,23 +223,173 @@ class BacktestEngine:
             
             # Записываем текущий equity в curve
             self.equity_curve.append(self.equity)
+    
+    def _run_vectorized(self, market: str, feed: BarFeed, arrays: SignalArrays):
+        """
+        Vectorized режим: сигналы уже посчитаны strategy.generate_signals.
         
-        # Закрываем все открытые позиции в конце
-        self._close_all_positions(history.iloc[-1], reason='backtest_end')
+        Исполнение event-driven: цикл идет не по барам, а по событиям.
+        - Без позиции: следующий бар с entry сигналом (searchsorted по
+          индексам сигналов)
+        - С позицией: первый бар где сработал EXIT, stop или target
+          (_first_exit - numpy scan кусками)
+        Между событиями equity не меняется, equity curve дополняется
+        целыми отрезками. Для редких сигналов (Tortoise) это O(сделок)
+        Python шагов вместо O(баров).
         
-        # Считаем метрики
-        metrics = self.calculate_metrics()
+        Результат тот же что у bar-by-bar: на баре entry сигнал, затем EXIT
+        (по состоянию позиции ДО entry), затем проверка stop/target.
         
-        print(f"\n✅ Backtest завершен!")
-        print(f"   Сделок: {metrics['total_trades']}")
-        print(f"   Win Rate: {metrics['win_rate']:.1f}%")
-        print(f"   Total P&L: ${metrics['total_pnl']:.2f}")
+        market: Рынок.
+        feed: Колоночный feed данных.
+        arrays: Сигналы для всех баров.
+        """
+        n_bars = len(feed)
+        side = np.asarray(arrays.side)
+        signal_bars = np.flatnonzero(side != 0)
+        
+        i = 0  # Первый еще не обработанный бар
+        while i < n_bars:
+            # --- Без позиции: ждем следующий entry сигнал ---
+            next_signal = np.searchsorted(signal_bars, i)
+            if next_signal == len(signal_bars):
+                break
+            
+            j = int(signal_bars[next_signal])
+            self.equity_curve.extend([self.equity] * (j - i))
+            
+            self.process_signal(Signal(
+                market=market,
+                side=SignalSide.LONG if side[j] > 0 else SignalSide.SHORT,
+                entry=float(arrays.entry[j]),
+                stop=float(arrays.stop[j]),
+                targets=[float(arrays.target[j])]
+            ), int(feed.timestamp[j]))
+            
+            position = self.positions.get(market)
+            if position is None:
+                # Некорректный сигнал (stop = entry) - позиция не открылась
+                self.equity_curve.append(self.equity)
+                i = j + 1
+                continue
+            
+            # --- С позицией: прыжок сразу к бару выхода ---
+            exit_event = self._first_exit(feed, arrays, position, j)
+            if exit_event is None:
+                # Позиция доживает до конца (закроет _close_all_positions)
+                i = j
+                break
+            
+            k, reason, exit_price = exit_event
+            self.equity_curve.extend([self.equity] * (k - j))
+            
+            self.close_position(
+                market=market,
+                exit_price=exit_price,
+                reason=reason,
+                timestamp=int(feed.timestamp[k])
+            )
+            
+            self.equity_curve.append(self.equity)
+            i = k + 1
         
-        return {
-            'trades': self.trades,
-            'equity_curve': self.equity_curve,
-            'metrics': metrics
-        }
+        # Хвост без событий
+        self.equity_curve.extend([self.equity] * (n_bars - i))
+    
+    def _first_exit(
+        self,
+        feed: BarFeed,
+        arrays: SignalArrays,
+        position: Dict[str, Any],
+        entry_bar: int
+    ) -> Optional[tuple]:
+        """
+        Первый бар после entry на котором позиция закрывается.
+        
+        Приоритет на одном баре как в bar-by-bar: EXIT сигнал, stop, target.
+        На баре entry EXIT не проверяется (сигнал смотрит на позицию до entry).
+        
+        Scan кусками растущего размера (FIRST_TOUCH_CHUNK, x2 каждый раз):
+        короткие сделки не сканируют весь хвост данных, длинные - за
+        O(log) numpy вызовов.
+        
+        feed: Колоночный feed данных.
+        arrays: Сигналы (exit_long / exit_short / exit_price).
+        position: Открытая позиция.
+        entry_bar: Бар открытия позиции.
+        
+        Возвращает: (бар, reason, цена выхода) или None если выхода нет.
+        """
+        n_bars = len(feed)
+        is_long = position['side'] == 'long'
+        stop = position['stop']
+        target = position['targets'][0] if position['targets'] else np.nan
+        exit_flags = np.asarray(arrays.exit_long if is_long else arrays.exit_short, dtype=bool)
+        
+        start = entry_bar
+        chunk = FIRST_TOUCH_CHUNK
+        
+        while start < n_bars:
+            end = min(n_bars, start + chunk)
+            
+            with np.errstate(invalid='ignore'):
+                if is_long:
+                    stop_hit = feed.low[start:end] <= stop
+                    target_hit = feed.high[start:end] >= target
+                else:
+                    stop_hit = feed.high[start:end] >= stop
+                    target_hit = feed.low[start:end] <= target
+            
+            exit_hit = exit_flags[start:end]
+            if start == entry_bar:
+                exit_hit = exit_hit.copy()
+                exit_hit[0] = False
+            
+            hit = exit_hit | stop_hit | target_hit
+            if hit.any():
+                offset = int(hit.argmax())
+                bar = start + offset
+                
+                if exit_hit[offset]:
+                    return bar, 'strategy_exit', float(arrays.exit_price[bar])
+                if stop_hit[offset]:
+                    return bar, 'stop_loss', stop
+                return bar, 'target_hit', target
+            
+            start = end
+            chunk *= 2
+        
+        return None
+    
+    def _generate_signals(self, market: str, history: pd.DataFrame) -> Optional[SignalArrays]:
+        """
+        Получить vectorized сигналы от стратегии (если поддерживает).
+        
+        Возвращает: SignalArrays или None (тогда bar-by-bar через on_bar).
+        """
+        if not self.vectorized:
+            return None
+        
+        # Mock-стратегии и прочие объекты без IStrategy идут через on_bar
+        if not isinstance(self.strategy, IStrategy):
+            return None
+        
+        return self.strategy.generate_signals(market, history)
+    
+    def _history_window(self) -> Optional[int]:
+        """
+        Определить размер окна истории для стратегии.
+        
+        Возвращает: Количество баров или None (вся история).
+        """
+        if self.lookback is not None:
+            return self.lookback
+        
+        # Mock-стратегии и прочие объекты без IStrategy получают всю историю
+        if isinstance(self.strategy, IStrategy):
+            return self.strategy.required_history()
+        
+        return None
     
     def process_signal(self, signal: Signal, timestamp: int):
         """
@@ -301,20 +573,21 @@ class BacktestEngine:
                     timestamp=ctx.timestamp
                 )
     
-    def _close_all_positions(self, last_bar: pd.Series, reason: str):
+    def _close_all_positions(self, exit_price: float, timestamp: int, reason: str):
         """
         Закрыть все открытые позиции (в конце backtest).
         
-        last_bar: Последний бар данных.
+        exit_price: Цена закрытия (close последнего бара).
+        timestamp: Время закрытия (epoch ms).
         reason: Причина закрытия.
         """
         markets_to_close = list(self.positions.keys())
         for market in markets_to_close:
             self.close_position(
                 market=market,
-                exit_price=last_bar['close'],
+                exit_price=exit_price,
                 reason=reason,
-                timestamp=int(last_bar['timestamp'].timestamp() * 1000)
+                timestamp=timestamp
             )
     
     def calculate_metrics(self) -> Dict[str, float]:
@@ -323,59 +596,85 @@ class BacktestEngine:
         
         Возвращает: Словарь с метриками.
         """
-        if not self.trades:
-            return {
-                'total_trades': 0,
-                'winning_trades': 0,
-                'losing_trades': 0,
-                'win_rate': 0.0,
-                'total_pnl': 0.0,
-                'avg_win': 0.0,
-                'avg_loss': 0.0,
-                'profit_factor': 0.0,
-                'max_drawdown': 0.0,
-                'sharpe_ratio': 0.0,
-                'final_equity': self.equity,
-                'return_pct': 0.0
-            }
-        
-        # Базовые метрики
-        total_trades = len(self.trades)
-        winning_trades = sum(1 for t in self.trades if t['pnl'] > 0)
-        losing_trades = sum(1 for t in self.trades if t['pnl'] < 0)
-        
-        win_rate = (winning_trades / total_trades * 100) if total_trades > 0 else 0
-        
-        # P&L метрики
-        total_pnl = sum(t['pnl'] for t in self.trades)
-        avg_win = np.mean([t['pnl'] for t in self.trades if t['pnl'] > 0]) if winning_trades > 0 else 0
-        avg_loss = np.mean([t['pnl'] for t in self.trades if t['pnl'] < 0]) if losing_trades > 0 else 0
-        
-        # Sharpe Ratio (упрощенный)
-        pnl_series = np.array([t['pnl'] for t in self.trades])
-        if len(pnl_series) > 1 and pnl_series.std() > 0:
-            sharpe_ratio = (pnl_series.mean() / pnl_series.std()) * np.sqrt(252)  # Annualized
-        else:
-            sharpe_ratio = 0.0
+        pnls = [t['pnl'] for t in self.trades]
         
         # Max Drawdown
-        equity_array = np.array(self.equity_curve)
-        running_max = np.maximum.accumulate(equity_array)
-        drawdown = (equity_array - running_max) / running_max * 100
-        max_drawdown = abs(drawdown.min())
-        
+        max_drawdown = 0.0
+        if pnls:
+            equity_array = np.array(self.equity_curve)
+            running_max = np.maximum.accumulate(equity_array)
+            drawdown = (equity_array - running_max) / running_max * 100
+            max_drawdown = abs(drawdown.min())
+        
+        return summarize_trades(pnls, max_drawdown, self.equity, self.initial_capital)
+
+
+def summarize_trades(
+    pnls: List[float],
+    max_drawdown: float,
+    final_equity: float,
+    initial_capital: float
+) -> Dict[str, float]:
+    """
+    Метрики backtest по списку P&L сделок.
+    
+    Вынесено из BacktestEngine.calculate_metrics чтобы другие движки
+    (например core.backtest.sweep) считали метрики по тем же формулам.
+    
+    pnls: Net P&L сделок в порядке закрытия.
+    max_drawdown: Максимальная просадка equity curve в % (положительное число).
+    final_equity: Капитал в конце backtest.
+    initial_capital: Начальный капитал.
+    
+    Возвращает: Словарь с метриками.
+    """
+    if not pnls:
         return {
-            'total_trades': total_trades,
-            'winning_trades': winning_trades,
-            'losing_trades': losing_trades,
-            'win_rate': win_rate,
-            'total_pnl': total_pnl,
-            'avg_win': avg_win,
-            'avg_loss': avg_loss,
-            'profit_factor': abs(avg_win / avg_loss) if avg_loss != 0 else 0,
-            'max_drawdown': max_drawdown,
-            'sharpe_ratio': sharpe_ratio,
-            'final_equity': self.equity,
-            'return_pct': ((self.equity - self.initial_capital) / self.initial_capital) * 100
+            'total_trades': 0,
+            'winning_trades': 0,
+            'losing_trades': 0,
+            'win_rate': 0.0,
+            'total_pnl': 0.0,
+            'avg_win': 0.0,
+            'avg_loss': 0.0,
+            'profit_factor': 0.0,
+            'max_drawdown': 0.0,
+            'sharpe_ratio': 0.0,
+            'final_equity': final_equity,
+            'return_pct': 0.0
         }
+    
+    # Базовые метрики
+    total_trades = len(pnls)
+    winning_trades = sum(1 for pnl in pnls if pnl > 0)
+    losing_trades = sum(1 for pnl in pnls if pnl < 0)
+    
+    win_rate = (winning_trades / total_trades * 100) if total_trades > 0 else 0
+    
+    # P&L метрики
+    total_pnl = sum(pnls)
+    avg_win = np.mean([pnl for pnl in pnls if pnl > 0]) if winning_trades > 0 else 0
+    avg_loss = np.mean([pnl for pnl in pnls if pnl < 0]) if losing_trades > 0 else 0
+    
+    # Sharpe Ratio (упрощенный)
+    pnl_series = np.array(pnls)
+    if len(pnl_series) > 1 and pnl_series.std() > 0:
+        sharpe_ratio = (pnl_series.mean() / pnl_series.std()) * np.sqrt(252)  # Annualized
+    else:
+        sharpe_ratio = 0.0
+    
+    return {
+        'total_trades': total_trades,
+        'winning_trades': winning_trades,
+        'losing_trades': losing_trades,
+        'win_rate': win_rate,
+        'total_pnl': total_pnl,
+        'avg_win': avg_win,
+        'avg_loss': avg_loss,
+        'profit_factor': abs(avg_win / avg_loss) if avg_loss != 0 else 0,
+        'max_drawdown': max_drawdown,
+        'sharpe_ratio': sharpe_ratio,
+        'final_equity': final_equity,
+        'return_pct': ((final_equity - initial_capital) / initial_capital) * 100
+    }
 
@@ -0,0 +1,116 @@
+"""
+Columnar Bar Feed для backtest loop.
+
+Вместо history.iloc[i] на каждом баре (создание pandas Series + конвертация
+pd.Timestamp) колонки OHLCV один раз вытаскиваются в непрерывные NumPy массивы:
+- timestamp: int64 (epoch milliseconds, UTC)
+- open/high/low/close/volume: float64
+
+Дальше цикл идет по обычным Python скалярам - микросекунды на бар.
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Iterator, Tuple
+
+
+class BarFeed:
+    """
+    Колоночное представление OHLCV данных.
+
+    Пример:
+        feed = BarFeed.from_dataframe(history)
+
+        for timestamp, open_, high, low, close, volume in feed.rows():
+            ...
+
+        print(feed.close[-1], feed.timestamp[-1])
+    """
+
+    COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+
+    def __init__(
+        self,
+        timestamp: np.ndarray,
+        open: np.ndarray,
+        high: np.ndarray,
+        low: np.ndarray,
+        close: np.ndarray,
+        volume: np.ndarray
+    ):
+        """
+        Инициализация feed из готовых массивов.
+
+        timestamp: int64 массив (epoch ms).
+        open, high, low, close, volume: float64 массивы той же длины.
+        """
+        self.timestamp = timestamp
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame) -> 'BarFeed':
+        """
+        Построить feed из DataFrame (один проход по колонкам).
+
+        df: DataFrame с колонками timestamp, open, high, low, close, volume.
+            timestamp - datetime (naive = UTC) или int epoch ms.
+
+        Возвращает: BarFeed.
+        """
+        columns = {
+            name: np.ascontiguousarray(df[name].to_numpy(dtype=np.float64))
+            for name in cls.COLUMNS
+        }
+
+        return cls(timestamp=to_epoch_ms(df['timestamp']), **columns)
+
+    def __len__(self) -> int:
+        """Количество баров."""
+        return len(self.timestamp)
+
+    def rows(self) -> Iterator[Tuple[int, float, float, float, float, float]]:
+        """
+        Итерация по барам как по кортежам Python скаляров.
+
+        .tolist() конвертирует массив в Python объекты одним C-вызовом,
+        это намного быстрее чем доставать элементы массива по одному.
+
+        Возвращает: Iterator (timestamp, open, high, low, close, volume).
+        """
+        return zip(
+            self.timestamp.tolist(),
+            self.open.tolist(),
+            self.high.tolist(),
+            self.low.tolist(),
+            self.close.tolist(),
+            self.volume.tolist()
+        )
+
+    def __repr__(self) -> str:
+        """Строковое представление."""
+        return f"BarFeed(bars={len(self)})"
+
+
+def to_epoch_ms(timestamps: pd.Series) -> np.ndarray:
+    """
+    Конвертировать колонку timestamp в int64 epoch milliseconds.
+
+    Naive datetime считается UTC (как pd.Timestamp.timestamp()),
+    tz-aware приводится к UTC. Числовые значения считаются уже в ms.
+
+    timestamps: pandas Series с датами или числами.
+
+    Возвращает: int64 NumPy массив.
+    """
+    if pd.api.types.is_datetime64_any_dtype(timestamps):
+        if getattr(timestamps.dt, 'tz', None) is not None:
+            timestamps = timestamps.dt.tz_convert('UTC').dt.tz_localize(None)
+
+        values = timestamps.to_numpy(dtype='datetime64[ms]')
+        return np.ascontiguousarray(values.astype(np.int64))
+
+    return np.ascontiguousarray(timestamps.to_numpy(dtype=np.int64))
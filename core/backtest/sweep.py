@@ -0,0 +1,344 @@
+"""
+Batched parameter sweep для TortoiseStrategy.
+
+BacktestEngine прогоняет одну комбинацию параметров за раз: для grid из
+1000 точек это 1000 раз по всем данным + 1000 раз пересчет одних и тех же
+Donchian/ATR.
+
+TortoiseSweep считает все комбинации за ОДИН проход по барам:
+- Индикаторы считаются один раз на каждый уникальный период
+  (don_break=20 и don_exit=20 используют один и тот же канал)
+- Состояние позиций/equity - numpy массивы по оси комбинаций,
+  на каждом баре обновляются все комбинации сразу
+- Комбинации с одинаковыми (don_break, don_exit, trail_atr_len) считаются
+  один раз (trail_mult на сигналы не влияет)
+
+Результат совпадает с BacktestEngine.run_backtest(...)['metrics'] для
+каждой комбинации: та же последовательность entry -> EXIT -> stop/target
+на каждом баре, те же формулы P&L и метрик (summarize_trades).
+
+Пример:
+    sweep = TortoiseSweep(initial_capital=10000.0, risk_per_trade=1.0)
+
+    metrics = sweep.run(btc_data, [
+        {'don_break': 20, 'don_exit': 10},
+        {'don_break': 30, 'don_exit': 15},
+    ])
+
+    print(metrics[0]['sharpe_ratio'])
+"""
+
+import pandas as pd
+import numpy as np
+from typing import Dict, List, Any, Tuple, Optional
+
+from core.strategy.tortoise import TortoiseStrategy
+from core.backtest.engine import summarize_trades
+from core.backtest.cache import BacktestCache, data_fingerprint
+
+
+class TortoiseSweep:
+    """
+    Vectorized по параметрам backtest TortoiseStrategy.
+
+    Параметры engine (capital, risk, fees) те же что у BacktestEngine.
+    """
+
+    def __init__(
+        self,
+        initial_capital: float = 10000.0,
+        risk_per_trade: float = 1.0,
+        fee_rate: float = 0.0005,
+        cache: Optional[BacktestCache] = None
+    ):
+        """
+        Инициализация sweep.
+
+        initial_capital: Начальный капитал в USD.
+        risk_per_trade: Процент риска на сделку (1.0 = 1%).
+        fee_rate: Комиссия биржи (0.0005 = 0.05%).
+        cache: BacktestCache для метрик комбинаций (None = без кэша).
+               Считаются только комбинации которых нет в кэше.
+        """
+        self.initial_capital = initial_capital
+        self.risk_per_trade = risk_per_trade
+        self.fee_rate = fee_rate
+        self.cache = cache
+
+    @staticmethod
+    def supports(strategy_class: Any) -> bool:
+        """
+        Можно ли заменить backtest strategy_class на sweep.
+
+        Только TortoiseStrategy (или наследник без своей логики сигналов).
+        Mock-классы и прочие стратегии идут через BacktestEngine.
+        """
+        return (
+            isinstance(strategy_class, type) and
+            issubclass(strategy_class, TortoiseStrategy) and
+            strategy_class.on_bar is TortoiseStrategy.on_bar and
+            strategy_class.generate_signals is TortoiseStrategy.generate_signals
+        )
+
+    def run(
+        self,
+        data: pd.DataFrame,
+        param_sets: List[Dict[str, Any]]
+    ) -> List[Dict[str, float]]:
+        """
+        Backtest всех комбинаций параметров на данных.
+
+        data: DataFrame с колонками timestamp, open, high, low, close, volume.
+        param_sets: Список словарей параметров TortoiseStrategy.
+
+        Возвращает: Список метрик (как BacktestEngine.calculate_metrics),
+                    в том же порядке что param_sets.
+        """
+        if not param_sets:
+            return []
+
+        # Периоды индикаторов с default значениями TortoiseStrategy
+        keys = []
+        for params in param_sets:
+            strategy = TortoiseStrategy(params)
+            keys.append((strategy.don_break, strategy.don_exit, strategy.trail_atr_len))
+
+        unique_keys = list(dict.fromkeys(keys))
+
+        metrics_by_key: Dict[Tuple[int, int, int], Dict[str, float]] = {}
+        cache_keys: Dict[Tuple[int, int, int], str] = {}
+
+        if self.cache is not None:
+            # Content hash данных один раз на все комбинации
+            data_hash = data_fingerprint(data)
+            for key in unique_keys:
+                cache_keys[key] = self._cache_key(data_hash, key)
+                cached = self.cache.get(cache_keys[key])
+                if cached is not None:
+                    metrics_by_key[key] = cached
+
+        missing_keys = [key for key in unique_keys if key not in metrics_by_key]
+        if missing_keys:
+            for key, metrics in zip(missing_keys, self._run_unique(data, missing_keys)):
+                metrics_by_key[key] = metrics
+                if self.cache is not None:
+                    self.cache.put(cache_keys[key], metrics)
+
+        return [dict(metrics_by_key[key]) for key in keys]
+
+    def _cache_key(self, data_hash: str, key: Tuple[int, int, int]) -> str:
+        """Ключ кэша метрик одной комбинации (don_break, don_exit, trail_atr_len)."""
+        return BacktestCache.make_key(TortoiseStrategy, data_hash, {
+            'engine': 'TortoiseSweep',
+            'periods': list(key),
+            'initial_capital': self.initial_capital,
+            'risk_per_trade': self.risk_per_trade,
+            'fee_rate': self.fee_rate
+        })
+
+    def _run_unique(
+        self,
+        data: pd.DataFrame,
+        keys: List[Tuple[int, int, int]]
+    ) -> List[Dict[str, float]]:
+        """
+        Один проход по барам для уникальных (don_break, don_exit, trail_atr_len).
+
+        Возвращает: Метрики для каждого ключа.
+        """
+        n_bars = len(data)
+        n_combos = len(keys)
+
+        if n_bars == 0:
+            return [summarize_trades([], 0.0, self.initial_capital, self.initial_capital)
+                    for _ in keys]
+
+        high = data['high'].to_numpy(dtype=np.float64)
+        low = data['low'].to_numpy(dtype=np.float64)
+        close = data['close'].to_numpy(dtype=np.float64)
+
+        # --- 1) ИНДИКАТОРЫ: один раз на уникальный период ---
+        break_periods = sorted({key[0] for key in keys})
+        exit_periods = sorted({key[1] for key in keys})
+        atr_periods = sorted({key[2] for key in keys})
+
+        helper = TortoiseStrategy({})
+        channels = {
+            period: helper._calculate_donchian(data, period)
+            for period in set(break_periods) | set(exit_periods)
+        }
+
+        # Матрицы (n_bars, n_periods): строка i - значения всех периодов на баре i
+        def prev_channel(periods, which):
+            return np.column_stack([
+                channels[period][which].shift(1).to_numpy(dtype=np.float64)
+                for period in periods
+            ])
+
+        break_upper = prev_channel(break_periods, 0)
+        break_lower = prev_channel(break_periods, 1)
+        exit_upper = prev_channel(exit_periods, 0)
+        exit_lower = prev_channel(exit_periods, 1)
+
+        atr_ok = np.column_stack([
+            ~np.isnan(helper._calculate_atr(data, period).to_numpy(dtype=np.float64))
+            for period in atr_periods
+        ])
+
+        # --- 2) СИГНАЛЫ на каждый break период (как generate_signals) ---
+        close_col = close[:, None]
+        break_ok = ~np.isnan(break_upper) & ~np.isnan(break_lower)
+
+        with np.errstate(invalid='ignore'):
+            is_long = close_col > break_upper
+            is_short = ~is_long & (close_col < break_lower)
+
+        stop = np.where(is_long, break_lower, break_upper)
+        risk_distance = np.abs(close_col - stop)
+        target = np.where(is_long, close_col + 2.0 * risk_distance, close_col - 2.0 * risk_distance)
+
+        with np.errstate(invalid='ignore'):
+            valid_long = (stop < close_col) & (target > close_col)
+            valid_short = (stop > close_col) & (target < close_col)
+            exit_long = close_col < exit_lower
+            exit_short = close_col > exit_upper
+
+        side = np.zeros(stop.shape, dtype=np.int8)
+        side[is_long & valid_long] = 1
+        side[is_short & valid_short] = -1
+
+        # --- 3) ИНДЕКСЫ КОМБИНАЦИЙ в матрицы индикаторов ---
+        break_idx = np.array([break_periods.index(key[0]) for key in keys])
+        exit_idx = np.array([exit_periods.index(key[1]) for key in keys])
+        atr_idx = np.array([atr_periods.index(key[2]) for key in keys])
+        min_history = np.array([max(key[0], key[2]) + 1 for key in keys])
+        max_min_history = int(min_history.max())
+
+        # --- 4) СОСТОЯНИЕ по оси комбинаций ---
+        equity = np.full(n_combos, float(self.initial_capital))
+        in_position = np.zeros(n_combos, dtype=bool)
+        position_long = np.zeros(n_combos, dtype=bool)
+        position_entry = np.zeros(n_combos)
+        position_stop = np.zeros(n_combos)
+        position_target = np.zeros(n_combos)
+        position_size = np.zeros(n_combos)
+
+        # Max drawdown считаем инкрементально по equity curve
+        # (equity меняется только при закрытии сделки)
+        running_max = equity.copy()
+        min_drawdown = np.zeros(n_combos)
+
+        closed_combos: List[np.ndarray] = []
+        closed_pnls: List[np.ndarray] = []
+
+        def close_positions(idx: np.ndarray, exit_price) -> None:
+            """Закрыть позиции комбинаций idx (формулы close_position)."""
+            entry = position_entry[idx]
+            size = position_size[idx]
+
+            price_diff = np.where(position_long[idx], exit_price - entry, entry - exit_price)
+            gross_pnl = price_diff * size
+
+            entry_cost = entry * size * self.fee_rate
+            exit_cost = exit_price * size * self.fee_rate
+            net_pnl = gross_pnl - (entry_cost + exit_cost)
+
+            equity[idx] += net_pnl
+            in_position[idx] = False
+
+            closed_combos.append(idx)
+            closed_pnls.append(net_pnl)
+
+        # --- 5) ОДИН ПРОХОД ПО БАРАМ ---
+        for i in range(n_bars):
+            ready = break_ok[i][break_idx] & atr_ok[i][atr_idx]
+            if i + 1 < max_min_history:
+                ready &= (i + 1 >= min_history)
+
+            had_position = in_position.copy()
+            closed_before = len(closed_combos)
+
+            # Entry (позиция уже есть -> сигнал игнорируется)
+            opening = ready & ~in_position & (side[i][break_idx] != 0)
+            if opening.any():
+                idx = np.flatnonzero(opening)
+                columns = break_idx[idx]
+
+                entry = close[i]
+                entry_stop = stop[i][columns]
+                risk_usd = (self.risk_per_trade / 100.0) * equity[idx]
+
+                in_position[idx] = True
+                position_long[idx] = side[i][columns] > 0
+                position_entry[idx] = entry
+                position_stop[idx] = entry_stop
+                position_target[idx] = target[i][columns]
+                position_size[idx] = risk_usd / np.abs(entry - entry_stop)
+
+            # EXIT сигнал (по состоянию позиции ДО entry)
+            if had_position.any():
+                exiting = had_position & ready & np.where(
+                    position_long,
+                    exit_long[i][exit_idx],
+                    exit_short[i][exit_idx]
+                )
+                if exiting.any():
+                    close_positions(np.flatnonzero(exiting), close[i])
+
+            # Stop / target (включая позиции открытые на этом баре)
+            if in_position.any():
+                stop_hit = in_position & np.where(
+                    position_long,
+                    low[i] <= position_stop,
+                    high[i] >= position_stop
+                )
+                target_hit = in_position & ~stop_hit & np.where(
+                    position_long,
+                    high[i] >= position_target,
+                    low[i] <= position_target
+                )
+                if stop_hit.any():
+                    idx = np.flatnonzero(stop_hit)
+                    close_positions(idx, position_stop[idx])
+                if target_hit.any():
+                    idx = np.flatnonzero(target_hit)
+                    close_positions(idx, position_target[idx])
+
+            # Equity curve: точка после каждого бара
+            if len(closed_combos) > closed_before:
+                idx = np.concatenate(closed_combos[closed_before:])
+                running_max[idx] = np.maximum(running_max[idx], equity[idx])
+                drawdown = (equity[idx] - running_max[idx]) / running_max[idx] * 100
+                min_drawdown[idx] = np.minimum(min_drawdown[idx], drawdown)
+
+        # Закрываем оставшиеся позиции по close последнего бара
+        # (как _close_all_positions - в equity curve уже не попадает)
+        if in_position.any():
+            close_positions(np.flatnonzero(in_position), close[-1])
+
+        # --- 6) МЕТРИКИ: P&L сделок каждой комбинации в порядке закрытия ---
+        if closed_combos:
+            combos = np.concatenate(closed_combos)
+            pnls = np.concatenate(closed_pnls)
+            order = np.argsort(combos, kind='stable')
+            pnls_by_combo = np.split(pnls[order], np.cumsum(np.bincount(combos, minlength=n_combos))[:-1])
+        else:
+            pnls_by_combo = [np.empty(0)] * n_combos
+
+        return [
+            summarize_trades(
+                pnls_by_combo[c].tolist(),
+                abs(min_drawdown[c]),
+                float(equity[c]),
+                self.initial_capital
+            )
+            for c in range(n_combos)
+        ]
+
+    def __repr__(self) -> str:
+        """Строковое представление."""
+        return (
+            f"TortoiseSweep("
+            f"capital={self.initial_capital:.0f}, "
+            f"risk={self.risk_per_trade}%)"
+        )
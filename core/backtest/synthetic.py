@@ -0,0 +1,57 @@
+"""
+Синтетические свечи для benchmarks и тестов.
+
+make_candles - geometric random walk с OHLCV колонками в формате
+DataManager.get_candles (timestamp, open, high, low, close, volume).
+Используется scripts/benchmark_backtest.py и тестами (tests/conftest.py).
+
+Пример:
+    from core.backtest.synthetic import make_candles
+
+    data = make_candles(100_000, freq='min', price=50000.0, volatility=0.001)
+"""
+
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+
+
+def make_candles(
+    n_bars: int,
+    seed: int = 42,
+    freq: str = 'D',
+    start: str = '2023-01-01',
+    price: float = 100.0,
+    volatility: float = 0.02,
+    spread: float = 0.01,
+    volume: Tuple[float, float] = (100.0, 1000.0)
+) -> pd.DataFrame:
+    """
+    Синтетические свечи (geometric random walk).
+
+    n_bars: Количество свечей.
+    seed: Seed для воспроизводимости.
+    freq: Частота timestamp (pandas offset alias: 'D', 'h', 'min').
+    start: Первый timestamp.
+    price: Начальная цена.
+    volatility: Std лог-доходности за бар.
+    spread: Std отступа high/low от тела свечи (доля цены).
+    volume: Диапазон volume (равномерно).
+
+    Возвращает: DataFrame с колонками timestamp, open, high, low, close, volume.
+    """
+    rng = np.random.default_rng(seed)
+
+    close = price * np.exp(np.cumsum(rng.normal(0, volatility, n_bars)))
+    open_ = np.concatenate([[close[0]], close[:-1]])
+    wick = np.abs(rng.normal(0, spread, n_bars)) * close
+
+    return pd.DataFrame({
+        'timestamp': pd.date_range(start, periods=n_bars, freq=freq),
+        'open': open_,
+        'high': np.maximum(open_, close) + wick,
+        'low': np.minimum(open_, close) - wick,
+        'close': close,
+        'volume': rng.uniform(volume[0], volume[1], n_bars)
+    })
@@ -7,13 +7,18 @@ Advanced Metrics Calculator для глубокого анализа страт
 - Omega Ratio (probability-weighted gains/losses)
 - VaR & CVaR (Value at Risk)
 - Recovery Factor
-- Rolling metrics
+- Rolling metrics (Sharpe, Sortino, drawdown)
+
+Все метрики считаются на numpy массивах без Python циклов по точкам,
+rolling метрики - за O(n) независимо от размера окна (cumsum /
+sliding max), поэтому подходят для equity curves с миллионами точек.
 
 Эти метрики дают более глубокое понимание risk/return профиля стратегии
 чем классические Sharpe и MaxDD.
 """
 
 import numpy as np
+import pandas as pd
 from typing import List, Dict, Any, Union
 
 
@@ -31,6 +36,10 @@ class AdvancedMetricsCalculator:
         
         # Все метрики сразу
         all_metrics = calc.calculate_all(equity_curve, returns)
+        
+        # Те же метрики для тысяч curves одним вызовом (таблица)
+        table = calc.calculate_batch(equity_matrix, returns_matrix)
+        best = table.sort_values('calmar_ratio', ascending=False).head(10)
     """
     
     def __init__(self):
@@ -55,7 +64,7 @@ class AdvancedMetricsCalculator:
         
         Возвращает: Calmar ratio.
         """
-        if not equity_curve or len(equity_curve) < 2:
+        if equity_curve is None or len(equity_curve) < 2:
             return 0.0
         
         # Total return
@@ -93,16 +102,18 @@ class AdvancedMetricsCalculator:
         
         Возвращает: Sortino ratio.
         """
-        if not returns:
+        if returns is None or len(returns) == 0:
             return 0.0
         
+        returns = np.asarray(returns, dtype=np.float64)
+        
         # Средний return
         mean_return = np.mean(returns)
         
         # Downside deviation (только negative returns)
-        downside_returns = [r for r in returns if r < 0]
+        downside_returns = returns[returns < 0]
         
-        if not downside_returns:
+        if not len(downside_returns):
             # Нет downside - возвращаем большое положительное число
             return 100.0  # Или можно вернуть inf
         
@@ -138,7 +149,7 @@ class AdvancedMetricsCalculator:
         
         Возвращает: Sharpe ratio.
         """
-        if not returns:
+        if returns is None or len(returns) == 0:
             return 0.0
         
         mean_return = np.mean(returns)
@@ -169,11 +180,12 @@ class AdvancedMetricsCalculator:
         
         Возвращает: VaR (отрицательное число для loss).
         """
-        if not returns:
+        if returns is None or len(returns) == 0:
             return 0.0
         
         # VaR = percentile на уровне (1 - confidence)
-        var = np.percentile(returns, (1 - confidence) * 100)
+        # (np.percentile - partition, без полной сортировки)
+        var = np.percentile(np.asarray(returns, dtype=np.float64), (1 - confidence) * 100)
         
         return float(var)
     
@@ -193,16 +205,17 @@ class AdvancedMetricsCalculator:
         
         Возвращает: CVaR (отрицательное число).
         """
-        if not returns:
+        if returns is None or len(returns) == 0:
             return 0.0
         
         # Находим VaR
         var = self.value_at_risk(returns, confidence)
         
         # CVaR = средний return среди тех что хуже VaR
-        tail_returns = [r for r in returns if r <= var]
+        returns = np.asarray(returns, dtype=np.float64)
+        tail_returns = returns[returns <= var]
         
-        if not tail_returns:
+        if not len(tail_returns):
             return var
         
         cvar = np.mean(tail_returns)
@@ -219,9 +232,11 @@ class AdvancedMetricsCalculator:
         
         Возвращает: Max drawdown (отрицательное число, %).
         """
-        if not equity_curve or len(equity_curve) < 2:
+        if equity_curve is None or len(equity_curve) < 2:
             return 0.0
         
+        equity_curve = np.asarray(equity_curve, dtype=np.float64)
+        
         # Running maximum
         running_max = np.maximum.accumulate(equity_curve)
         
@@ -250,12 +265,13 @@ class AdvancedMetricsCalculator:
         
         Возвращает: Omega ratio.
         """
-        if not returns:
+        if returns is None or len(returns) == 0:
             return 0.0
         
         # Gains и losses относительно threshold
-        gains = sum(r - threshold for r in returns if r > threshold)
-        losses = sum(abs(r - threshold) for r in returns if r < threshold)
+        excess = np.asarray(returns, dtype=np.float64) - threshold
+        gains = float(excess[excess > 0].sum())
+        losses = float(-excess[excess < 0].sum())
         
         if losses == 0:
             return 100.0 if gains > 0 else 0.0
@@ -276,7 +292,7 @@ class AdvancedMetricsCalculator:
         
         Возвращает: Recovery factor.
         """
-        if not equity_curve or len(equity_curve) < 2:
+        if equity_curve is None or len(equity_curve) < 2:
             return 0.0
         
         # Net profit
@@ -284,7 +300,7 @@ class AdvancedMetricsCalculator:
         
         # Max drawdown (абсолютное значение в денежном выражении)
         max_dd_pct = abs(self.max_drawdown(equity_curve))
-        max_dd_dollars = (max_dd_pct / 100) * max(equity_curve)
+        max_dd_dollars = (max_dd_pct / 100) * np.max(equity_curve)
         
         if max_dd_dollars == 0:
             return 0.0
@@ -302,32 +318,102 @@ class AdvancedMetricsCalculator:
         Рассчитать Rolling Sharpe Ratio.
         
         Показывает динамику risk-adjusted return во времени.
+        Mean и std (ddof=1) каждого окна - _rolling_mean_var, O(n) для
+        любого window.
         
         returns: Список returns.
         window: Rolling window size.
         
-        Возвращает: Array rolling Sharpe values.
+        Возвращает: Array rolling Sharpe values (len(returns) - window + 1).
         """
-        if not returns or len(returns) < window:
+        if returns is None or len(returns) < window or len(returns) == 0:
             return np.array([])
         
-        returns_array = np.array(returns)
-        rolling_sharpes = []
+        returns_array = np.asarray(returns, dtype=np.float64)
         
-        for i in range(len(returns_array) - window + 1):
-            window_returns = returns_array[i:i+window]
-            
-            mean_ret = np.mean(window_returns)
-            std_ret = np.std(window_returns, ddof=1)
-            
-            if std_ret > 0:
-                sharpe = mean_ret / std_ret
-            else:
-                sharpe = 0.0
-            
-            rolling_sharpes.append(sharpe)
+        mean_ret, var_ret = _rolling_mean_var(returns_array, window, ddof=1)
+        std_ret = np.sqrt(var_ret)
+        
+        rolling_sharpes = np.zeros_like(mean_ret)
+        np.divide(mean_ret, std_ret, out=rolling_sharpes, where=std_ret > 0)
+        
+        return rolling_sharpes
+    
+    def rolling_sortino(
+        self,
+        returns: List[float],
+        window: int = 30,
+        risk_free_rate: float = 0.0,
+        periods_per_year: int = 252
+    ) -> np.ndarray:
+        """
+        Рассчитать Rolling Sortino Ratio.
         
-        return np.array(rolling_sharpes)
+        Каждое значение = sortino_ratio(окно) с теми же правилами:
+        downside deviation - std (ddof=0) только negative returns окна,
+        100.0 если в окне нет downside или он постоянный.
+        Moments negative returns - _rolling_mean_var по маске.
+        
+        returns: Список returns (%).
+        window: Rolling window size.
+        risk_free_rate: Risk-free rate (annualized %).
+        periods_per_year: Периодов в году.
+        
+        Возвращает: Array rolling Sortino values (len(returns) - window + 1).
+        """
+        if returns is None or len(returns) < window or len(returns) == 0:
+            return np.array([])
+        
+        returns_array = np.asarray(returns, dtype=np.float64)
+        
+        mean_ret, _ = _rolling_mean_var(returns_array, window, ddof=0)
+        
+        # Только negative returns: в остальных точках 0 и count не растет
+        downside = np.minimum(returns_array, 0.0)
+        downside_count = _rolling_sum((returns_array < 0).astype(np.float64), window)
+        _, downside_var = _rolling_mean_var(
+            downside, window, ddof=0, mask=returns_array < 0, counts=downside_count
+        )
+        downside_deviation = np.sqrt(downside_var)
+        
+        annualized_return = mean_ret * periods_per_year
+        annualized_dd = downside_deviation * np.sqrt(periods_per_year)
+        
+        rolling_sortinos = np.full_like(mean_ret, 100.0)
+        np.divide(
+            annualized_return - risk_free_rate,
+            annualized_dd,
+            out=rolling_sortinos,
+            where=(downside_count > 0) & (downside_deviation > 0)
+        )
+        
+        return rolling_sortinos
+    
+    def rolling_max_drawdown(
+        self,
+        equity_curve: List[float],
+        window: int = 30
+    ) -> np.ndarray:
+        """
+        Рассчитать rolling max drawdown: max drawdown внутри каждого окна.
+        
+        Для каждого окна из window точек - max_drawdown(окно): наибольшее
+        падение от пика до последующей точки внутри окна (%). O(n) для
+        любого window - см. _sliding_max_drawdown.
+        
+        equity_curve: Список equity values (положительные).
+        window: Rolling window size.
+        
+        Возвращает: Array max drawdowns (отрицательные числа или 0, %),
+                    длина len(equity_curve) - window + 1, i-е значение -
+                    окно equity_curve[i:i + window].
+        """
+        if equity_curve is None or len(equity_curve) < window or len(equity_curve) == 0:
+            return np.array([])
+        
+        equity = np.asarray(equity_curve, dtype=np.float64)
+        
+        return _sliding_max_drawdown(equity, window) * 100
     
     def calculate_all(
         self,
@@ -357,6 +443,339 @@ class AdvancedMetricsCalculator:
         
         return metrics
     
+    def calculate_batch(
+        self,
+        equity_curves: np.ndarray,
+        returns: np.ndarray,
+        period_days: int = 365,
+        risk_free_rate: float = 0.0,
+        periods_per_year: int = 252
+    ) -> pd.DataFrame:
+        """
+        Рассчитать метрики calculate_all для многих curves одним вызовом.
+        
+        Каждая метрика считается по оси точек сразу для всех строк
+        (без цикла по curves), с теми же формулами и граничными случаями
+        что и отдельные методы.
+        
+        equity_curves: Матрица equity, n_curves × n_points.
+        returns: Матрица returns (%), n_curves × n_returns.
+        period_days: Количество дней в периоде (для Calmar).
+        risk_free_rate: Risk-free rate (annualized %) для Sharpe/Sortino.
+        periods_per_year: Периодов в году.
+        
+        Возвращает: DataFrame, строка на curve, колонки как ключи calculate_all.
+        """
+        equity = np.atleast_2d(np.asarray(equity_curves, dtype=np.float64))
+        returns = np.atleast_2d(np.asarray(returns, dtype=np.float64))
+        
+        if len(equity) != len(returns):
+            raise ValueError(
+                f"equity_curves и returns должны иметь одинаковое количество строк: "
+                f"{len(equity)} != {len(returns)}"
+            )
+        
+        n_curves = len(equity)
+        has_curve = equity.shape[1] >= 2
+        has_returns = returns.shape[1] > 0
+        
+        zeros = np.zeros(n_curves)
+        
+        # --- Equity метрики ---
+        if has_curve:
+            start = equity[:, 0]
+            final = equity[:, -1]
+            
+            # Drawdown от running max (те же формулы что max_drawdown)
+            running_max = np.maximum.accumulate(equity, axis=1)
+            drawdowns = equity - running_max
+            drawdowns /= running_max
+            max_dd = drawdowns.min(axis=1) * 100
+            del running_max, drawdowns
+            abs_dd = np.abs(max_dd)
+            
+            total_return = ((final - start) / start) * 100
+            years = period_days / 365.0
+            annualized_return = total_return / years if years > 0 else total_return
+            calmar = _safe_divide(annualized_return, abs_dd)
+            
+            max_dd_dollars = (abs_dd / 100) * equity.max(axis=1)
+            recovery = _safe_divide(final - start, max_dd_dollars)
+        else:
+            max_dd = calmar = recovery = zeros
+        
+        # --- Returns метрики ---
+        if has_returns:
+            n_returns = returns.shape[1]
+            mean_return = returns.mean(axis=1)
+            
+            # Sharpe (std ddof=1)
+            std_dev = returns.std(axis=1, ddof=1) if n_returns > 1 else np.full(n_curves, np.nan)
+            sharpe = _safe_divide(
+                mean_return * periods_per_year - risk_free_rate,
+                std_dev * np.sqrt(periods_per_year),
+                where=std_dev != 0
+            )
+            
+            # Sortino: std (ddof=0) только negative returns каждой строки
+            downside_mask = returns < 0
+            downside_count = downside_mask.sum(axis=1)
+            downside_sum = np.where(downside_mask, returns, 0.0).sum(axis=1)
+            downside_mean = _safe_divide(downside_sum, downside_count)
+            
+            deviations = np.where(downside_mask, returns - downside_mean[:, None], 0.0)
+            deviations *= deviations
+            downside_deviation = np.sqrt(_safe_divide(deviations.sum(axis=1), downside_count))
+            
+            sortino = np.full(n_curves, 100.0)
+            has_downside = (downside_count > 0) & (downside_deviation != 0)
+            sortino[has_downside] = (
+                (mean_return[has_downside] * periods_per_year - risk_free_rate) /
+                (downside_deviation[has_downside] * np.sqrt(periods_per_year))
+            )
+            
+            # Omega (threshold = 0)
+            gains = np.where(returns > 0, returns, 0.0).sum(axis=1)
+            losses = -downside_sum
+            omega = np.where(gains > 0, 100.0, 0.0)
+            np.divide(gains, losses, out=omega, where=losses != 0)
+            
+            # VaR / CVaR
+            var_95, var_99 = np.percentile(returns, [(1 - 0.95) * 100, (1 - 0.99) * 100], axis=1)
+            cvar_95 = _tail_mean(returns, var_95)
+            cvar_99 = _tail_mean(returns, var_99)
+        else:
+            sharpe = sortino = omega = zeros
+            var_95 = cvar_95 = var_99 = cvar_99 = zeros
+        
+        return pd.DataFrame({
+            'calmar_ratio': calmar,
+            'sortino_ratio': sortino,
+            'sharpe_ratio': sharpe,
+            'omega_ratio': omega,
+            'max_drawdown': max_dd,
+            'var_95': var_95,
+            'cvar_95': cvar_95,
+            'var_99': var_99,
+            'cvar_99': cvar_99,
+            'recovery_factor': recovery
+        })
+    
     def __repr__(self) -> str:
         """Строковое представление."""
         return "AdvancedMetricsCalculator()"
+
+
+def _safe_divide(numerator: np.ndarray, denominator: np.ndarray, where: np.ndarray = None) -> np.ndarray:
+    """Поэлементное деление, 0.0 там где denominator == 0 (или where=False)."""
+    if where is None:
+        where = denominator != 0
+    
+    result = np.zeros(np.broadcast(numerator, denominator).shape)
+    np.divide(numerator, denominator, out=result, where=where)
+    return result
+
+
+def _tail_mean(returns: np.ndarray, var: np.ndarray) -> np.ndarray:
+    """CVaR каждой строки: среднее returns <= VaR строки."""
+    tail = returns <= var[:, None]
+    tail_count = tail.sum(axis=1)
+    tail_sum = np.where(tail, returns, 0.0).sum(axis=1)
+    
+    return np.where(tail_count > 0, _safe_divide(tail_sum, tail_count), var)
+
+
+def _rolling_sum(values: np.ndarray, window: int) -> np.ndarray:
+    """Суммы всех окон размера window через cumsum (длина n - window + 1)."""
+    cumulative = np.concatenate(([0.0], np.cumsum(values)))
+    return cumulative[window:] - cumulative[:-window]
+
+
+def _rolling_mean_var(
+    values: np.ndarray,
+    window: int,
+    ddof: int = 0,
+    mask: np.ndarray = None,
+    counts: np.ndarray = None
+):
+    """
+    Rolling mean и variance за O(n) без потери точности.
+    
+    Ряд делится на блоки по window (как в _sliding_max): окно
+    [i, i + window - 1] = suffix блока с i + prefix следующего блока.
+    Суммы и суммы квадратов части считаются от ее собственной точки
+    (первой точки блока для prefix, последней - для suffix), prefix
+    cumsum слева направо, suffix - справа налево, т.е. каждая часть
+    накапливает только свои точки (не разность больших сумм по всему
+    ряду). Две части объединяются формулой Chan для variance.
+    
+    Variance ниже ошибки округления своего окна (window * eps * сумма
+    квадратов окна) считается нулевой - константное окно дает ровно 0
+    как np.std, а спокойные окна рядом с волатильными не обнуляются.
+    
+    values: Значения.
+    window: Размер окна.
+    ddof: Delta degrees of freedom (как в np.std).
+    mask: Учитывать только точки с mask=True (None = все).
+    counts: Количество точек mask в каждом окне (если уже посчитано).
+    
+    Возвращает: (mean, variance) длины n - window + 1. Для окон без точек
+                mask mean и variance равны 0.
+    """
+    n = len(values)
+    n_windows = n - window + 1
+    n_blocks = -(-n // window)
+    
+    weights = np.zeros(n_blocks * window)
+    weights[:n] = 1.0 if mask is None else mask
+    padded = np.zeros(n_blocks * window)
+    padded[:n] = values
+    padded *= weights
+    
+    weights = weights.reshape(n_blocks, window)
+    padded = padded.reshape(n_blocks, window)
+    
+    # Сдвиг каждой части - ее собственная точка: для prefix первая точка
+    # блока, для suffix - последняя (shifted data, без потери точности
+    # если в соседнем блоке значения другого масштаба)
+    has_points = weights > 0
+    rows = np.arange(n_blocks)
+    first = padded[rows, np.argmax(has_points, axis=1)]
+    last = padded[rows, window - 1 - np.argmax(has_points[:, ::-1], axis=1)]
+    
+    def part_sums(shift, cumulate):
+        deviations = (padded - shift[:, None]) * weights
+        return (
+            cumulate(weights),
+            cumulate(deviations),
+            cumulate(deviations * deviations)
+        )
+    
+    def prefix(array):
+        return np.cumsum(array, axis=1).ravel()
+    
+    def suffix(array):
+        return np.cumsum(array[:, ::-1], axis=1)[:, ::-1].ravel()
+    
+    starts = np.arange(n_windows)
+    ends = starts + window - 1
+    
+    # Часть A: suffix блока с начала окна (пусто если окно = целый блок)
+    has_suffix = (starts % window) != 0
+    count_a, sum_a, square_a = (
+        np.where(has_suffix, array[starts], 0.0)
+        for array in part_sums(last, suffix)
+    )
+    center_a = last[starts // window]
+    
+    # Часть B: prefix блока с концом окна
+    count_b, sum_b, square_b = (
+        array[ends] for array in part_sums(first, prefix)
+    )
+    center_b = first[ends // window]
+    
+    # Mean и M2 (сумма квадратов отклонений от своего mean) каждой части
+    def part_stats(count, total, square, center):
+        safe = np.maximum(count, 1.0)
+        offset = total / safe
+        m2 = np.maximum(square - total * offset, 0.0)
+        return center + offset, m2
+    
+    mean_a, m2_a = part_stats(count_a, sum_a, square_a, center_a)
+    mean_b, m2_b = part_stats(count_b, sum_b, square_b, center_b)
+    
+    if counts is None:
+        counts = count_a + count_b
+    safe_counts = np.maximum(counts, 1.0)
+    
+    # Chan: объединение двух частей
+    delta = mean_b - mean_a
+    mean = (count_a * mean_a + count_b * mean_b) / safe_counts
+    variance = m2_a + m2_b + delta * delta * count_a * count_b / safe_counts
+    
+    # Шум округления: относительно суммы квадратов самого окна
+    tolerance = window * np.finfo(np.float64).eps * (square_a + square_b)
+    variance[variance <= tolerance] = 0.0
+    
+    denominator = counts - ddof
+    np.divide(variance, denominator, out=variance, where=denominator > 0)
+    variance[denominator <= 0] = 0.0
+    
+    mean[counts == 0] = 0.0
+    
+    return mean, variance
+
+
+def _sliding_max(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Максимум каждого окна размера window (van Herk / Gil-Werman).
+    
+    Массив делится на блоки по window: для окна [i, i + window - 1]
+    максимум = max(suffix max блока с i, prefix max блока с i + window - 1).
+    
+    Возвращает: Массив длины n - window + 1.
+    """
+    n = len(values)
+    n_blocks = -(-n // window)
+    
+    padded = np.full(n_blocks * window, -np.inf)
+    padded[:n] = values
+    blocks = padded.reshape(n_blocks, window)
+    
+    prefix = np.maximum.accumulate(blocks, axis=1).ravel()
+    suffix = np.maximum.accumulate(blocks[:, ::-1], axis=1)[:, ::-1].ravel()
+    
+    return np.maximum(suffix[:n - window + 1], prefix[window - 1:n])
+
+
+def _sliding_max_drawdown(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Max drawdown каждого окна размера window (доля, <= 0), O(n).
+    
+    Блоки по window как в _sliding_max: окно [i, i + window - 1] =
+    A (suffix блока с i) + B (prefix следующего блока). Max drawdown
+    окна = min из:
+    - drawdown внутри B: prefix min (x - running max) / running max
+    - drawdown внутри A: suffix min по k (suffix min_k - x_k) / x_k
+      (suffix min блока от k не зависит от начала окна)
+    - пик в A, дно в B: (prefix min B - suffix max A) / suffix max A
+    
+    values: Положительные значения (equity).
+    
+    Возвращает: Массив длины n - window + 1.
+    """
+    n = len(values)
+    n_blocks = -(-n // window)
+    
+    # Дополнение последним значением (в окна не попадает)
+    padded = np.full(n_blocks * window, values[-1])
+    padded[:n] = values
+    blocks = padded.reshape(n_blocks, window)
+    
+    def prefix(function, array):
+        return function.accumulate(array, axis=1).ravel()
+    
+    def suffix(function, array):
+        return function.accumulate(array[:, ::-1], axis=1)[:, ::-1].ravel()
+    
+    running_max = np.maximum.accumulate(blocks, axis=1)
+    inside_prefix = prefix(np.minimum, (blocks - running_max) / running_max)
+    
+    suffix_min = np.minimum.accumulate(blocks[:, ::-1], axis=1)[:, ::-1]
+    inside_suffix = suffix(np.minimum, (suffix_min - blocks) / blocks)
+    
+    starts = np.arange(n - window + 1)
+    ends = starts + window - 1
+    
+    drawdown = inside_suffix[starts]
+    
+    # Окно не с начала блока: есть часть B в следующем блоке
+    split = (starts % window) != 0
+    peak_a = suffix(np.maximum, blocks)[starts[split]]
+    trough_b = prefix(np.minimum, blocks)[ends[split]]
+    drawdown[split] = np.minimum(
+        drawdown[split],
+        np.minimum(inside_prefix[ends[split]], (trough_b - peak_a) / peak_a)
+    )
+    
+    return drawdown
@@ -6,16 +6,31 @@ Monte Carlo использует randomization для оценки range воз
 2. Каждый раз вычисляем equity curve
 3. Анализируем распределение outcomes
 
+Режимы resampling (method):
+- 'shuffle' - перестановка сделок. Финальный equity одинаковый во всех
+  симуляциях, меняется только путь (drawdown, серии)
+- 'bootstrap' - iid выборка сделок с возвращением
+- 'block_bootstrap' - stationary bootstrap (Politis & Romano): блоки
+  подряд идущих сделок случайной длины (в среднем block_length),
+  сохраняет серии выигрышей/проигрышей
+- 'jitter' - bootstrap со случайным количеством сделок
+  (n_trades ± jitter · n_trades)
+
 Ключевые метрики:
 - Percentile curves (p5, p25, p50, p75, p95)
 - Probability of profit
 - Median vs Mean return
 - Best/Worst case scenarios
+- Распределение риска по путям: max drawdown, time under water,
+  longest losing streak, probability of ruin
 """
 
+import math
 import numpy as np
-from typing import List, Dict, Any
-import random
+from typing import List, Dict, Any, Optional, Tuple
+from concurrent.futures import Executor, ProcessPoolExecutor
+
+from core.research.parallel import chunk_indices, resolve_n_jobs
 
 
 class MonteCarloSimulator:
@@ -39,11 +54,31 @@ class MonteCarloSimulator:
         print(f"Median Return: {results['stats']['median_return']:.2f}%")
     """
     
+    METHODS = ('shuffle', 'bootstrap', 'block_bootstrap', 'jitter')
+    
+    # Гистограмма max drawdown в run_streaming: бины по 0.01% на [0, 100%]
+    DRAWDOWN_BIN_PCT = 0.01
+    DRAWDOWN_BINS = 10000
+    
+    # Percentiles equity curves: кусок шагов ~2M значений (16 MB float64)
+    PERCENTILE_CHUNK_VALUES = 2_000_000
+    
+    # Бинов на шаг для run_simulation(exact_percentiles=False)
+    PERCENTILE_BINS = 2048
+    
+    # run_streaming: диапазон гистограмм по первым путям блока 0
+    PILOT_PATHS = 1000
+    
     def __init__(
         self,
         n_simulations: int = 1000,
         initial_capital: float = 10000.0,
-        seed: int = None
+        seed: int = None,
+        block_size: int = 1000,
+        method: str = 'shuffle',
+        block_length: float = 5.0,
+        jitter: float = 0.2,
+        ruin_threshold: float = 0.5
     ):
         """
         Инициализация Monte Carlo Simulator.
@@ -51,21 +86,80 @@ class MonteCarloSimulator:
         n_simulations: Количество симуляций (permutations).
         initial_capital: Начальный капитал.
         seed: Random seed для воспроизводимости (опционально).
+        block_size: Симуляций в одном seed блоке. Каждый блок получает свой
+                    генератор из SeedSequence(seed).spawn(), поэтому
+                    результат зависит только от (seed, block_size) и не
+                    зависит от количества процессов. Блок - наименьшая
+                    единица работы для пула в run_streaming.
+        method: Режим resampling: 'shuffle', 'bootstrap',
+                'block_bootstrap' или 'jitter'.
+        block_length: Средняя длина блока для 'block_bootstrap' (в сделках).
+        jitter: Относительный разброс количества сделок для 'jitter'
+                (0.2 = от 80% до 120% сделок).
+        ruin_threshold: Доля потерянного капитала, которая считается ruin
+                        (0.5 = equity опустился до 50% initial_capital).
         """
+        if method not in self.METHODS:
+            raise ValueError(f"method должен быть одним из {self.METHODS}, получено {method!r}")
+        if block_length < 1:
+            raise ValueError(f"block_length должен быть >= 1, получено {block_length}")
+        if not 0 <= jitter < 1:
+            raise ValueError(f"jitter должен быть в [0, 1), получено {jitter}")
+        if not 0 < ruin_threshold <= 1:
+            raise ValueError(f"ruin_threshold должен быть в (0, 1], получено {ruin_threshold}")
+        
         self.n_simulations = n_simulations
         self.initial_capital = initial_capital
         self.seed = seed
+        self.block_size = block_size
+        self.method = method
+        self.block_length = block_length
+        self.jitter = jitter
+        self.ruin_threshold = ruin_threshold
         
-        # Устанавливаем seed если указан
-        if seed is not None:
-            random.seed(seed)
-            np.random.seed(seed)
+        # Глобальный random / np.random не трогаем - только свой SeedSequence.
+        # spawn() на каждый запуск: повторный run_* дает новые симуляции
+        # (как продолжение потока), но детерминированно для seed.
+        self._seed_sequence = np.random.SeedSequence(seed)
     
-    def run_simulation(self, trades: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def run_simulation(
+        self,
+        trades: List[Dict[str, Any]],
+        return_simulations: bool = True,
+        risk_stats: bool = False,
+        exact_percentiles: bool = True
+    ) -> Dict[str, Any]:
         """
         Запустить Monte Carlo simulation.
         
+        Симуляции считаются seed блоками по block_size строк: resampling
+        PnL (генератор блока), equity curves - cumsum по строкам, и пока
+        блок в кэше - финальный equity, risk метрики путей (risk_stats)
+        и гистограммы percentiles (exact_percentiles=False).
+        В режиме 'jitter' столбцов n_steps = max количество сделок,
+        пути с меньшим количеством сделок дополнены нулевым PnL.
+        
+        100k симуляций × 500 сделок, return_simulations=False, 1 core:
+        - по умолчанию (точные percentiles): ~3.2s, пик памяти ~520 MB -
+          resampling ~0.9s, cumsum ~0.2s, np.percentile ~1.7s (partition
+          по 100k значений на каждый шаг; на float32 не быстрее)
+        - exact_percentiles=False: ~2.0s, ~130 MB (матрица целиком не
+          хранится, гистограммы ~0.7s)
+        - risk_stats=True: +~1.2s
+        Меньше секунды на одном ядре не получается: одна перестановка
+        50M PnL (rng.permuted) занимает ~0.9s.
+        
         trades: Список сделок с полями 'pnl' и 'return_pct'.
+        return_simulations: Включать ли в результат список 'simulations'
+                            (equity curve каждой симуляции как Python list).
+                            Для больших n_simulations лучше False -
+                            percentiles и stats считаются и без него.
+        risk_stats: Добавить в stats распределение риска по путям
+                    (max drawdown, time under water, losing streak,
+                    prob_ruin) - точные значения по каждому пути.
+        exact_percentiles: True - np.percentile по всем путям на каждом
+                           шаге. False - StepQuantileSketch (PERCENTILE_BINS
+                           бинов на шаг, ошибка не больше ширины бина).
         
         Возвращает: Словарь с результатами:
             {
@@ -77,7 +171,8 @@ class MonteCarloSimulator:
                         'shuffled_pnl': [...]
                     },
                     ...
-                ],
+                ],  # пустой список если return_simulations=False
+                'n_simulations': ...,
                 'percentiles': {
                     'p5': [...],   # 5th percentile equity curve
                     'p25': [...],
@@ -91,7 +186,16 @@ class MonteCarloSimulator:
                     'mean_return': ...,
                     'worst_case_return': ...,
                     'best_case_return': ...,
-                    'median_final_equity': ...
+                    'median_final_equity': ...,
+                    # только при risk_stats=True:
+                    'median_max_drawdown': ...,   # % от пика, по путям
+                    'p95_max_drawdown': ...,
+                    'worst_max_drawdown': ...,
+                    'median_time_under_water': ...,  # сделок ниже пика подряд
+                    'max_time_under_water': ...,
+                    'median_losing_streak': ...,  # убыточных сделок подряд
+                    'max_losing_streak': ...,
+                    'prob_ruin': ...              # доля путей с ruin
                 }
             }
         """
@@ -99,98 +203,520 @@ class MonteCarloSimulator:
         if not trades:
             return self._empty_results()
         
-        simulations = []
+        pnl = np.array([t['pnl'] for t in trades], dtype=np.float64)
+        n_columns = self._n_steps(len(pnl)) + 1
         
-        # Запускаем N симуляций
-        for i in range(self.n_simulations):
-            # Shuffle trades (создаем копию и перемешиваем)
-            shuffled_trades = trades.copy()
-            random.shuffle(shuffled_trades)
+        # Матрица всех путей нужна только для точных percentiles и списка
+        # simulations, иначе блоки считаются в одном буфере
+        keep_matrix = exact_percentiles or return_simulations
+        if keep_matrix:
+            equity_matrix = np.empty((self.n_simulations, n_columns), dtype=np.float64)
+        else:
+            buffer = np.empty((min(self.block_size, self.n_simulations), n_columns), dtype=np.float64)
+        
+        shuffled_pnl = np.empty((self.n_simulations, n_columns - 1)) if return_simulations else None
+        final_equities = np.empty(self.n_simulations)
+        sketch = None if exact_percentiles else StepQuantileSketch(n_bins=self.PERCENTILE_BINS)
+        risk_chunks = []
+        
+        for start, n_rows, seed_sequence in self._spawn_blocks():
+            block = equity_matrix[start:start + n_rows] if keep_matrix else buffer[:n_rows]
             
-            # Вычисляем equity curve для этой permutation
-            equity_curve = self._calculate_equity_curve(shuffled_trades)
+            # Resampled PnL: каждая строка - отдельная симуляция
+            counts = self._fill_resampled(block, pnl, np.random.default_rng(seed_sequence))
             
-            # Сохраняем результаты симуляции
-            final_equity = equity_curve[-1]
-            return_pct = ((final_equity - self.initial_capital) / self.initial_capital) * 100
+            # Resampled PnL нужны только для списка simulations
+            if return_simulations:
+                shuffled_pnl[start:start + n_rows] = block[:, 1:]
             
-            simulations.append({
-                'equity_curve': equity_curve,
-                'final_equity': final_equity,
-                'return_pct': return_pct,
-                'shuffled_pnl': [t['pnl'] for t in shuffled_trades]
-            })
+            # Equity curves блока: n_rows × (n_trades + 1)
+            np.cumsum(block, axis=1, out=block)
+            
+            final_equities[start:start + n_rows] = block[:, -1]
+            if sketch is not None:
+                sketch.update(block)
+            if risk_stats:
+                risk_chunks.append(self._path_risk(block, counts))
+        
+        simulations = []
+        if return_simulations:
+            simulations = self._build_simulations(equity_matrix, shuffled_pnl)
+        
+        stats = self._calculate_stats(final_equities)
+        if risk_stats:
+            stats.update(self._calculate_risk_stats(risk_chunks))
         
-        # Вычисляем percentiles и stats
-        percentiles = self._calculate_percentiles(simulations)
-        stats = self._calculate_stats(simulations)
+        if sketch is None:
+            percentiles = self._calculate_percentiles(equity_matrix)
+        else:
+            percentiles = dict(zip(
+                ('p5', 'p25', 'p50', 'p75', 'p95'),
+                (curve.tolist() for curve in sketch.quantiles([5, 25, 50, 75, 95]))
+            ))
         
         return {
             'simulations': simulations,
+            'n_simulations': self.n_simulations,
             'percentiles': percentiles,
             'stats': stats
         }
     
-    def _calculate_equity_curve(self, trades: List[Dict[str, Any]]) -> List[float]:
+    def run_streaming(
+        self,
+        trades: List[Dict[str, Any]],
+        chunk_size: int = 10000,
+        n_sample_paths: int = 0,
+        n_bins: int = 2048,
+        n_jobs: int = 1,
+        executor: Optional[Executor] = None
+    ) -> Dict[str, Any]:
+        """
+        Monte Carlo с памятью не зависящей от n_simulations.
+        
+        Симуляции считаются seed блоками (те же пути что в run_simulation
+        при одинаковом seed), каждый блок - кусками по chunk_size строк.
+        Из каждого куска в память попадают только:
+        - StepQuantileSketch (гистограмма на каждый шаг equity curve)
+          для percentile bands
+        - Счетчики для stats (сумма, min/max, количество прибыльных)
+        - Гистограммы risk stats по путям (max drawdown - бины по 0.01%,
+          time under water и losing streak - точные счетчики по длине)
+        
+        Блоки независимы и считаются в пуле процессов (n_jobs): каждый
+        процесс получает группу подряд идущих блоков. Диапазон гистограмм
+        задается заранее по PILOT_PATHS первым путям блока 0 (тот же поток
+        генератора), поэтому в пул идут все блоки. Счетчики целые, суммы
+        returns блоков складываются через math.fsum, пути - в порядке
+        блоков: результат бит-в-бит одинаковый при любом n_jobs.
+        
+        Percentiles и медианы приближенные: ошибка не больше ширины бина
+        гистограммы (диапазон пилотных путей с запасом / n_bins).
+        Mean, worst/best case, prob_profit, prob_ruin и stats по
+        time under water / losing streak точные.
+        
+        trades: Список сделок с полем 'pnl'.
+        chunk_size: Симуляций в одном куске (память ~ chunk_size × n_trades).
+        n_sample_paths: Сколько первых симуляций сохранить целиком
+                        (для fan chart в UI). 0 = не сохранять.
+        n_bins: Бинов гистограммы на шаг (точность percentiles).
+        n_jobs: Количество процессов (1 = в текущем процессе, -1 = все ядра).
+        executor: Готовый executor вместо собственного ProcessPoolExecutor
+                  (каждый блок - отдельная задача).
+        
+        Возвращает: Словарь в формате run_simulation, 'simulations' содержит
+                    только n_sample_paths сохраненных путей.
+        """
+        # Handle empty trades
+        if not trades:
+            return self._empty_results()
+        
+        pnl = np.array([t['pnl'] for t in trades], dtype=np.float64)
+        blocks = self._spawn_blocks()
+        
+        # Бины гистограмм по первым путям блока 0: те же пути блок 0
+        # посчитает еще раз в своей задаче, зато все блоки идут в пул
+        _, first_rows, first_seed_sequence = blocks[0]
+        pilot = np.empty((min(self.PILOT_PATHS, first_rows), self._n_steps(len(pnl)) + 1))
+        self._fill_resampled(pilot, pnl, np.random.default_rng(first_seed_sequence))
+        np.cumsum(pilot, axis=1, out=pilot)
+        
+        bins = StepQuantileSketch(n_bins=n_bins)
+        bins.update(pilot)
+        del pilot
+        
+        # Задачи - группы подряд идущих блоков (свой executor - по блоку)
+        n_workers = resolve_n_jobs(n_jobs)
+        if executor is not None:
+            groups = [[i] for i in range(len(blocks))]
+        else:
+            groups = chunk_indices(len(blocks), n_workers)
+        
+        tasks = [
+            (pnl, [blocks[i] for i in group], chunk_size, bins, n_sample_paths)
+            for group in groups
+        ]
+        
+        pool = None
+        if executor is not None or len(tasks) > 1:
+            pool = executor or ProcessPoolExecutor(max_workers=n_workers)
+        
+        sketch = bins.empty_copy()
+        sample_paths: List[Dict[str, Any]] = []
+        profitable_count = 0
+        returns_sums: List[float] = []
+        worst_return = np.inf
+        best_return = -np.inf
+        risk_counts = None
+        
+        try:
+            if pool is not None:
+                # map отдает результаты в порядке задач
+                group_results = pool.map(_simulate_blocks_task, [(self,) + args for args in tasks])
+            else:
+                group_results = (self._simulate_blocks(*args) for args in tasks)
+            
+            # Объединяем в порядке блоков
+            for result in group_results:
+                sketch.merge(result['sketch'])
+                sample_paths.extend(result['paths'])
+                profitable_count += result['profitable_count']
+                returns_sums.extend(result['returns_sums'])
+                worst_return = min(worst_return, result['worst_return'])
+                best_return = max(best_return, result['best_return'])
+                risk_counts = self._merge_risk_counts(risk_counts, result['risk_counts'])
+        finally:
+            if pool is not None and executor is None:
+                pool.shutdown()
+        
+        # fsum: точная сумма, не зависит от группировки блоков
+        returns_sum = math.fsum(returns_sums)
+        
+        p5, p25, p50, p75, p95 = sketch.quantiles([5, 25, 50, 75, 95])
+        
+        median_final_equity = float(p50[-1])
+        
+        return {
+            'simulations': sample_paths,
+            'n_simulations': self.n_simulations,
+            'percentiles': {
+                'p5': p5.tolist(),
+                'p25': p25.tolist(),
+                'p50': p50.tolist(),  # Median
+                'p75': p75.tolist(),
+                'p95': p95.tolist()
+            },
+            'stats': {
+                'prob_profit': profitable_count / self.n_simulations,
+                'median_return': float(self._returns_pct(np.float64(median_final_equity))),
+                'mean_return': returns_sum / self.n_simulations,
+                'worst_case_return': worst_return,
+                'best_case_return': best_return,
+                'median_final_equity': median_final_equity,
+                **self._risk_stats_from_counts(risk_counts)
+            }
+        }
+    
+    def _spawn_blocks(self) -> List[Tuple[int, int, np.random.SeedSequence]]:
+        """
+        Разбить симуляции на seed блоки.
+        
+        Возвращает: [(первая симуляция, количество, SeedSequence блока), ...]
+        """
+        starts = list(range(0, self.n_simulations, self.block_size))
+        seed_sequences = self._seed_sequence.spawn(len(starts))
+        
+        return [
+            (start, min(self.block_size, self.n_simulations - start), seed_sequence)
+            for start, seed_sequence in zip(starts, seed_sequences)
+        ]
+    
+    def _simulate_blocks(
+        self,
+        pnl: np.ndarray,
+        blocks: List[Tuple[int, int, np.random.SeedSequence]],
+        chunk_size: int,
+        bins: 'StepQuantileSketch',
+        n_sample_paths: int
+    ) -> Dict[str, Any]:
+        """
+        Посчитать группу seed блоков (одна задача пула в run_streaming).
+        
+        pnl: Вектор PnL сделок.
+        blocks: Блоки из _spawn_blocks (подряд идущие).
+        chunk_size: Строк в куске.
+        bins: Sketch с бинами (группа считает в его пустую копию).
+        n_sample_paths: Сколько первых путей всей симуляции сохранить.
+        
+        Возвращает: {'sketch', 'paths', 'profitable_count', 'returns_sums'
+                     (сумма returns каждого блока), 'worst_return',
+                     'best_return', 'risk_counts'}.
+        """
+        sketch = bins.empty_copy()
+        
+        paths: List[Dict[str, Any]] = []
+        profitable_count = 0
+        returns_sums: List[float] = []
+        worst_return = np.inf
+        best_return = -np.inf
+        risk_counts = None
+        
+        for start, n_rows, seed_sequence in blocks:
+            result = self._simulate_block(
+                pnl, n_rows, seed_sequence, chunk_size, sketch,
+                max(0, n_sample_paths - start)
+            )
+            paths.extend(result['paths'])
+            profitable_count += result['profitable_count']
+            returns_sums.append(result['returns_sum'])
+            worst_return = min(worst_return, result['worst_return'])
+            best_return = max(best_return, result['best_return'])
+            risk_counts = self._merge_risk_counts(risk_counts, result['risk_counts'])
+        
+        return {
+            'sketch': sketch,
+            'paths': paths,
+            'profitable_count': profitable_count,
+            'returns_sums': returns_sums,
+            'worst_return': worst_return,
+            'best_return': best_return,
+            'risk_counts': risk_counts
+        }
+    
+    def _simulate_block(
+        self,
+        pnl: np.ndarray,
+        n_rows: int,
+        seed_sequence: np.random.SeedSequence,
+        chunk_size: int,
+        sketch: 'StepQuantileSketch',
+        n_sample_paths: int
+    ) -> Dict[str, Any]:
+        """
+        Посчитать один seed блок кусками по chunk_size.
+        
+        pnl: Вектор PnL сделок.
+        n_rows: Симуляций в блоке.
+        seed_sequence: SeedSequence блока.
+        chunk_size: Строк в куске.
+        sketch: Sketch с готовыми бинами, в него добавляются пути блока.
+        n_sample_paths: Сколько первых путей блока сохранить.
+        
+        Возвращает: {'paths', 'profitable_count', 'returns_sum',
+                     'worst_return', 'best_return', 'risk_counts'}.
+        """
+        rng = np.random.default_rng(seed_sequence)
+        
+        paths: List[Dict[str, Any]] = []
+        profitable_count = 0
+        returns_sum = 0.0
+        worst_return = np.inf
+        best_return = -np.inf
+        risk_counts = None
+        
+        for start in range(0, n_rows, chunk_size):
+            rows = min(chunk_size, n_rows - start)
+            
+            equity_chunk = np.empty((rows, self._n_steps(len(pnl)) + 1), dtype=np.float64)
+            counts = self._fill_resampled(equity_chunk, pnl, rng)
+            
+            # Сохраняем первые пути как есть (до cumsum нужны resampled PnL)
+            n_keep = min(n_sample_paths - len(paths), rows)
+            shuffled_pnl = equity_chunk[:n_keep, 1:].copy() if n_keep > 0 else None
+            
+            np.cumsum(equity_chunk, axis=1, out=equity_chunk)
+            
+            if n_keep > 0:
+                paths.extend(self._build_simulations(equity_chunk[:n_keep], shuffled_pnl))
+            
+            sketch.update(equity_chunk)
+            
+            # Скалярные stats по финальному equity
+            returns = self._returns_pct(equity_chunk[:, -1])
+            profitable_count += int(np.count_nonzero(returns > 0))
+            returns_sum += float(returns.sum())
+            worst_return = min(worst_return, float(returns.min()))
+            best_return = max(best_return, float(returns.max()))
+            
+            risk_counts = self._merge_risk_counts(
+                risk_counts, self._count_risk(self._path_risk(equity_chunk, counts))
+            )
+        
+        return {
+            'paths': paths,
+            'profitable_count': profitable_count,
+            'returns_sum': returns_sum,
+            'worst_return': worst_return,
+            'best_return': best_return,
+            'risk_counts': risk_counts
+        }
+    
+    def _n_steps(self, n_trades: int) -> int:
+        """Количество сделок (столбцов PnL) в симуляции."""
+        if self.method == 'jitter':
+            return int(np.floor(n_trades * (1 + self.jitter)))
+        return n_trades
+    
+    def _fill_resampled(self, matrix: np.ndarray, pnl: np.ndarray, rng: np.random.Generator):
+        """
+        Заполнить матрицу для cumsum: initial_capital + resampled PnL.
+        
+        Все строки заполняются одной batched выборкой (без цикла по путям).
+        Выборка идет построчно из потока генератора, поэтому пути не
+        зависят от того, какими кусками строк заполняется матрица.
+        
+        matrix: Матрица n_rows × (n_steps + 1) для заполнения.
+                Первый столбец = initial_capital, дальше PnL сделок
+                симуляции. После cumsum по строкам это equity curves -
+                сложение в том же порядке что current_equity += pnl.
+        pnl: Вектор PnL сделок (n_trades).
+        rng: Генератор блока.
+        
+        Возвращает: Количество сделок каждого пути для 'jitter' (дальше
+                    нулевой PnL), для остальных режимов None (все n_steps).
+        """
+        matrix[:, 0] = self.initial_capital
+        resampled = matrix[:, 1:]
+        n_rows, n_steps = resampled.shape
+        n_trades = len(pnl)
+        
+        if self.method == 'shuffle':
+            # Перестановка на месте, каждая строка независимо
+            resampled[:] = pnl
+            rng.permuted(resampled, axis=1, out=resampled)
+        
+        elif self.method == 'bootstrap':
+            np.take(pnl, rng.integers(0, n_trades, size=(n_rows, n_steps)), out=resampled)
+        
+        elif self.method == 'block_bootstrap':
+            np.take(pnl, self._stationary_indices(n_rows, n_trades, rng), out=resampled)
+        
+        else:  # jitter
+            # Одна выборка на строку: u[:, 0] - количество сделок пути,
+            # остальные - индексы сделок
+            uniform = rng.random((n_rows, n_steps + 1))
+            np.take(pnl, (uniform[:, 1:] * n_trades).astype(np.intp), out=resampled)
+            
+            # Количество сделок пути: [n·(1 - jitter), n·(1 + jitter)],
+            # сделки после него - нулевой PnL (equity не меняется)
+            low = max(1, int(np.ceil(n_trades * (1 - self.jitter))))
+            counts = low + (uniform[:, 0] * (n_steps + 1 - low)).astype(np.intp)
+            resampled[np.arange(n_steps) >= counts[:, None]] = 0.0
+            return counts
+        
+        return None
+    
+    def _stationary_indices(
+        self,
+        n_rows: int,
+        n_trades: int,
+        rng: np.random.Generator
+    ) -> np.ndarray:
         """
-        Вычислить equity curve для последовательности сделок.
+        Индексы сделок для stationary bootstrap (Politis & Romano).
         
-        trades: Список сделок в определенном порядке.
+        На каждой позиции с вероятностью 1 / block_length начинается новый
+        блок со случайной сделки, иначе берется следующая сделка
+        (циклически). Позиция начала текущего блока - running max по
+        позициям начал, без цикла по путям.
         
-        Возвращает: Список equity values начиная с initial_capital.
+        Возвращает: Матрица индексов n_rows × n_trades.
         """
-        equity_curve = [self.initial_capital]
-        current_equity = self.initial_capital
+        positions = np.arange(n_trades)
+        start_probability = 1.0 / self.block_length
+        
+        # Одна выборка: u < p - начало блока, и тогда u / p ~ U[0, 1)
+        # задает сделку с которой блок начинается
+        uniform = rng.random((n_rows, n_trades))
+        block_start = uniform < start_probability
+        
+        start_uniform = uniform / start_probability
+        
+        # Первая позиция - всегда начало блока: при u >= p сделку задает
+        # (u - p) / (1 - p) ~ U[0, 1)
+        first = uniform[:, 0]
+        if start_probability < 1.0:
+            start_uniform[:, 0] = np.where(
+                block_start[:, 0],
+                start_uniform[:, 0],
+                (first - start_probability) / (1.0 - start_probability)
+            )
+        block_start[:, 0] = True
         
-        for trade in trades:
-            # Добавляем PnL к текущему equity
-            current_equity += trade['pnl']
-            equity_curve.append(current_equity)
+        start_index = (start_uniform * n_trades).astype(np.intp)
+        np.minimum(start_index, n_trades - 1, out=start_index)
         
-        return equity_curve
+        # Позиция начала блока для каждой позиции
+        last_start = np.where(block_start, positions, 0)
+        np.maximum.accumulate(last_start, axis=1, out=last_start)
+        
+        indices = np.take_along_axis(start_index, last_start, axis=1)
+        indices += positions - last_start
+        indices %= n_trades
+        
+        return indices
     
-    def _calculate_percentiles(self, simulations: List[Dict[str, Any]]) -> Dict[str, List[float]]:
+    def _build_simulations(
+        self,
+        equity_matrix: np.ndarray,
+        pnl_matrix: np.ndarray
+    ) -> List[Dict[str, Any]]:
+        """
+        Список симуляций в старом формате (Python lists).
+        
+        equity_matrix: Equity curves, n_simulations × (n_trades + 1).
+        pnl_matrix: Resampled PnL, n_simulations × n_steps.
+        
+        Возвращает: [{'equity_curve', 'final_equity', 'return_pct', 'shuffled_pnl'}, ...]
+        """
+        final_equities = equity_matrix[:, -1]
+        returns = self._returns_pct(final_equities)
+        
+        return [
+            {
+                'equity_curve': equity_curve,
+                'final_equity': final_equity,
+                'return_pct': return_pct,
+                'shuffled_pnl': shuffled_pnl
+            }
+            for equity_curve, final_equity, return_pct, shuffled_pnl in zip(
+                equity_matrix.tolist(),
+                final_equities.tolist(),
+                returns.tolist(),
+                pnl_matrix.tolist()
+            )
+        ]
+    
+    def _returns_pct(self, final_equities: np.ndarray) -> np.ndarray:
+        """Доходность в % от initial_capital."""
+        return ((final_equities - self.initial_capital) / self.initial_capital) * 100
+    
+    def _calculate_percentiles(self, equity_matrix: np.ndarray) -> Dict[str, List[float]]:
         """
         Вычислить percentile equity curves.
         
-        simulations: Список всех симуляций.
+        equity_matrix: Equity curves всех симуляций,
+                       n_simulations × (n_trades + 1).
         
         Возвращает: Словарь с percentile curves.
         """
-        # Собираем все equity curves в матрицу
-        # Размерность: n_simulations × (n_trades + 1)
-        equity_matrix = np.array([sim['equity_curve'] for sim in simulations])
+        # Куски по несколько шагов (столбцов): копия куска в Fortran order,
+        # чтобы partition по axis=0 шел по непрерывной памяти и мог портить
+        # копию (overwrite_input). Полная транспонированная копия матрицы
+        # не нужна - дополнительная память только на один кусок.
+        # 100k симуляций × 500 сделок: ~1.7s на 1 core (partition; на
+        # float32 ~1.5s - не стоит потери точности).
+        n_simulations, n_steps = equity_matrix.shape
+        chunk_steps = max(1, self.PERCENTILE_CHUNK_VALUES // max(n_simulations, 1))
         
-        # Вычисляем percentiles для каждого временного шага
-        p5 = np.percentile(equity_matrix, 5, axis=0).tolist()
-        p25 = np.percentile(equity_matrix, 25, axis=0).tolist()
-        p50 = np.percentile(equity_matrix, 50, axis=0).tolist()  # Median
-        p75 = np.percentile(equity_matrix, 75, axis=0).tolist()
-        p95 = np.percentile(equity_matrix, 95, axis=0).tolist()
+        curves = np.empty((5, n_steps))
+        for start in range(0, n_steps, chunk_steps):
+            chunk = np.asfortranarray(equity_matrix[:, start:start + chunk_steps])
+            curves[:, start:start + chunk_steps] = np.percentile(
+                chunk, [5, 25, 50, 75, 95], axis=0, overwrite_input=True
+            )
+        p5, p25, p50, p75, p95 = curves
         
         return {
-            'p5': p5,
-            'p25': p25,
-            'p50': p50,
-            'p75': p75,
-            'p95': p95
+            'p5': p5.tolist(),
+            'p25': p25.tolist(),
+            'p50': p50.tolist(),  # Median
+            'p75': p75.tolist(),
+            'p95': p95.tolist()
         }
     
-    def _calculate_stats(self, simulations: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def _calculate_stats(self, final_equities: np.ndarray) -> Dict[str, Any]:
         """
         Вычислить агрегированные статистики.
         
-        simulations: Список всех симуляций.
+        final_equities: Финальный equity каждой симуляции.
         
         Возвращает: Словарь со статистиками.
         """
-        # Собираем финальные returns из всех симуляций
-        returns = [sim['return_pct'] for sim in simulations]
-        final_equities = [sim['final_equity'] for sim in simulations]
+        # Финальные returns всех симуляций
+        returns = self._returns_pct(final_equities)
         
         # Вероятность прибыли
-        profitable_sims = sum(1 for r in returns if r > 0)
-        prob_profit = profitable_sims / len(simulations) if simulations else 0.0
+        prob_profit = float(np.count_nonzero(returns > 0) / len(returns)) if len(returns) else 0.0
         
         # Медиана и среднее
         median_return = np.median(returns)
@@ -212,12 +738,171 @@ class MonteCarloSimulator:
             'median_final_equity': float(median_final_equity)
         }
     
+    def _path_risk(
+        self,
+        equity_matrix: np.ndarray,
+        counts: Optional[np.ndarray] = None
+    ) -> Dict[str, np.ndarray]:
+        """
+        Risk метрики каждого пути (строки) одним vectorized проходом.
+        
+        Из float64 временных массивов создается только один (running max,
+        дальше он же переиспользуется под equity / peak), остальное -
+        bool и int32 матрицы.
+        
+        equity_matrix: Equity curves, n_paths × (n_steps + 1).
+        counts: Количество сделок каждого пути (jitter, из _fill_resampled).
+                Шаги после counts[i] - дополнение нулевым PnL, в time under
+                water, losing streak и max drawdown не считаются.
+                None = все шаги - сделки.
+        
+        Возвращает: {
+            'max_drawdown': max drawdown пути в % от пика (положительный),
+            'time_under_water': самый длинный период ниже пика (в сделках),
+            'losing_streak': самая длинная серия убыточных сделок,
+            'ruined': опускался ли equity до уровня ruin
+        }
+        """
+        ruin_level = self.initial_capital * (1 - self.ruin_threshold)
+        ruined = equity_matrix.min(axis=1) <= ruin_level
+        
+        # Шаги дополнения после последней сделки пути (столбцы 1..n_steps)
+        padding = None
+        if counts is not None:
+            padding = np.arange(1, equity_matrix.shape[1]) > counts[:, None]
+        
+        # Серия убыточных сделок: equity уменьшился на шаге
+        losing = equity_matrix[:, 1:] < equity_matrix[:, :-1]
+        if padding is not None:
+            losing &= ~padding
+        losing_streak = _longest_true_run(losing)
+        del losing
+        
+        # Running max -> equity / peak в том же буфере
+        ratio = np.maximum.accumulate(equity_matrix, axis=1)
+        np.divide(equity_matrix, ratio, out=ratio)
+        if padding is not None:
+            ratio[:, 1:][padding] = 1.0
+        
+        time_under_water = _longest_true_run(ratio < 1.0)
+        max_drawdown = (1.0 - ratio.min(axis=1)) * 100
+        
+        return {
+            'max_drawdown': max_drawdown,
+            'time_under_water': time_under_water,
+            'losing_streak': losing_streak,
+            'ruined': ruined
+        }
+    
+    def _calculate_risk_stats(self, chunks: List[Dict[str, np.ndarray]]) -> Dict[str, float]:
+        """
+        Точные risk stats по всем путям.
+        
+        chunks: Результаты _path_risk по блокам путей (блоки считаются
+                по одному, временные массивы не зависят от n_simulations).
+        
+        Возвращает: Словарь risk stats (ключи как в run_simulation).
+        """
+        risk = {key: np.concatenate([chunk[key] for chunk in chunks]) for key in chunks[0]}
+        
+        return {
+            'median_max_drawdown': float(np.median(risk['max_drawdown'])),
+            'p95_max_drawdown': float(np.percentile(risk['max_drawdown'], 95)),
+            'worst_max_drawdown': float(risk['max_drawdown'].max()),
+            'median_time_under_water': float(np.median(risk['time_under_water'])),
+            'max_time_under_water': int(risk['time_under_water'].max()),
+            'median_losing_streak': float(np.median(risk['losing_streak'])),
+            'max_losing_streak': int(risk['losing_streak'].max()),
+            'prob_ruin': float(np.count_nonzero(risk['ruined']) / len(risk['ruined']))
+        }
+    
+    def _count_risk(self, risk: Dict[str, np.ndarray]) -> Dict[str, Any]:
+        """
+        Гистограммы risk метрик куска путей (для run_streaming).
+        
+        risk: Результат _path_risk.
+        
+        Возвращает: {'drawdown', 'time_under_water', 'losing_streak' - counts,
+                     'worst_drawdown', 'ruin_count', 'count'}.
+        """
+        drawdown_bins = np.minimum(
+            (risk['max_drawdown'] / self.DRAWDOWN_BIN_PCT).astype(np.intp),
+            self.DRAWDOWN_BINS - 1
+        )
+        
+        return {
+            'drawdown': np.bincount(np.maximum(drawdown_bins, 0), minlength=self.DRAWDOWN_BINS),
+            'time_under_water': np.bincount(risk['time_under_water']),
+            'losing_streak': np.bincount(risk['losing_streak']),
+            'worst_drawdown': float(risk['max_drawdown'].max()),
+            'ruin_count': int(np.count_nonzero(risk['ruined'])),
+            'count': len(risk['ruined'])
+        }
+    
+    @staticmethod
+    def _merge_risk_counts(
+        counts: Optional[Dict[str, Any]],
+        other: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Сложить гистограммы risk метрик (counts=None - первый кусок)."""
+        if counts is None:
+            return other
+        
+        merged = {
+            'worst_drawdown': max(counts['worst_drawdown'], other['worst_drawdown']),
+            'ruin_count': counts['ruin_count'] + other['ruin_count'],
+            'count': counts['count'] + other['count']
+        }
+        for key in ('drawdown', 'time_under_water', 'losing_streak'):
+            a, b = counts[key], other[key]
+            if len(a) < len(b):
+                a, b = b, a
+            total = a.copy()
+            total[:len(b)] += b
+            merged[key] = total
+        
+        return merged
+    
+    def _risk_stats_from_counts(self, counts: Dict[str, Any]) -> Dict[str, float]:
+        """
+        Risk stats из гистограмм (run_streaming).
+        
+        Медианы time under water / losing streak точные (целые значения),
+        percentiles max drawdown - с точностью DRAWDOWN_BIN_PCT (центр бина,
+        для первого бина - нижняя граница 0: пути без просадки дают ровно 0);
+        drawdown больше 100% (equity ушел ниже нуля) попадает в последний бин,
+        worst_max_drawdown при этом точный. Percentiles drawdown ограничены
+        [0, worst_max_drawdown].
+        """
+        drawdown_values = (np.arange(self.DRAWDOWN_BINS) + 0.5) * self.DRAWDOWN_BIN_PCT
+        drawdown_values[0] = 0.0
+        worst_drawdown = counts['worst_drawdown']
+        
+        def percentile(key, q, values=None):
+            bins = counts[key]
+            return _histogram_percentile(bins, q, np.arange(len(bins)) if values is None else values)
+        
+        def drawdown_percentile(q):
+            return float(np.clip(percentile('drawdown', q, drawdown_values), 0.0, max(worst_drawdown, 0.0)))
+        
+        return {
+            'median_max_drawdown': drawdown_percentile(50),
+            'p95_max_drawdown': drawdown_percentile(95),
+            'worst_max_drawdown': worst_drawdown,
+            'median_time_under_water': percentile('time_under_water', 50),
+            'max_time_under_water': int(np.flatnonzero(counts['time_under_water'])[-1]),
+            'median_losing_streak': percentile('losing_streak', 50),
+            'max_losing_streak': int(np.flatnonzero(counts['losing_streak'])[-1]),
+            'prob_ruin': counts['ruin_count'] / counts['count']
+        }
+    
     def _empty_results(self) -> Dict[str, Any]:
         """
         Возвращает пустые результаты для случая без сделок.
         """
         return {
             'simulations': [],
+            'n_simulations': 0,
             'percentiles': {
                 'p5': [self.initial_capital],
                 'p25': [self.initial_capital],
@@ -231,7 +916,15 @@ class MonteCarloSimulator:
                 'mean_return': 0.0,
                 'worst_case_return': 0.0,
                 'best_case_return': 0.0,
-                'median_final_equity': self.initial_capital
+                'median_final_equity': self.initial_capital,
+                'median_max_drawdown': 0.0,
+                'p95_max_drawdown': 0.0,
+                'worst_max_drawdown': 0.0,
+                'median_time_under_water': 0.0,
+                'max_time_under_water': 0,
+                'median_losing_streak': 0.0,
+                'max_losing_streak': 0,
+                'prob_ruin': 0.0
             }
         }
     
@@ -240,6 +933,217 @@ class MonteCarloSimulator:
         return (
             f"MonteCarloSimulator("
             f"n={self.n_simulations}, "
+            f"method={self.method}, "
             f"capital={self.initial_capital:.0f})"
         )
 
+
+class StepQuantileSketch:
+    """
+    Приближенные квантили для каждого шага equity curve (streaming).
+    
+    На каждый шаг - гистограмма из n_bins бинов. Диапазон бинов берется
+    из первого куска данных с запасом margin с каждой стороны; значения
+    за диапазоном попадают в крайние бины. Обновление vectorized: один
+    np.bincount на кусок матрицы.
+    
+    Память: n_steps × n_bins счетчиков, не зависит от количества строк.
+    Ошибка квантиля не больше ширины бина (внутри диапазона).
+    
+    Пример:
+        sketch = StepQuantileSketch(n_bins=2048)
+        for chunk in chunks:        # chunk: n_rows × n_steps
+            sketch.update(chunk)
+        
+        p5, p50, p95 = sketch.quantiles([5, 50, 95])
+    """
+    
+    def __init__(self, n_bins: int = 2048, margin: float = 0.5):
+        """
+        Инициализация sketch.
+        
+        n_bins: Количество бинов на шаг.
+        margin: Запас диапазона в долях от (max - min) первого куска.
+        """
+        if n_bins < 1:
+            raise ValueError(f"n_bins must be >= 1, got {n_bins}")
+        
+        self.n_bins = n_bins
+        self.margin = margin
+        self.count = 0
+        
+        # Инициализируются на первом update
+        self.counts = None
+        self.lower = None
+        self.width = None
+        self.min = None
+        self.max = None
+    
+    def update(self, matrix: np.ndarray):
+        """
+        Добавить кусок строк.
+        
+        matrix: Матрица n_rows × n_steps (строка = одна equity curve).
+        """
+        if len(matrix) == 0:
+            return
+        
+        chunk_min = matrix.min(axis=0)
+        chunk_max = matrix.max(axis=0)
+        
+        if self.counts is None:
+            self._init_bins(chunk_min, chunk_max)
+        else:
+            np.minimum(self.min, chunk_min, out=self.min)
+            np.maximum(self.max, chunk_max, out=self.max)
+        
+        n_steps = matrix.shape[1]
+        
+        # Номер бина для каждого значения + смещение шага -> один bincount
+        bins = (matrix - self.lower) / self.width
+        np.floor(bins, out=bins)
+        np.clip(bins, 0, self.n_bins - 1, out=bins)
+        
+        flat = bins.astype(np.int64)
+        flat += np.arange(n_steps, dtype=np.int64) * self.n_bins
+        
+        self.counts += np.bincount(
+            flat.ravel(), minlength=n_steps * self.n_bins
+        ).reshape(n_steps, self.n_bins)
+        
+        self.count += len(matrix)
+    
+    def empty_copy(self) -> 'StepQuantileSketch':
+        """
+        Пустой sketch с теми же бинами (для независимых кусков данных,
+        которые потом объединяются через merge).
+        """
+        if self.counts is None:
+            raise ValueError("sketch bins are not initialized")
+        
+        copy = StepQuantileSketch(n_bins=self.n_bins, margin=self.margin)
+        copy.lower = self.lower
+        copy.width = self.width
+        copy.counts = np.zeros_like(self.counts)
+        copy.min = np.full_like(self.min, np.inf)
+        copy.max = np.full_like(self.max, -np.inf)
+        
+        return copy
+    
+    def merge(self, other: 'StepQuantileSketch'):
+        """
+        Добавить другой sketch с теми же бинами (см. empty_copy).
+        
+        other: Sketch для объединения.
+        """
+        if other.count == 0:
+            return
+        
+        if not (np.array_equal(self.lower, other.lower) and
+                np.array_equal(self.width, other.width)):
+            raise ValueError("sketches have different bins")
+        
+        self.counts += other.counts
+        np.minimum(self.min, other.min, out=self.min)
+        np.maximum(self.max, other.max, out=self.max)
+        self.count += other.count
+    
+    def quantiles(self, percentiles: List[float]) -> np.ndarray:
+        """
+        Приближенные percentiles для каждого шага.
+        
+        percentiles: Список percentiles в [0, 100].
+        
+        Возвращает: Массив len(percentiles) × n_steps.
+        """
+        if self.counts is None:
+            raise ValueError("sketch is empty")
+        
+        cumulative = np.cumsum(self.counts, axis=1)
+        steps = np.arange(self.counts.shape[0])
+        
+        result = []
+        for q in percentiles:
+            # Ранг как в np.percentile (linear): q * (N - 1), 0-based
+            rank = q / 100.0 * (self.count - 1)
+            
+            # Первый бин где накопленное количество > rank
+            bin_idx = np.minimum((cumulative <= rank).sum(axis=1), self.n_bins - 1)
+            
+            in_bin = self.counts[steps, bin_idx]
+            before = cumulative[steps, bin_idx] - in_bin
+            
+            # Линейно внутри бина (значения считаем равномерно распределенными)
+            fraction = (rank - before + 0.5) / np.maximum(in_bin, 1)
+            values = self.lower + (bin_idx + np.clip(fraction, 0.0, 1.0)) * self.width
+            
+            result.append(np.clip(values, self.min, self.max))
+        
+        return np.array(result)
+    
+    def _init_bins(self, chunk_min: np.ndarray, chunk_max: np.ndarray):
+        """Диапазон бинов по первому куску (с запасом)."""
+        spread = chunk_max - chunk_min
+        
+        # Шаги где все значения одинаковые (например initial_capital)
+        # получают небольшой ненулевой диапазон
+        padding = np.where(
+            spread > 0,
+            spread * self.margin,
+            np.maximum(np.abs(chunk_min), 1.0) * 1e-9
+        )
+        
+        self.lower = chunk_min - padding
+        self.width = (chunk_max + padding - self.lower) / self.n_bins
+        self.counts = np.zeros((len(chunk_min), self.n_bins), dtype=np.int64)
+        self.min = chunk_min.copy()
+        self.max = chunk_max.copy()
+    
+    def __repr__(self) -> str:
+        """Строковое представление."""
+        return f"StepQuantileSketch(bins={self.n_bins}, count={self.count})"
+
+
+def _longest_true_run(mask: np.ndarray) -> np.ndarray:
+    """
+    Самая длинная серия True подряд в каждой строке bool матрицы.
+    
+    Для каждой позиции - индекс последнего False слева (running max),
+    длина серии = позиция - этот индекс. Один int32 буфер, без цикла.
+    
+    mask: Bool матрица n_rows × n_steps.
+    
+    Возвращает: int массив длины n_rows.
+    """
+    n_rows, n_steps = mask.shape
+    if n_steps == 0:
+        return np.zeros(n_rows, dtype=np.intp)
+    
+    positions = np.arange(n_steps, dtype=np.int32)
+    
+    last_break = np.where(mask, np.int32(-1), positions)
+    np.maximum.accumulate(last_break, axis=1, out=last_break)
+    np.subtract(positions, last_break, out=last_break)
+    
+    return last_break.max(axis=1).astype(np.intp)
+
+
+def _histogram_percentile(counts: np.ndarray, percentile: float, values: np.ndarray) -> float:
+    """
+    Percentile по гистограмме (как np.percentile с linear interpolation
+    по отсортированным значениям; values - значение каждого бина).
+    """
+    total = int(counts.sum())
+    position = percentile / 100 * (total - 1)
+    
+    cumulative = np.cumsum(counts)
+    lower = values[np.searchsorted(cumulative, np.floor(position), side='right')]
+    upper = values[np.searchsorted(cumulative, np.ceil(position), side='right')]
+    
+    return float(lower + (upper - lower) * (position - np.floor(position)))
+
+
+def _simulate_blocks_task(task: Tuple) -> Dict[str, Any]:
+    """Задача для worker процесса: (simulator, *args) -> simulator._simulate_blocks(*args)."""
+    simulator, *args = task
+    return simulator._simulate_blocks(*args)
@@ -0,0 +1,209 @@
+"""
+Helpers для параллельного research (ProcessPoolExecutor).
+
+Проблема: при отправке задачи в process pool аргументы pickle'ятся.
+Если передавать DataFrame со свечами в каждую задачу, на 1000 комбинаций
+параметров мы 1000 раз сериализуем и копируем одни и те же данные.
+
+Решение: SharedFrame кладет колонки DataFrame в memory-mapped файл.
+В задачу уходит только маленький дескриптор (путь + dtypes + offsets),
+worker открывает файл один раз (кэш на процесс) и дальше работает
+с теми же страницами памяти что и остальные процессы.
+
+Пример:
+    with SharedFrame(data) as shared:
+        futures = [pool.submit(task, shared.spec, params) for params in grid]
+
+    # В worker:
+    def task(spec, params):
+        data = load_shared_frame(spec)
+        ...
+"""
+
+import os
+import tempfile
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+@dataclass(frozen=True)
+class SharedFrameSpec:
+    """
+    Дескриптор DataFrame в memory-mapped файле (дешево pickle'ится).
+
+    path: Путь к файлу с данными.
+    n_rows: Количество строк.
+    columns: [(имя колонки, numpy dtype str, offset в байтах, timezone или None)].
+    index: Описание индекса (None = RangeIndex(n_rows)).
+    """
+    path: str
+    n_rows: int
+    columns: Tuple[Tuple[Any, str, int, Optional[str]], ...]
+    index: Optional[Tuple[Any, str, int, Optional[str]]] = None
+
+
+class SharedFrame:
+    """
+    DataFrame в memory-mapped файле для передачи в worker процессы.
+
+    Поддерживаются числовые, bool и datetime64 (в т.ч. tz-aware) колонки.
+    Файл удаляется в close() (или при выходе из with).
+    """
+
+    def __init__(self, data: pd.DataFrame, directory: Optional[str] = None):
+        """
+        Записать DataFrame в memory-mapped файл.
+
+        data: DataFrame (например свечи timestamp/open/high/low/close/volume).
+        directory: Директория для временного файла (default: системный tmp).
+
+        Raises:
+            TypeError: Если в DataFrame есть object/string колонки.
+        """
+        arrays = [_column_array(name, data[name]) for name in data.columns]
+
+        index_array = None
+        if not (isinstance(data.index, pd.RangeIndex) and
+                data.index.start == 0 and data.index.step == 1):
+            index_array = _column_array(data.index.name, data.index.to_series())
+
+        fd, path = tempfile.mkstemp(prefix='tqt_shared_', suffix='.bin', dir=directory)
+
+        columns = []
+        offset = 0
+        with os.fdopen(fd, 'wb') as f:
+            for name, values, tz in arrays + ([index_array] if index_array else []):
+                f.write(values.tobytes())
+                columns.append((name, values.dtype.str, offset, tz))
+                offset += values.nbytes
+
+        index = columns.pop() if index_array else None
+
+        self.spec = SharedFrameSpec(
+            path=path,
+            n_rows=len(data),
+            columns=tuple(columns),
+            index=index
+        )
+
+    def close(self):
+        """Удалить файл (worker'ы которые уже открыли его продолжают работать)."""
+        try:
+            os.unlink(self.spec.path)
+        except OSError:
+            # Уже удален, или (Windows) файл еще открыт worker'ом
+            pass
+
+    def __enter__(self) -> 'SharedFrame':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __repr__(self) -> str:
+        """Строковое представление."""
+        return f"SharedFrame(rows={self.spec.n_rows}, path={self.spec.path})"
+
+
+# Кэш открытых DataFrame в текущем процессе (path -> DataFrame)
+_LOADED: Dict[str, pd.DataFrame] = {}
+
+
+def load_shared_frame(spec: SharedFrameSpec) -> pd.DataFrame:
+    """
+    Открыть DataFrame из SharedFrame (один раз на процесс).
+
+    Колонки - read-only np.memmap поверх файла, без копирования данных.
+
+    spec: Дескриптор из SharedFrame.spec.
+
+    Возвращает: DataFrame.
+    """
+    cached = _LOADED.get(spec.path)
+    if cached is not None:
+        return cached
+
+    # Держим в кэше только последний файл - старые задачи уже завершены
+    _LOADED.clear()
+
+    data = pd.DataFrame(
+        {name: _open_column(spec, dtype, offset, tz) for name, dtype, offset, tz in spec.columns},
+        copy=False
+    )
+
+    if spec.index is not None:
+        name, dtype, offset, tz = spec.index
+        data.index = pd.Index(_open_column(spec, dtype, offset, tz), name=name)
+
+    _LOADED[spec.path] = data
+    return data
+
+
+def resolve_n_jobs(n_jobs: Optional[int]) -> int:
+    """
+    Количество worker процессов.
+
+    n_jobs: 1 = без пула, -1 = все ядра, -2 = все кроме одного, и т.д.
+
+    Возвращает: Положительное число процессов.
+    """
+    cpu_count = os.cpu_count() or 1
+
+    if n_jobs is None or n_jobs == 0:
+        return 1
+    if n_jobs < 0:
+        return max(1, cpu_count + 1 + n_jobs)
+    return n_jobs
+
+
+def chunk_indices(n_items: int, n_chunks: int) -> List[List[int]]:
+    """
+    Разбить range(n_items) на n_chunks последовательных кусков.
+
+    Возвращает: Список непустых кусков (порядок сохраняется).
+    """
+    n_chunks = max(1, min(n_chunks, n_items))
+    bounds = np.linspace(0, n_items, n_chunks + 1).astype(int)
+
+    return [
+        list(range(start, end))
+        for start, end in zip(bounds[:-1], bounds[1:])
+        if end > start
+    ]
+
+
+def _column_array(name: Any, series: pd.Series) -> Tuple[Any, np.ndarray, Optional[str]]:
+    """Колонка -> (name, непрерывный numpy массив, timezone)."""
+    tz = None
+    dtype = series.dtype
+
+    if isinstance(dtype, pd.DatetimeTZDtype):
+        tz = str(dtype.tz)
+        series = series.dt.tz_convert('UTC').dt.tz_localize(None)
+        dtype = series.dtype
+
+    if not (pd.api.types.is_numeric_dtype(dtype) or
+            pd.api.types.is_bool_dtype(dtype) or
+            pd.api.types.is_datetime64_dtype(dtype)):
+        raise TypeError(
+            f"SharedFrame поддерживает только числовые и datetime колонки, "
+            f"колонка {name!r} имеет dtype {dtype}"
+        )
+
+    return name, np.ascontiguousarray(series.to_numpy()), tz
+
+
+def _open_column(spec: SharedFrameSpec, dtype: str, offset: int, tz: Optional[str]):
+    """Открыть колонку из файла как read-only view на memmap."""
+    if spec.n_rows == 0:
+        values = np.empty(0, dtype=np.dtype(dtype))
+    else:
+        values = np.memmap(spec.path, dtype=np.dtype(dtype), mode='r',
+                           offset=offset, shape=(spec.n_rows,)).view(np.ndarray)
+
+    if tz is not None:
+        return pd.DatetimeIndex(values).tz_localize('UTC').tz_convert(tz)
+    return values
@@ -11,14 +11,40 @@ Grid Search + Walk-Forward validation для защиты от overfitting:
 - Используем OOS метрики для ranking
 - Walk-Forward validation предотвращает overfitting
 - Parameter sensitivity показывает robustness
+
+Большие grids:
+- search='random' / 'lhs': n_trials кандидатов из grid (random или
+  Latin hypercube) вместо полного перебора
+- early_stopping='halving' / 'hyperband': кандидаты сначала оцениваются
+  на нескольких WF splits, на следующие (больше splits) проходят только
+  лучшие 1/eta
+
+optimize_walk_forward - nested WFO: на каждом train окне свой grid search,
+победитель тестируется на следующем test окне.
 """
 
+import os
+import contextlib
 import pandas as pd
 import numpy as np
-from typing import List, Dict, Any, Type
+from typing import List, Dict, Any, Type, Optional, Callable, Tuple
 from itertools import product
+from concurrent.futures import Executor, ProcessPoolExecutor, as_completed
 
 from core.research.walk_forward import WalkForwardSplitter, WalkForwardAnalyzer
+from core.research.parallel import SharedFrame, load_shared_frame, resolve_n_jobs, chunk_indices
+from core.backtest.sweep import TortoiseSweep
+from core.backtest.cache import BacktestCache
+from core.research.trial_journal import TrialJournal
+
+
+# Сколько комбинаций batched sweep считает за раз при записи в journal
+# (результаты попадают в journal после каждого куска)
+JOURNAL_BATCH_SIZE = 200
+
+# Режимы выбора кандидатов и early stopping
+SEARCH_MODES = ('grid', 'random', 'lhs')
+EARLY_STOPPING_MODES = ('halving', 'hyperband')
 
 
 class ParameterOptimizer:
@@ -53,16 +79,20 @@ class ParameterOptimizer:
     def __init__(
         self,
         initial_capital: float = 10000.0,
-        risk_per_trade: float = 1.0
+        risk_per_trade: float = 1.0,
+        cache: Optional[BacktestCache] = None
     ):
         """
         Инициализация Parameter Optimizer.
         
         initial_capital: Начальный капитал для backtesting.
         risk_per_trade: Риск на сделку в %.
+        cache: BacktestCache (None = без кэша). Повторный optimize на тех же
+               данных берет backtests окон (или метрики sweep) из кэша.
         """
         self.initial_capital = initial_capital
         self.risk_per_trade = risk_per_trade
+        self.cache = cache
     
     def optimize(
         self,
@@ -74,7 +104,17 @@ class ParameterOptimizer:
         wf_train_days: int = 90,
         wf_test_days: int = 30,
         wf_step_days: int = 30,
-        metric: str = 'oos_sharpe'
+        metric: str = 'oos_sharpe',
+        batched: bool = True,
+        n_jobs: int = 1,
+        executor: Optional[Executor] = None,
+        journal: Optional[TrialJournal] = None,
+        search: str = 'grid',
+        n_trials: Optional[int] = None,
+        early_stopping: Optional[str] = None,
+        eta: int = 3,
+        min_splits: int = 3,
+        seed: Optional[int] = None
     ) -> Dict[str, Any]:
         """
         Запустить parameter optimization.
@@ -88,6 +128,28 @@ class ParameterOptimizer:
         wf_test_days: Дней в test window для WF.
         wf_step_days: Шаг для WF.
         metric: Метрика для ранжирования (default: 'oos_sharpe').
+        batched: Считать весь grid одним проходом TortoiseSweep если
+                 strategy_class поддерживается (иначе backtest на комбинацию).
+        n_jobs: Количество процессов (1 = в текущем процессе, -1 = все ядра).
+        executor: Готовый executor вместо собственного ProcessPoolExecutor
+                  (strategy_class должен pickle'иться).
+        journal: TrialJournal для resume: каждая завершенная комбинация
+                 записывается сразу, уже записанные (те же данные и
+                 настройки) не пересчитываются.
+        search: Выбор кандидатов из param_grid:
+                - 'grid': все комбинации
+                - 'random': n_trials случайных разных комбинаций
+                - 'lhs': Latin hypercube - n_trials комбинаций, каждый
+                  параметр равномерно покрывает свои значения
+        n_trials: Бюджет кандидатов для 'random' / 'lhs'.
+        early_stopping: None = каждый кандидат на всех WF splits,
+                        'halving' = successive halving: min_splits splits,
+                        лучшие 1/eta -> min_splits * eta splits, ... -> все,
+                        'hyperband' = несколько halving brackets с разным
+                        стартовым числом splits.
+        eta: Во сколько раз сокращаются кандидаты между ступенями (>= 2).
+        min_splits: Splits на первой ступени halving.
+        seed: Seed для 'random' / 'lhs' и распределения по brackets.
         
         Возвращает: Словарь с результатами:
             {
@@ -97,7 +159,28 @@ class ParameterOptimizer:
                 'top_n': [...],
                 'sensitivity': {...}
             }
+            С early stopping all_results содержит каждого кандидата с
+            последней ступени которую он прошел (num_splits), кандидаты
+            оцененные на всех splits идут первыми.
+        
+        Raises:
+            ValueError: Неизвестный search / early_stopping, нет n_trials
+                        для 'random' / 'lhs', eta < 2 или min_splits < 1.
         """
+        if search not in SEARCH_MODES:
+            raise ValueError(f"search должен быть одним из {SEARCH_MODES}, получено {search!r}")
+        if search != 'grid' and (n_trials is None or n_trials < 1):
+            raise ValueError(f"search={search!r} требует n_trials >= 1")
+        if early_stopping is not None and early_stopping not in EARLY_STOPPING_MODES:
+            raise ValueError(
+                f"early_stopping должен быть одним из {EARLY_STOPPING_MODES} или None, "
+                f"получено {early_stopping!r}"
+            )
+        if eta < 2:
+            raise ValueError(f"eta должен быть >= 2, получено {eta}")
+        if min_splits < 1:
+            raise ValueError(f"min_splits должен быть >= 1, получено {min_splits}")
+        
         # Handle empty param grid
         if not param_grid:
             return {
@@ -108,50 +191,59 @@ class ParameterOptimizer:
                 'sensitivity': {}
             }
         
-        # Генерируем все комбинации параметров
-        param_combinations = self._generate_param_combinations(param_grid)
+        rng = np.random.default_rng(seed)
+        
+        # Кандидаты: все комбинации или выборка из grid
+        if search == 'grid':
+            param_combinations = self._generate_param_combinations(param_grid)
+        elif search == 'random':
+            param_combinations = self._sample_random(param_grid, n_trials, rng)
+        else:
+            param_combinations = self._sample_latin_hypercube(param_grid, n_trials, rng)
         
         print(f"\n🔧 Parameter Optimization")
-        print(f"   Комбинаций: {len(param_combinations)}")
+        print(f"   Комбинаций: {len(param_combinations)} ({search})")
         print(f"   Walk-Forward: {wf_train_days}d train, {wf_test_days}d test")
         
-        # Тестируем каждую комбинацию
-        all_results = []
+        wf_params = {
+            'train_days': wf_train_days,
+            'test_days': wf_test_days,
+            'step_days': wf_step_days
+        }
+        evaluate_kwargs = {
+            'strategy_class': strategy_class,
+            'market': market,
+            'data': data,
+            'batched': batched and TortoiseSweep.supports(strategy_class),
+            'n_workers': resolve_n_jobs(n_jobs),
+            'executor': executor,
+            'journal': journal
+        }
         
-        for i, params in enumerate(param_combinations):
-            print(f"\n   [{i+1}/{len(param_combinations)}] Testing: {params}")
-            
-            # Запускаем Walk-Forward analysis с этими параметрами
-            wf_results = self._run_walk_forward(
-                strategy_class=strategy_class,
-                market=market,
-                data=data,
-                params=params,
-                train_days=wf_train_days,
-                test_days=wf_test_days,
-                step_days=wf_step_days
+        if early_stopping is None:
+            all_results = self._evaluate(
+                param_combinations=param_combinations,
+                wf_params=wf_params,
+                **evaluate_kwargs
+            )
+        else:
+            all_results = self._run_early_stopping(
+                param_combinations=param_combinations,
+                wf_params=wf_params,
+                n_rows=len(data),
+                metric=metric,
+                hyperband=early_stopping == 'hyperband',
+                eta=eta,
+                min_splits=min_splits,
+                rng=rng,
+                evaluate_kwargs=evaluate_kwargs
             )
-            
-            # Сохраняем результаты
-            result = {
-                'params': params,
-                'is_avg_return': wf_results['summary']['is_avg_return'],
-                'oos_avg_return': wf_results['summary']['oos_avg_return'],
-                'oos_sharpe': wf_results['summary'].get('oos_avg_sharpe', 0.0),
-                'oos_consistency': wf_results['summary']['oos_consistency'],
-                'num_splits': wf_results['summary']['num_splits']
-            }
-            
-            all_results.append(result)
-            
-            print(f"      OOS Return: {result['oos_avg_return']:.2f}%, "
-                  f"OOS Sharpe: {result['oos_sharpe']:.2f}, "
-                  f"Consistency: {result['oos_consistency']:.1f}%")
         
-        # Ранжируем по OOS метрике (NOT in-sample!)
+        # Ранжируем по OOS метрике (NOT in-sample!). С early stopping
+        # сначала кандидаты с большим числом splits (без него оно у всех одно)
         all_results_sorted = sorted(
             all_results,
-            key=lambda x: x.get(metric, 0.0),
+            key=lambda x: (x['num_splits'], x.get(metric, 0.0)),
             reverse=True
         )
         
@@ -177,6 +269,199 @@ class ParameterOptimizer:
             'sensitivity': sensitivity
         }
     
+    def _evaluate(
+        self,
+        strategy_class: Type,
+        market: str,
+        data: pd.DataFrame,
+        param_combinations: List[Dict[str, Any]],
+        wf_params: Dict[str, Any],
+        batched: bool,
+        n_workers: int,
+        executor: Optional[Executor] = None,
+        journal: Optional[TrialJournal] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Walk-Forward для списка комбинаций (пул процессов / batched sweep /
+        по одной) с resume из journal.
+        
+        wf_params: train_days / test_days / step_days и опционально split_ids.
+        
+        Возвращает: Результат (_trial_result) для каждой комбинации в
+                    порядке param_combinations.
+        """
+        # Результат каждой комбинации (None = еще не посчитана)
+        trial_results: List[Optional[Dict[str, Any]]] = [None] * len(param_combinations)
+        
+        study_key = None
+        if journal is not None:
+            study_key = journal.study_key(strategy_class, market, data, {
+                'walk_forward': wf_params,
+                'initial_capital': self.initial_capital,
+                'risk_per_trade': self.risk_per_trade
+            })
+            completed = journal.load(study_key)
+            
+            for i, params in enumerate(param_combinations):
+                trial_results[i] = completed.get(journal.params_key(params))
+            
+            n_completed = sum(result is not None for result in trial_results)
+            print(f"   Journal: {n_completed}/{len(param_combinations)} комбинаций уже посчитаны")
+        
+        def record(i: int, wf_results: Dict[str, Any]):
+            """Результат комбинации i -> trial_results (и journal)."""
+            trial_results[i] = self._trial_result(param_combinations[i], wf_results)
+            if journal is not None:
+                journal.record(study_key, param_combinations[i], trial_results[i])
+        
+        pending = [i for i, result in enumerate(trial_results) if result is None]
+        
+        # WF результаты посчитанные заранее (пул процессов / batched sweep)
+        if pending and (executor is not None or n_workers > 1):
+            self._run_parallel(
+                strategy_class=strategy_class,
+                market=market,
+                data=data,
+                param_combinations=[param_combinations[i] for i in pending],
+                wf_params=wf_params,
+                batched=batched,
+                n_workers=n_workers,
+                executor=executor,
+                on_result=lambda k, wf_results: record(pending[k], wf_results)
+            )
+        elif pending and batched:
+            # Batched: все комбинации одним проходом по каждому WF split
+            # (с journal - кусками, чтобы результаты сохранялись по ходу)
+            batch_size = JOURNAL_BATCH_SIZE if journal is not None else len(pending)
+            
+            for start in range(0, len(pending), batch_size):
+                batch = pending[start:start + batch_size]
+                batch_results = self._run_walk_forward_batched(
+                    param_combinations=[param_combinations[i] for i in batch],
+                    data=data,
+                    **wf_params
+                )
+                for i, wf_results in zip(batch, batch_results):
+                    record(i, wf_results)
+        
+        # Тестируем каждую комбинацию
+        for i, params in enumerate(param_combinations):
+            print(f"\n   [{i+1}/{len(param_combinations)}] Testing: {params}")
+            
+            if trial_results[i] is None:
+                # Запускаем Walk-Forward analysis с этими параметрами
+                wf_results = self._run_walk_forward(
+                    strategy_class=strategy_class,
+                    market=market,
+                    data=data,
+                    params=params,
+                    **wf_params
+                )
+                record(i, wf_results)
+            
+            result = trial_results[i]
+            
+            print(f"      OOS Return: {result['oos_avg_return']:.2f}%, "
+                  f"OOS Sharpe: {result['oos_sharpe']:.2f}, "
+                  f"Consistency: {result['oos_consistency']:.1f}%")
+        
+        return trial_results
+    
+    def _run_early_stopping(
+        self,
+        param_combinations: List[Dict[str, Any]],
+        wf_params: Dict[str, int],
+        n_rows: int,
+        metric: str,
+        hyperband: bool,
+        eta: int,
+        min_splits: int,
+        rng: np.random.Generator,
+        evaluate_kwargs: Dict[str, Any]
+    ) -> List[Dict[str, Any]]:
+        """
+        Successive halving (один bracket) или Hyperband (все brackets).
+        
+        Ресурс ступени - число WF splits. Ступени bracket'а s:
+        min_splits * eta^(s_max - s), ... * eta, ..., все splits; между
+        ступенями остаются лучшие ceil(n / eta) кандидатов по metric.
+        Hyperband делит кандидатов между brackets s = s_max..0 (больше
+        кандидатов туда, где первая ступень дешевле) - не надо угадывать
+        сколько splits достаточно чтобы отсеять плохие параметры.
+        
+        Splits ступени - префикс _split_order: последний split, первый,
+        потом равномерно между ними. Ступени вложены, с BacktestCache
+        окна предыдущих ступеней не пересчитываются.
+        
+        Возвращает: Результат каждого кандидата с последней пройденной
+                    ступени (порядок param_combinations).
+        """
+        splitter = WalkForwardSplitter(anchored=False, **wf_params)
+        n_splits = splitter.count_splits(n_rows)
+        if n_splits == 0:
+            # Та же ошибка "Недостаточно данных" что без early stopping
+            splitter.iter_splits(n_rows)
+        
+        split_order = _split_order(n_splits)
+        min_splits = min(min_splits, n_splits)
+        
+        # s_max: сколько ступеней (min_splits * eta^k) меньше всех splits
+        s_max = 0
+        while min_splits * eta ** s_max < n_splits:
+            s_max += 1
+        
+        if hyperband:
+            brackets = list(range(s_max, -1, -1))
+            weights = [(s_max + 1) / (s + 1) * eta ** s for s in brackets]
+            # Кандидаты по brackets в случайном порядке (grid идет по порядку параметров)
+            order = rng.permutation(len(param_combinations))
+            sizes = _allocate(len(param_combinations), weights)
+        else:
+            brackets = [s_max]
+            order = np.arange(len(param_combinations))
+            sizes = [len(param_combinations)]
+        
+        results: List[Optional[Dict[str, Any]]] = [None] * len(param_combinations)
+        
+        start = 0
+        for s, size in zip(brackets, sizes):
+            candidates = [int(i) for i in order[start:start + size]]
+            start += size
+            
+            budgets = [min_splits * eta ** (s_max - s + k) for k in range(s)] + [n_splits]
+            
+            for rung, budget in enumerate(budgets):
+                if not candidates:
+                    break
+                
+                print(f"\n   🪜 Bracket {s}, ступень {rung + 1}/{len(budgets)}: "
+                      f"{len(candidates)} кандидатов на {budget}/{n_splits} splits")
+                
+                rung_wf_params = dict(wf_params)
+                if budget < n_splits:
+                    rung_wf_params['split_ids'] = sorted(split_order[:budget])
+                
+                rung_results = self._evaluate(
+                    param_combinations=[param_combinations[i] for i in candidates],
+                    wf_params=rung_wf_params,
+                    **evaluate_kwargs
+                )
+                
+                for i, result in zip(candidates, rung_results):
+                    results[i] = result
+                
+                if rung < len(budgets) - 1:
+                    # Лучшие 1/eta (при равенстве - раньше в списке)
+                    n_keep = max(1, -(-len(candidates) // eta))
+                    ranked = sorted(
+                        range(len(candidates)),
+                        key=lambda k: rung_results[k].get(metric, 0.0),
+                        reverse=True
+                    )
+                    candidates = [candidates[k] for k in sorted(ranked[:n_keep])]
+        
+        return results
+    
     def _generate_param_combinations(
         self,
         param_grid: Dict[str, List[Any]]
@@ -200,6 +485,94 @@ class ParameterOptimizer:
         
         return combinations
     
+    def _sample_random(
+        self,
+        param_grid: Dict[str, List[Any]],
+        n_trials: int,
+        rng: np.random.Generator
+    ) -> List[Dict[str, Any]]:
+        """
+        n_trials разных случайных комбинаций из grid.
+        
+        Grid не материализуется: выбираются номера комбинаций без повторов,
+        номер раскладывается в индексы значений (как в product).
+        
+        Возвращает: Комбинации в порядке grid (весь grid если n_trials >= его размера).
+        """
+        keys = list(param_grid.keys())
+        shape = tuple(len(values) for values in param_grid.values())
+        n_total = int(np.prod(shape, dtype=np.float64))
+        
+        if n_trials >= n_total:
+            return self._generate_param_combinations(param_grid)
+        
+        flat = np.sort(rng.choice(n_total, size=n_trials, replace=False))
+        indices = np.unravel_index(flat, shape)
+        
+        return [
+            {key: param_grid[key][int(index[t])] for key, index in zip(keys, indices)}
+            for t in range(n_trials)
+        ]
+    
+    def _sample_latin_hypercube(
+        self,
+        param_grid: Dict[str, List[Any]],
+        n_trials: int,
+        rng: np.random.Generator
+    ) -> List[Dict[str, Any]]:
+        """
+        Latin hypercube выборка из grid.
+        
+        По каждому параметру [0, 1) делится на n_trials страт, каждая страта
+        используется ровно один раз (своя перестановка на параметр) - значения
+        каждого параметра покрыты равномерно даже при маленьком бюджете.
+        Точка страты отображается на ближайшее значение из grid.
+        
+        Возвращает: До n_trials разных комбинаций (повторы выбрасываются).
+        """
+        combinations = []
+        seen = set()
+        
+        columns = []
+        for values in param_grid.values():
+            positions = (rng.permutation(n_trials) + rng.random(n_trials)) / n_trials
+            columns.append(np.minimum((positions * len(values)).astype(int), len(values) - 1))
+        
+        for t in range(n_trials):
+            index = tuple(int(column[t]) for column in columns)
+            if index in seen:
+                continue
+            seen.add(index)
+            
+            combinations.append({
+                key: values[i] for (key, values), i in zip(param_grid.items(), index)
+            })
+        
+        return combinations
+    
+    def _trial_result(
+        self,
+        params: Dict[str, Any],
+        wf_results: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        Строка all_results для комбинации из WF results.
+        
+        params: Параметры комбинации.
+        wf_results: Результат WalkForwardAnalyzer.run_analysis.
+        
+        Возвращает: {'params', 'is_avg_return', 'oos_avg_return', 'oos_sharpe',
+                     'oos_consistency', 'num_splits'}.
+        """
+        return {
+            'params': params,
+            'is_avg_return': wf_results['summary']['is_avg_return'],
+            'oos_avg_return': wf_results['summary']['oos_avg_return'],
+            'oos_sharpe': wf_results['summary'].get('oos_avg_sharpe', 0.0),
+            'oos_consistency': wf_results['summary']['oos_consistency'],
+            'num_splits': wf_results['summary']['num_splits']
+        }
+    
     def _run_walk_forward(
         self,
         strategy_class: Type,
@@ -208,11 +581,14 @@ class ParameterOptimizer:
         params: Dict[str, Any],
         train_days: int,
         test_days: int,
-        step_days: int
+        step_days: int,
+        split_ids: Optional[List[int]] = None
     ) -> Dict[str, Any]:
         """
         Запустить Walk-Forward analysis с заданными параметрами.
         
+        split_ids: Только эти splits (None = все).
+        
         Возвращает: WF results.
         """
         # Создаем стратегию с этими параметрами
@@ -233,18 +609,418 @@ class ParameterOptimizer:
         analyzer = WalkForwardAnalyzer(
             strategy=strategy,
             initial_capital=self.initial_capital,
-            risk_per_trade=self.risk_per_trade
+            risk_per_trade=self.risk_per_trade,
+            cache=self.cache
         )
         
         # Запускаем WF analysis
         results = analyzer.run_analysis(
             market=market,
             data=data,
-            splitter=splitter
+            splitter=splitter,
+            split_ids=split_ids
         )
         
         return results
     
+    def _run_parallel(
+        self,
+        strategy_class: Type,
+        market: str,
+        data: pd.DataFrame,
+        param_combinations: List[Dict[str, Any]],
+        wf_params: Dict[str, Any],
+        batched: bool,
+        n_workers: int,
+        executor: Optional[Executor] = None,
+        on_result: Optional[Callable[[int, Dict[str, Any]], None]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Walk-Forward для всех комбинаций в пуле процессов.
+        
+        Свечи передаются через SharedFrame (memory-mapped файл), в задачу
+        уходят только параметры. Комбинации режутся на куски: batched sweep
+        получает несколько кусков на процесс, обычный режим - по одной
+        комбинации на задачу. Прогресс печатается по мере готовности,
+        результаты раскладываются по исходным индексам (порядок не зависит
+        от того какой процесс закончил первым).
+        
+        on_result: Вызывается в основном процессе для каждой комбинации
+                   сразу как ее кусок готов: on_result(индекс, wf_results).
+        
+        Возвращает: WF results для каждой комбинации (в порядке param_combinations).
+        """
+        n_combinations = len(param_combinations)
+        n_chunks = n_workers * 4 if batched else n_combinations
+        chunks = chunk_indices(n_combinations, n_chunks)
+        
+        print(f"   Параллельно: {n_workers} процессов, {len(chunks)} задач")
+        
+        results: List[Optional[Dict[str, Any]]] = [None] * n_combinations
+        
+        with SharedFrame(data) as shared:
+            pool = executor or ProcessPoolExecutor(max_workers=n_workers)
+            
+            try:
+                futures = {
+                    pool.submit(
+                        _run_walk_forward_chunk,
+                        self.initial_capital,
+                        self.risk_per_trade,
+                        self.cache,
+                        strategy_class,
+                        market,
+                        shared.spec,
+                        [param_combinations[i] for i in chunk],
+                        wf_params,
+                        batched
+                    ): chunk
+                    for chunk in chunks
+                }
+                
+                completed = 0
+                for future in as_completed(futures):
+                    chunk = futures[future]
+                    for i, wf_results in zip(chunk, future.result()):
+                        results[i] = wf_results
+                        if on_result is not None:
+                            on_result(i, wf_results)
+                    
+                    completed += len(chunk)
+                    print(f"   ⏳ {completed}/{n_combinations} комбинаций готово")
+            finally:
+                if executor is None:
+                    pool.shutdown()
+        
+        return results
+    
+    def _run_walk_forward_batched(
+        self,
+        param_combinations: List[Dict[str, Any]],
+        data: pd.DataFrame,
+        train_days: int,
+        test_days: int,
+        step_days: int,
+        split_ids: Optional[List[int]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Walk-Forward analysis для всех комбинаций сразу через TortoiseSweep.
+        
+        Те же splits и та же агрегация что в _run_walk_forward, но на каждом
+        train/test окне все комбинации считаются за один проход по барам.
+        
+        split_ids: Только эти splits (None = все).
+        
+        Возвращает: WF results для каждой комбинации (в порядке param_combinations).
+        """
+        splitter = WalkForwardSplitter(
+            train_days=train_days,
+            test_days=test_days,
+            step_days=step_days,
+            anchored=False  # Rolling window
+        )
+        
+        sweep = TortoiseSweep(
+            initial_capital=self.initial_capital,
+            risk_per_trade=self.risk_per_trade,
+            cache=self.cache
+        )
+        
+        # Агрегация OOS/IS метрик как в WalkForwardAnalyzer
+        analyzer = WalkForwardAnalyzer(
+            strategy=None,
+            initial_capital=self.initial_capital,
+            risk_per_trade=self.risk_per_trade
+        )
+        
+        split_results: List[List[Dict[str, Any]]] = [[] for _ in param_combinations]
+        
+        for split in splitter.iter_splits(len(data), split_ids):
+            train_metrics = sweep.run(data.iloc[split.train], param_combinations)
+            test_metrics = sweep.run(data.iloc[split.test], param_combinations)
+            
+            for i in range(len(param_combinations)):
+                split_results[i].append({
+                    'split_id': split.split_id,
+                    'train_metrics': train_metrics[i],
+                    'test_metrics': test_metrics[i]
+                })
+        
+        return [
+            {
+                'splits': splits,
+                'summary': analyzer._aggregate_results(splits)
+            }
+            for splits in split_results
+        ]
+    
+    def optimize_walk_forward(
+        self,
+        strategy_class: Type,
+        market: str,
+        data: pd.DataFrame,
+        param_grid: Dict[str, List[Any]],
+        wf_train_days: int = 90,
+        wf_test_days: int = 30,
+        wf_step_days: int = 30,
+        anchored: bool = False,
+        metric: str = 'sharpe_ratio',
+        batched: bool = True,
+        n_jobs: int = 1,
+        executor: Optional[Executor] = None
+    ) -> Dict[str, Any]:
+        """
+        Nested Walk-Forward Optimization.
+        
+        В отличие от optimize (одни параметры на всех splits) параметры
+        выбираются заново на каждом split:
+        1. Grid search на train окне (In-Sample), лучший по metric
+        2. Победитель тестируется на test окне (Out-of-Sample)
+        
+        Каждый backtest (параметры, окно) считается не больше одного раза:
+        одинаковые окна (границы) берутся из памяти, с BacktestCache -
+        по content hash и между запусками. Grid окна - одна задача (batched
+        sweep - один проход по барам на все комбинации), окна считаются
+        параллельно в пуле процессов.
+        
+        strategy_class: Класс стратегии (не instance!).
+        market: Название рынка.
+        data: DataFrame с данными.
+        param_grid: Словарь параметров для grid search на каждом train окне.
+        wf_train_days: Дней в train window.
+        wf_test_days: Дней в test window.
+        wf_step_days: Шаг для WF.
+        anchored: Anchored (растущий) train window вместо rolling.
+        metric: Метрика backtest для выбора параметров на train
+                (ключ metrics: 'sharpe_ratio', 'return_pct', ...).
+        batched: TortoiseSweep для grid если strategy_class поддерживается.
+        n_jobs: Количество процессов (1 = в текущем процессе, -1 = все ядра).
+        executor: Готовый executor вместо собственного ProcessPoolExecutor.
+        
+        Возвращает: Словарь с результатами:
+            {
+                'splits': [
+                    {
+                        'split_id': 0,
+                        'best_params': {...},    # победитель на train
+                        'train_metrics': {...},  # IS метрики победителя
+                        'test_metrics': {...}    # OOS метрики победителя
+                    },
+                    ...
+                ],
+                'summary': {
+                    ... (как WalkForwardAnalyzer),
+                    'unique_params': ...,   # разных победителей
+                    'param_changes': ...,   # смен победителя между splits
+                    'num_backtests': ...    # посчитано (параметры, окно)
+                }
+            }
+        """
+        param_combinations = self._generate_param_combinations(param_grid) if param_grid else [{}]
+        batched = batched and TortoiseSweep.supports(strategy_class)
+        n_workers = resolve_n_jobs(n_jobs)
+        
+        splitter = WalkForwardSplitter(
+            train_days=wf_train_days,
+            test_days=wf_test_days,
+            step_days=wf_step_days,
+            anchored=anchored
+        )
+        splits = list(splitter.iter_splits(len(data)))
+        
+        print("\n🔧 Nested Walk-Forward Optimization")
+        print(f"   Комбинаций: {len(param_combinations)}, splits: {len(splits)}")
+        
+        # (start, end) окна -> {params_key: метрики}
+        window_results: Dict[Tuple[int, int], Dict[str, Dict[str, Any]]] = {}
+        
+        # 1) IS: весь grid на каждом уникальном train окне
+        train_windows = list(dict.fromkeys((split.train_start, split.train_end) for split in splits))
+        self._run_window_grids(
+            strategy_class=strategy_class,
+            market=market,
+            data=data,
+            tasks=[(window, param_combinations) for window in train_windows],
+            window_results=window_results,
+            batched=batched,
+            n_workers=n_workers,
+            executor=executor
+        )
+        
+        # Победитель на каждом split (при равенстве - раньше в grid)
+        winners = []
+        for split in splits:
+            train_results = window_results[(split.train_start, split.train_end)]
+            winners.append(max(
+                param_combinations,
+                key=lambda params: train_results[_params_key(params)].get(metric, 0.0)
+            ))
+        
+        # 2) OOS: победитель на test окне (если еще не посчитан)
+        test_params: Dict[Tuple[int, int], List[Dict[str, Any]]] = {}
+        for split, params in zip(splits, winners):
+            window = (split.test_start, split.test_end)
+            if _params_key(params) in window_results.get(window, {}):
+                continue
+            
+            pending = test_params.setdefault(window, [])
+            if params not in pending:
+                pending.append(params)
+        
+        self._run_window_grids(
+            strategy_class=strategy_class,
+            market=market,
+            data=data,
+            tasks=list(test_params.items()),
+            window_results=window_results,
+            batched=batched,
+            n_workers=n_workers,
+            executor=executor
+        )
+        
+        split_results = []
+        for split, params in zip(splits, winners):
+            key = _params_key(params)
+            split_results.append({
+                'split_id': split.split_id,
+                'best_params': params,
+                'train_metrics': window_results[(split.train_start, split.train_end)][key],
+                'test_metrics': window_results[(split.test_start, split.test_end)][key]
+            })
+        
+        # Агрегация OOS/IS метрик как в WalkForwardAnalyzer
+        analyzer = WalkForwardAnalyzer(
+            strategy=None,
+            initial_capital=self.initial_capital,
+            risk_per_trade=self.risk_per_trade
+        )
+        summary = analyzer._aggregate_results(split_results)
+        
+        winner_keys = [_params_key(params) for params in winners]
+        summary['unique_params'] = len(set(winner_keys))
+        summary['param_changes'] = sum(a != b for a, b in zip(winner_keys[:-1], winner_keys[1:]))
+        summary['num_backtests'] = sum(len(results) for results in window_results.values())
+        
+        print("\n✅ Nested WFO complete!")
+        print(f"   OOS Avg Return: {summary['oos_avg_return']:.2f}%, "
+              f"OOS Consistency: {summary['oos_consistency']:.1f}%")
+        print(f"   Backtests: {summary['num_backtests']} "
+              f"(без переиспользования: {len(splits) * (len(param_combinations) + 1)})")
+        
+        return {
+            'splits': split_results,
+            'summary': summary
+        }
+    
+    def _run_window_grids(
+        self,
+        strategy_class: Type,
+        market: str,
+        data: pd.DataFrame,
+        tasks: List[Tuple[Tuple[int, int], List[Dict[str, Any]]]],
+        window_results: Dict[Tuple[int, int], Dict[str, Dict[str, Any]]],
+        batched: bool,
+        n_workers: int,
+        executor: Optional[Executor] = None
+    ):
+        """
+        Backtests (окно, список параметров) с записью в window_results.
+        
+        Без batched grid окна режется на куски, чтобы процессов хватало
+        даже при нескольких окнах. Параллельно - через SharedFrame.
+        
+        tasks: [((start, end), [params, ...]), ...].
+        window_results: Память nested WFO, дополняется на месте.
+        """
+        if not tasks:
+            return
+        
+        # Куски: batched - весь grid окна за один проход,
+        # иначе столько кусков, чтобы задач было ~4 на процесс
+        n_chunks = 1 if batched else max(1, -(-n_workers * 4 // len(tasks)))
+        chunks = [
+            (window, [param_sets[i] for i in chunk])
+            for window, param_sets in tasks
+            for chunk in chunk_indices(len(param_sets), n_chunks)
+        ]
+        
+        def store(window, param_sets, metrics):
+            results = window_results.setdefault(window, {})
+            for params, window_metrics in zip(param_sets, metrics):
+                results[_params_key(params)] = window_metrics
+        
+        if executor is None and n_workers <= 1:
+            for window, param_sets in chunks:
+                store(window, param_sets, self._run_window_grid(
+                    strategy_class, market, data.iloc[window[0]:window[1]], param_sets, batched
+                ))
+            return
+        
+        print(f"   Параллельно: {n_workers} процессов, {len(chunks)} задач")
+        
+        with SharedFrame(data) as shared:
+            pool = executor or ProcessPoolExecutor(max_workers=n_workers)
+            
+            try:
+                futures = {
+                    pool.submit(
+                        _run_window_grid_task,
+                        self.initial_capital,
+                        self.risk_per_trade,
+                        self.cache,
+                        strategy_class,
+                        market,
+                        shared.spec,
+                        window,
+                        param_sets,
+                        batched
+                    ): (window, param_sets)
+                    for window, param_sets in chunks
+                }
+                
+                for future in as_completed(futures):
+                    window, param_sets = futures[future]
+                    store(window, param_sets, future.result())
+            finally:
+                if executor is None:
+                    pool.shutdown()
+    
+    def _run_window_grid(
+        self,
+        strategy_class: Type,
+        market: str,
+        window: pd.DataFrame,
+        param_sets: List[Dict[str, Any]],
+        batched: bool
+    ) -> List[Dict[str, Any]]:
+        """
+        Backtest каждой комбинации на одном окне.
+        
+        Возвращает: Метрики в порядке param_sets.
+        """
+        if batched:
+            sweep = TortoiseSweep(
+                initial_capital=self.initial_capital,
+                risk_per_trade=self.risk_per_trade,
+                cache=self.cache
+            )
+            return sweep.run(window, param_sets)
+        
+        metrics = []
+        for params in param_sets:
+            strategy_params = params.copy()
+            strategy_params['markets'] = [market]
+            
+            analyzer = WalkForwardAnalyzer(
+                strategy=strategy_class(strategy_params),
+                initial_capital=self.initial_capital,
+                risk_per_trade=self.risk_per_trade,
+                cache=self.cache
+            )
+            metrics.append(analyzer._run_backtest(market, window))
+        
+        return metrics
+    
     def calculate_sensitivity(
         self,
         results: List[Dict[str, Any]]
@@ -303,3 +1079,121 @@ class ParameterOptimizer:
             f"risk={self.risk_per_trade}%)"
         )
 
+
+def _run_walk_forward_chunk(
+    initial_capital: float,
+    risk_per_trade: float,
+    cache: Optional[BacktestCache],
+    strategy_class: Type,
+    market: str,
+    data_spec,
+    param_chunk: List[Dict[str, Any]],
+    wf_params: Dict[str, Any],
+    batched: bool
+) -> List[Dict[str, Any]]:
+    """
+    Задача для worker процесса: WF analysis для куска комбинаций.
+    
+    Данные открываются из SharedFrame (один раз на процесс), print'ы
+    backtest engine глушатся - прогресс печатает основной процесс.
+    
+    Возвращает: WF results для каждой комбинации куска.
+    """
+    data = load_shared_frame(data_spec)
+    optimizer = ParameterOptimizer(
+        initial_capital=initial_capital,
+        risk_per_trade=risk_per_trade,
+        cache=cache
+    )
+    
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        if batched:
+            return optimizer._run_walk_forward_batched(
+                param_combinations=param_chunk,
+                data=data,
+                **wf_params
+            )
+        
+        return [
+            optimizer._run_walk_forward(
+                strategy_class=strategy_class,
+                market=market,
+                data=data,
+                params=params,
+                **wf_params
+            )
+            for params in param_chunk
+        ]
+
+
+def _run_window_grid_task(
+    initial_capital: float,
+    risk_per_trade: float,
+    cache: Optional[BacktestCache],
+    strategy_class: Type,
+    market: str,
+    data_spec,
+    window: Tuple[int, int],
+    param_sets: List[Dict[str, Any]],
+    batched: bool
+) -> List[Dict[str, Any]]:
+    """
+    Задача для worker процесса: комбинации param_sets на окне data[start:end].
+    
+    Возвращает: Метрики в порядке param_sets.
+    """
+    data = load_shared_frame(data_spec)
+    optimizer = ParameterOptimizer(
+        initial_capital=initial_capital,
+        risk_per_trade=risk_per_trade,
+        cache=cache
+    )
+    
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        return optimizer._run_window_grid(
+            strategy_class, market, data.iloc[window[0]:window[1]], param_sets, batched
+        )
+
+
+def _params_key(params: Dict[str, Any]) -> str:
+    """Ключ комбинации параметров (порядок ключей не важен)."""
+    return TrialJournal.params_key(params)
+
+
+def _split_order(n_splits: int) -> List[int]:
+    """
+    Порядок WF splits для ступеней early stopping.
+    
+    Любой префикс покрывает историю примерно равномерно: последний split
+    (самый свежий рынок), первый, середина, четверти и т.д. Префиксы
+    вложены - следующая ступень только добавляет splits.
+    
+    Возвращает: Перестановку range(n_splits).
+    """
+    order: List[int] = []
+    seen = set()
+    
+    for k in range(1, n_splits + 1):
+        for split_id in np.round(np.linspace(n_splits - 1, 0, k)).astype(int):
+            if split_id not in seen:
+                seen.add(split_id)
+                order.append(int(split_id))
+    
+    return order
+
+
+def _allocate(n_items: int, weights: List[float]) -> List[int]:
+    """
+    Разделить n_items пропорционально weights (метод наибольших остатков).
+    
+    Возвращает: Целые размеры, сумма = n_items.
+    """
+    weights = np.asarray(weights, dtype=np.float64)
+    shares = n_items * weights / weights.sum()
+    sizes = np.floor(shares).astype(int)
+    
+    remainder = n_items - sizes.sum()
+    for i in np.argsort(-(shares - sizes), kind='stable')[:remainder]:
+        sizes[i] += 1
+    
+    return sizes.tolist()
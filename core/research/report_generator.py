@@ -137,7 +137,10 @@ class ReportGenerator:
             stats = monte_carlo_results.get('stats', {})
             lines.append("| Metric | Value |")
             lines.append("|--------|-------|")
-            lines.append(f"| Simulations | {monte_carlo_results.get('simulations', 0)} |")
+            n_simulations = monte_carlo_results.get(
+                'n_simulations', len(monte_carlo_results.get('simulations', []))
+            )
+            lines.append(f"| Simulations | {n_simulations} |")
             lines.append(f"| Probability of Profit | {stats.get('prob_profit', 0):.1%} |")
             lines.append(f"| Median Return | {stats.get('median_return', 0):.2f}% |")
             lines.append(f"| Mean Return | {stats.get('mean_return', 0):.2f}% |")
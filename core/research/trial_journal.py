@@ -0,0 +1,168 @@
+"""
+Trial Journal - журнал завершенных trials ParameterOptimizer на диске.
+
+Большой grid (10k комбинаций на ночь) который упал или был прерван
+терял всю сделанную работу. TrialJournal записывает результат каждой
+завершенной комбинации в SQLite сразу после расчета, повторный optimize
+с тем же журналом пропускает уже посчитанные комбинации и собирает
+all_results / top_n / sensitivity из журнала.
+
+Trial идентифицируется двумя ключами:
+- study_key: что оптимизируем - класс стратегии, рынок, content hash
+  данных, параметры Walk-Forward и engine. Другие данные = другой study,
+  старые результаты не подмешиваются
+- params_key: какая комбинация параметров (JSON с отсортированными ключами)
+
+Пример:
+    with TrialJournal('reports/btc_tortoise_trials.sqlite') as journal:
+        results = optimizer.optimize(
+            strategy_class=TortoiseStrategy,
+            market='BTC-PERP',
+            data=btc_data,
+            param_grid=param_grid,
+            journal=journal
+        )
+"""
+
+import json
+import time
+import sqlite3
+import hashlib
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from core.backtest.cache import data_fingerprint
+
+
+class TrialJournal:
+    """
+    SQLite журнал trials (одна строка на комбинацию параметров).
+
+    Каждая запись коммитится отдельно (WAL режим) - после падения
+    процесса в журнале остаются все завершенные trials.
+    """
+
+    def __init__(self, path: str):
+        """
+        Открыть (или создать) журнал.
+
+        path: Путь к SQLite файлу (':memory:' - журнал в памяти).
+        """
+        self.path = path
+
+        self._connection = sqlite3.connect(path)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS trials (
+                study_key TEXT NOT NULL,
+                params_key TEXT NOT NULL,
+                params TEXT NOT NULL,
+                result TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (study_key, params_key)
+            )
+            """
+        )
+        self._connection.commit()
+
+    @staticmethod
+    def study_key(
+        strategy_class: Any,
+        market: str,
+        data: pd.DataFrame,
+        settings: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """
+        Ключ study: все что кроме параметров влияет на результат trial.
+
+        strategy_class: Класс стратегии.
+        market: Рынок.
+        data: Свечи.
+        settings: Параметры Walk-Forward / engine / метрики.
+
+        Возвращает: sha256 hex digest.
+        """
+        payload = {
+            'strategy': f"{strategy_class.__module__}.{getattr(strategy_class, '__qualname__', strategy_class)}",
+            'market': market,
+            'data': data_fingerprint(data),
+            'settings': settings or {}
+        }
+
+        encoded = _dumps(payload).encode()
+        return hashlib.sha256(encoded).hexdigest()
+
+    @staticmethod
+    def params_key(params: Dict[str, Any]) -> str:
+        """Ключ комбинации параметров (порядок ключей не важен)."""
+        return _dumps(params)
+
+    def load(self, study_key: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Все завершенные trials study.
+
+        study_key: Ключ study (study_key()).
+
+        Возвращает: {params_key: result}.
+        """
+        rows = self._connection.execute(
+            "SELECT params_key, result FROM trials WHERE study_key = ?",
+            (study_key,)
+        )
+
+        return {params_key: json.loads(result) for params_key, result in rows}
+
+    def record(self, study_key: str, params: Dict[str, Any], result: Dict[str, Any]):
+        """
+        Записать завершенный trial (перезаписывает trial с тем же ключом).
+
+        study_key: Ключ study.
+        params: Параметры комбинации.
+        result: Результат trial (JSON-сериализуемый словарь).
+        """
+        self._connection.execute(
+            "INSERT OR REPLACE INTO trials (study_key, params_key, params, result, created_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (study_key, self.params_key(params), _dumps(params), _dumps(result), time.time())
+        )
+        self._connection.commit()
+
+    def count(self, study_key: Optional[str] = None) -> int:
+        """Количество trials (всего или в study)."""
+        if study_key is None:
+            row = self._connection.execute("SELECT COUNT(*) FROM trials").fetchone()
+        else:
+            row = self._connection.execute(
+                "SELECT COUNT(*) FROM trials WHERE study_key = ?", (study_key,)
+            ).fetchone()
+
+        return row[0]
+
+    def close(self):
+        """Закрыть соединение."""
+        self._connection.close()
+
+    def __enter__(self) -> 'TrialJournal':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __repr__(self) -> str:
+        """Строковое представление."""
+        return f"TrialJournal(path={self.path})"
+
+
+def _dumps(value: Any) -> str:
+    """JSON с отсортированными ключами (numpy скаляры -> Python)."""
+    return json.dumps(value, sort_keys=True, default=_json_default)
+
+
+def _json_default(value: Any) -> Any:
+    """numpy типы и прочие объекты для json.dumps."""
+    if isinstance(value, np.generic):
+        return value.item()
+    return repr(value)
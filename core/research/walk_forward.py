@@ -14,11 +14,70 @@ Walk-Forward - метод тестирования который защищае
 
 import pandas as pd
 import numpy as np
-from typing import List, Dict, Any, Optional
+import os
+import copy
+import contextlib
+from typing import List, Dict, Any, Optional, Iterator, Collection
+from dataclasses import dataclass
+from concurrent.futures import Executor, ProcessPoolExecutor, as_completed
 from datetime import datetime, timedelta
 
 # Импорт BacktestEngine для запуска backtests
 from core.backtest.engine import BacktestEngine
+from core.backtest.cache import BacktestCache
+from core.strategy.base import IStrategy
+from core.research.parallel import SharedFrame, load_shared_frame, resolve_n_jobs
+
+
+@dataclass(frozen=True)
+class SplitIndices:
+    """
+    Границы одного Walk-Forward split в позициях строк (без данных).
+    
+    Train = [train_start, train_end), test = [train_end, test_end).
+    Дескриптор весит несколько int - сколько бы ни было splits, данные
+    в памяти одни, окна режутся через data.iloc[split.train].
+    """
+    split_id: int
+    train_start: int
+    train_end: int
+    test_end: int
+    
+    @property
+    def test_start(self) -> int:
+        """Test начинается сразу после train."""
+        return self.train_end
+    
+    @property
+    def train(self) -> slice:
+        """Slice train окна (для data.iloc)."""
+        return slice(self.train_start, self.train_end)
+    
+    @property
+    def test(self) -> slice:
+        """Slice test окна (для data.iloc)."""
+        return slice(self.test_start, self.test_end)
+    
+    @property
+    def train_size(self) -> int:
+        return self.train_end - self.train_start
+    
+    @property
+    def test_size(self) -> int:
+        return self.test_end - self.test_start
+    
+    def slice(self, data: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+        """
+        Train/test окна как views на data (без копирования).
+        
+        Окна только для чтения (см. WalkForwardSplitter.split).
+        
+        Возвращает: {'train': df, 'test': df}
+        """
+        return {
+            'train': data.iloc[self.train],
+            'test': data.iloc[self.test]
+        }
 
 
 class WalkForwardSplitter:
@@ -35,6 +94,10 @@ class WalkForwardSplitter:
         
         splits = splitter.split(data)
         # Получаем список {train, test} пар
+        
+        # Или лениво, только индексы (память O(n) при любом числе splits):
+        for split in splitter.iter_splits(len(data)):
+            train = data.iloc[split.train]
     """
     
     def __init__(
@@ -61,6 +124,11 @@ class WalkForwardSplitter:
         """
         Разделить данные на train/test windows.
         
+        Окна - views на data (iloc без .copy()), поэтому память не растет
+        с числом splits. Окна только для чтения: без copy-on-write
+        (pandas < 3 по умолчанию) изменение окна может изменить data.
+        Если окно нужно менять - сначала .copy().
+        
         data: DataFrame с временными рядами (должен иметь 'timestamp' колонку).
         
         Возвращает: Список словарей [{'train': df, 'test': df}, ...]
@@ -68,123 +136,138 @@ class WalkForwardSplitter:
         Raises:
             ValueError: Если данных недостаточно для хотя бы одного split.
         """
-        # Проверка что данных достаточно
-        min_required = self.train_days + self.test_days
-        if len(data) < min_required:
-            raise ValueError(
-                f"Недостаточно данных. Требуется минимум {min_required} дней, "
-                f"имеется {len(data)} дней"
-            )
-        
-        splits = []
-        
-        if self.anchored:
-            # Anchored window: train растет с каждым split
-            splits = self._create_anchored_splits(data)
-        else:
-            # Rolling window: train фиксированного размера
-            splits = self._create_rolling_splits(data)
-        
-        return splits
+        return [split.slice(data) for split in self.iter_splits(len(data))]
     
-    def _create_anchored_splits(self, data: pd.DataFrame) -> List[Dict[str, pd.DataFrame]]:
+    def iter_splits(
+        self,
+        n_rows: int,
+        split_ids: Optional[Collection[int]] = None
+    ) -> Iterator[SplitIndices]:
         """
-        Создать anchored window splits.
+        Лениво перечислить splits как индексные дескрипторы.
         
         Anchored: train всегда начинается с начала данных и растет.
         
         Split 1: [Train: 0-180][Test: 180-210]
         Split 2: [Train: 0-210][Test: 210-240]
-        Split 3: [Train: 0-240][Test: 240-270]
+        
+        Rolling: train фиксированного размера, сдвигается вперед.
+        
+        Split 1: [Train: 0-180][Test: 180-210]
+        Split 2: [Train: 30-210][Test: 210-240]
+        
+        n_rows: Количество строк в данных (len(data)).
+        split_ids: Только splits с этими split_id (None = все). Нумерация
+                   та же что без фильтра.
+        
+        Возвращает: Генератор SplitIndices.
+        
+        Raises:
+            ValueError: Если данных недостаточно для хотя бы одного split
+                        (сразу, а не на первом next()).
         """
-        splits = []
+        # Проверка что данных достаточно
+        min_required = self.train_days + self.test_days
+        if n_rows < min_required:
+            raise ValueError(
+                f"Недостаточно данных. Требуется минимум {min_required} дней, "
+                f"имеется {n_rows} дней"
+            )
         
-        # Начинаем с первого возможного split
-        train_end = self.train_days
-        test_end = train_end + self.test_days
+        splits = self._generate_splits(n_rows)
         
-        while test_end <= len(data):
-            # Train от начала до train_end
-            train_data = data.iloc[0:train_end].copy()
-            
-            # Test от train_end до test_end
-            test_data = data.iloc[train_end:test_end].copy()
-            
-            splits.append({
-                'train': train_data,
-                'test': test_data
-            })
-            
-            # Сдвигаем на step_days
-            train_end += self.step_days
-            test_end += self.step_days
+        if split_ids is not None:
+            split_ids = set(split_ids)
+            return (split for split in splits if split.split_id in split_ids)
         
         return splits
     
-    def _create_rolling_splits(self, data: pd.DataFrame) -> List[Dict[str, pd.DataFrame]]:
+    def count_splits(self, n_rows: int) -> int:
         """
-        Создать rolling window splits.
-        
-        Rolling: train фиксированного размера, сдвигается вперед.
-        
-        Split 1: [Train: 0-180][Test: 180-210]
-        Split 2: [Train: 30-210][Test: 210-240]
-        Split 3: [Train: 60-240][Test: 240-270]
+        Количество splits для n_rows строк (0 если данных недостаточно).
         """
-        splits = []
+        if n_rows < self.train_days + self.test_days:
+            return 0
+        
+        # Последний split: train_days + test_days + k * step_days <= n_rows
+        return (n_rows - self.train_days - self.test_days) // self.step_days + 1
+    
+    def _generate_splits(self, n_rows: int) -> Iterator[SplitIndices]:
+        """Генератор для iter_splits (без проверок)."""
+        split_id = 0
         
         # Начинаем с первого split
         train_start = 0
         train_end = self.train_days
         test_end = train_end + self.test_days
         
-        while test_end <= len(data):
-            # Train от train_start до train_end
-            train_data = data.iloc[train_start:train_end].copy()
-            
-            # Test от train_end до test_end
-            test_data = data.iloc[train_end:test_end].copy()
-            
-            splits.append({
-                'train': train_data,
-                'test': test_data
-            })
+        while test_end <= n_rows:
+            yield SplitIndices(
+                split_id=split_id,
+                train_start=train_start,
+                train_end=train_end,
+                test_end=test_end
+            )
             
-            # Сдвигаем на step_days
-            train_start += self.step_days
+            # Сдвигаем на step_days (anchored: начало train не двигается)
+            split_id += 1
+            if not self.anchored:
+                train_start += self.step_days
             train_end += self.step_days
             test_end += self.step_days
-        
-        return splits
     
-    def get_split_info(self, splits: List[Dict[str, pd.DataFrame]]) -> List[Dict[str, Any]]:
+    def get_split_info(
+        self,
+        splits: List[Any],
+        data: Optional[pd.DataFrame] = None
+    ) -> List[Dict[str, Any]]:
         """
         Получить метаданные о каждом split.
         
-        splits: Список splits от метода split().
+        splits: Список splits от split() (DataFrame) или iter_splits() (SplitIndices).
+        data: Данные для SplitIndices - даты берутся из data['timestamp']
+              по 4 позициям на split. Без data вместо дат - позиции строк.
         
         Возвращает: Список словарей с информацией о каждом split.
         """
         info = []
         
         for i, split in enumerate(splits):
-            train = split['train']
-            test = split['test']
-            
-            # Получаем даты из timestamp колонки
-            train_start = train['timestamp'].iloc[0]
-            train_end = train['timestamp'].iloc[-1]
-            test_start = test['timestamp'].iloc[0]
-            test_end = test['timestamp'].iloc[-1]
+            if isinstance(split, SplitIndices):
+                positions = (split.train_start, split.train_end - 1,
+                             split.test_start, split.test_end - 1)
+                
+                if data is not None:
+                    timestamps = data['timestamp']
+                    bounds = [timestamps.iloc[position] for position in positions]
+                else:
+                    bounds = list(positions)
+                
+                train_size = split.train_size
+                test_size = split.test_size
+            else:
+                train = split['train']
+                test = split['test']
+                
+                # Получаем даты из timestamp колонки
+                bounds = [
+                    train['timestamp'].iloc[0],
+                    train['timestamp'].iloc[-1],
+                    test['timestamp'].iloc[0],
+                    test['timestamp'].iloc[-1]
+                ]
+                
+                train_size = len(train)
+                test_size = len(test)
             
             split_info = {
-                'split_id': i,
-                'train_start': train_start,
-                'train_end': train_end,
-                'test_start': test_start,
-                'test_end': test_end,
-                'train_size': len(train),
-                'test_size': len(test)
+                'split_id': split.split_id if isinstance(split, SplitIndices) else i,
+                'train_start': bounds[0],
+                'train_end': bounds[1],
+                'test_start': bounds[2],
+                'test_end': bounds[3],
+                'train_size': train_size,
+                'test_size': test_size
             }
             
             info.append(split_info)
@@ -235,7 +318,8 @@ class WalkForwardAnalyzer:
         self,
         strategy,
         initial_capital: float = 10000.0,
-        risk_per_trade: float = 1.0
+        risk_per_trade: float = 1.0,
+        cache: Optional[BacktestCache] = None
     ):
         """
         Инициализация WalkForwardAnalyzer.
@@ -243,16 +327,21 @@ class WalkForwardAnalyzer:
         strategy: Стратегия для тестирования (должна реализовывать IStrategy).
         initial_capital: Начальный капитал для backtesting.
         risk_per_trade: Риск на сделку в % (default: 1.0).
+        cache: BacktestCache для backtests окон (None = без кэша).
         """
         self.strategy = strategy
         self.initial_capital = initial_capital
         self.risk_per_trade = risk_per_trade
+        self.cache = cache
     
     def run_analysis(
         self,
         market: str,
         data: pd.DataFrame,
-        splitter: WalkForwardSplitter
+        splitter: WalkForwardSplitter,
+        n_jobs: int = 1,
+        executor: Optional[Executor] = None,
+        split_ids: Optional[Collection[int]] = None
     ) -> Dict[str, Any]:
         """
         Запустить Walk-Forward analysis.
@@ -260,6 +349,11 @@ class WalkForwardAnalyzer:
         market: Название рынка (например, 'BTC-PERP').
         data: DataFrame с историческими данными.
         splitter: WalkForwardSplitter для разделения данных.
+        n_jobs: Количество процессов для backtests splits
+                (1 = последовательно, -1 = все ядра).
+        executor: Готовый executor вместо собственного ProcessPoolExecutor.
+        split_ids: Только эти splits (None = все) - например, дешевая оценка
+                   на части истории при successive halving.
         
         Возвращает: Словарь с результатами:
             {
@@ -281,50 +375,146 @@ class WalkForwardAnalyzer:
                 }
             }
         """
-        # Разделяем данные на splits
-        splits = splitter.split(data)
+        if executor is not None or resolve_n_jobs(n_jobs) > 1:
+            split_results = self._run_parallel(
+                market=market,
+                data=data,
+                splitter=splitter,
+                n_workers=resolve_n_jobs(n_jobs),
+                executor=executor,
+                split_ids=split_ids
+            )
+        else:
+            split_results = self._run_sequential(market, data, splitter, split_ids)
+        
+        # Агрегируем результаты
+        summary = self._aggregate_results(split_results)
         
+        return {
+            'splits': split_results,
+            'summary': summary
+        }
+    
+    def _run_sequential(
+        self,
+        market: str,
+        data: pd.DataFrame,
+        splitter: WalkForwardSplitter,
+        split_ids: Optional[Collection[int]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Backtests всех splits по очереди в текущем процессе.
+        
+        Возвращает: Результаты splits (split_id, train_metrics, test_metrics).
+        """
         split_results = []
         
-        # Для каждого split запускаем backtests
-        for i, split in enumerate(splits):
-            train_data = split['train']
-            test_data = split['test']
+        # Для каждого split запускаем backtests (окна - views на data)
+        for split in splitter.iter_splits(len(data), split_ids):
+            # Свежая стратегия на split - состояние (trailing_stops и т.д.)
+            # не протекает из одного окна в другое
+            strategy = self._fresh_strategy()
             
             # Backtest на train (In-Sample)
-            train_metrics = self._run_backtest(market, train_data)
+            train_metrics = self._run_backtest(market, data.iloc[split.train], strategy)
             
             # Backtest на test (Out-of-Sample)
-            test_metrics = self._run_backtest(market, test_data)
+            test_metrics = self._run_backtest(market, data.iloc[split.test], strategy)
             
             split_results.append({
-                'split_id': i,
+                'split_id': split.split_id,
                 'train_metrics': train_metrics,
                 'test_metrics': test_metrics
             })
         
-        # Агрегируем результаты
-        summary = self._aggregate_results(split_results)
+        return split_results
+    
+    def _run_parallel(
+        self,
+        market: str,
+        data: pd.DataFrame,
+        splitter: WalkForwardSplitter,
+        n_workers: int,
+        executor: Optional[Executor] = None,
+        split_ids: Optional[Collection[int]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Backtests splits в пуле процессов.
         
-        return {
-            'splits': split_results,
-            'summary': summary
-        }
+        Каждый train и test backtest - отдельная задача. Свечи передаются
+        через SharedFrame, в задачу уходят только границы окна и свежая
+        копия стратегии.
+        
+        Возвращает: Результаты splits в порядке split_id.
+        """
+        splits = list(splitter.iter_splits(len(data), split_ids))
+        
+        split_results = [
+            {'split_id': split.split_id, 'train_metrics': None, 'test_metrics': None}
+            for split in splits
+        ]
+        
+        with SharedFrame(data) as shared:
+            pool = executor or ProcessPoolExecutor(max_workers=n_workers)
+            
+            try:
+                futures = {}
+                for i, split in enumerate(splits):
+                    for key, window in (('train_metrics', split.train),
+                                        ('test_metrics', split.test)):
+                        future = pool.submit(
+                            _run_window_backtest,
+                            self._fresh_strategy(),
+                            self.initial_capital,
+                            self.risk_per_trade,
+                            market,
+                            shared.spec,
+                            window.start,
+                            window.stop,
+                            self.cache
+                        )
+                        futures[future] = (i, key)
+                
+                for future in as_completed(futures):
+                    i, key = futures[future]
+                    split_results[i][key] = future.result()
+            finally:
+                if executor is None:
+                    pool.shutdown()
+        
+        return split_results
     
-    def _run_backtest(self, market: str, data: pd.DataFrame) -> Dict[str, Any]:
+    def _fresh_strategy(self):
+        """
+        Копия стратегии для нового split.
+        
+        Mock-стратегии и прочие объекты без IStrategy используются как есть.
+        """
+        if isinstance(self.strategy, IStrategy):
+            return copy.deepcopy(self.strategy)
+        return self.strategy
+    
+    def _run_backtest(
+        self,
+        market: str,
+        data: pd.DataFrame,
+        strategy: Optional[Any] = None
+    ) -> Dict[str, Any]:
         """
         Запустить backtest на данных.
         
         market: Название рынка.
         data: DataFrame с данными.
+        strategy: Стратегия (default: self.strategy).
         
         Возвращает: Метрики backtest.
         """
         # Создаем backtest engine
         engine = BacktestEngine(
-            strategy=self.strategy,
+            strategy=strategy if strategy is not None else self.strategy,
             initial_capital=self.initial_capital,
-            risk_per_trade=self.risk_per_trade
+            risk_per_trade=self.risk_per_trade,
+            cache=self.cache
         )
         
         # Запускаем backtest
@@ -395,3 +585,33 @@ class WalkForwardAnalyzer:
             f"risk={self.risk_per_trade}%)"
         )
 
+
+def _run_window_backtest(
+    strategy,
+    initial_capital: float,
+    risk_per_trade: float,
+    market: str,
+    data_spec,
+    start: int,
+    end: int,
+    cache: Optional[BacktestCache] = None
+) -> Dict[str, Any]:
+    """
+    Задача для worker процесса: backtest на окне data[start:end].
+    
+    Данные открываются из SharedFrame (один раз на процесс), print'ы
+    backtest engine глушатся. Кэш приходит без памяти - общий у
+    процессов только дисковый уровень.
+    
+    Возвращает: Метрики backtest.
+    """
+    data = load_shared_frame(data_spec)
+    analyzer = WalkForwardAnalyzer(
+        strategy=strategy,
+        initial_capital=initial_capital,
+        risk_per_trade=risk_per_trade,
+        cache=cache
+    )
+    
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        return analyzer._run_backtest(market, data.iloc[start:end])
@@ -128,6 +128,36 @@ class Signal:
         return reward / risk
 
 
+@dataclass
+class SignalArrays:
+    """
+    Сигналы стратегии сразу для всех баров (vectorized режим).
+    
+    Все массивы одной длины = количество баров в history.
+    Элемент i описывает что стратегия сделала бы в on_bar на баре i.
+    
+    Attributes:
+        side: int8 массив: 1 = LONG entry, -1 = SHORT entry, 0 = нет entry
+        entry: Цена входа (используется где side != 0)
+        stop: Цена стоп-лосса
+        target: Первая цель (targets[0] в Signal)
+        exit_long: True если на этом баре открытый LONG нужно закрыть
+        exit_short: True если на этом баре открытый SHORT нужно закрыть
+        exit_price: Цена выхода для EXIT сигнала
+    """
+    side: Any
+    entry: Any
+    stop: Any
+    target: Any
+    exit_long: Any
+    exit_short: Any
+    exit_price: Any
+    
+    def __len__(self) -> int:
+        """Количество баров."""
+        return len(self.side)
+
+
 # ===== STRATEGY INTERFACE (интерфейс стратегии) =====
 
 class IStrategy(ABC):
@@ -165,7 +195,12 @@ class IStrategy(ABC):
         Args:
             ctx: Контекст текущей свечи (BarContext)
             history: История предыдущих свечей (обычно pandas DataFrame)
-                    Нужна для расчета индикаторов
+                    Нужна для расчета индикаторов.
+                    Только для чтения: BacktestEngine передает view на
+                    исходные данные (без копирования на каждом баре).
+                    Запись в history источник не меняет (copy-on-write),
+                    но и в следующий бар не попадет - если нужны свои
+                    колонки, сначала history.copy().
         
         Returns:
             Список торговых сигналов (может быть пустым если нет сигнала)
@@ -174,6 +209,36 @@ class IStrategy(ABC):
         # В наследниках этот метод будет заменен на реальную логику
         pass
     
+    def generate_signals(self, market: str, history: Any) -> Optional[SignalArrays]:
+        """
+        Vectorized режим: посчитать сигналы для всех баров за один проход.
+        
+        НЕ абстрактный метод. По умолчанию возвращает None и BacktestEngine
+        вызывает on_bar на каждом баре. Стратегия может переопределить его
+        если умеет считать сигналы сразу по всей истории - результат должен
+        давать те же сделки что и bar-by-bar через on_bar.
+        
+        Args:
+            market: Рынок для сигналов
+            history: Вся история (pandas DataFrame)
+        
+        Returns:
+            SignalArrays или None если vectorized режим не поддерживается
+        """
+        return None
+    
+    def required_history(self) -> Optional[int]:
+        """
+        Сколько последних свечей нужно стратегии в history.
+        
+        BacktestEngine передает в on_bar только это окно (view без копии),
+        поэтому стоимость одного бара не зависит от длины всей истории.
+        
+        Returns:
+            Количество свечей или None если нужна вся история (по умолчанию)
+        """
+        return None
+    
     @abstractmethod
     def markets(self) -> List[str]:
         """
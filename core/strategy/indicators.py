@@ -0,0 +1,207 @@
+"""
+Инкрементальные (streaming) индикаторы.
+
+Каждый индикатор обновляется одной новой свечой за O(1) (amortized) и хранит
+только окно из period последних значений - не нужно пересчитывать
+rolling().max()/min()/mean() по всей истории на каждом баре.
+
+Семантика совпадает с pandas rolling(window=period):
+значение NaN пока не накопилось period точек.
+
+Пример:
+    upper = RollingMax(20)
+    atr = AverageTrueRange(20)
+
+    for bar in bars:
+        upper.update(bar.high)
+        atr.update(bar.high, bar.low, bar.close)
+
+        print(upper.value, atr.value)
+"""
+
+import math
+from collections import deque
+
+
+class RollingMax:
+    """
+    Rolling максимум на монотонной очереди (monotonic deque).
+
+    В очереди лежат (index, value) с убывающими value: все что меньше
+    нового значения уже никогда не станет максимумом и выбрасывается.
+    Каждый элемент добавляется и удаляется один раз -> O(1) amortized.
+    """
+
+    def __init__(self, period: int):
+        """
+        Инициализация.
+
+        period: Размер окна.
+        """
+        if period < 1:
+            raise ValueError(f"period must be >= 1, got {period}")
+
+        self.period = period
+        self.count = 0  # Сколько значений видели всего
+        self._window: deque = deque()
+
+    def _dominates(self, new_value: float, old_value: float) -> bool:
+        """True если old_value больше не может быть экстремумом."""
+        return old_value <= new_value
+
+    def update(self, value: float) -> float:
+        """
+        Добавить новое значение.
+
+        value: Новое значение (например high свечи).
+
+        Возвращает: Текущее значение индикатора.
+        """
+        window = self._window
+
+        # Выбрасываем с конца значения которые новое "перекрывает"
+        while window and self._dominates(value, window[-1][1]):
+            window.pop()
+        window.append((self.count, value))
+
+        self.count += 1
+
+        # Выбрасываем с начала значения вышедшие из окна
+        if window[0][0] <= self.count - 1 - self.period:
+            window.popleft()
+
+        return self.value
+
+    @property
+    def value(self) -> float:
+        """Экстремум за последние period значений (NaN если их меньше)."""
+        if self.count < self.period:
+            return math.nan
+        return self._window[0][1]
+
+    def __repr__(self) -> str:
+        """Строковое представление."""
+        return f"{self.__class__.__name__}(period={self.period}, value={self.value})"
+
+
+class RollingMin(RollingMax):
+    """
+    Rolling минимум на монотонной очереди (зеркально RollingMax).
+    """
+
+    def _dominates(self, new_value: float, old_value: float) -> bool:
+        """True если old_value больше не может быть минимумом."""
+        return old_value >= new_value
+
+
+class RollingMean:
+    """
+    Rolling среднее через running sum.
+
+    Сумма обновляется за O(1): + новое значение - выпавшее из окна.
+    Раз в period обновлений сумма пересчитывается заново по окну,
+    чтобы ошибка округления не накапливалась на длинных потоках.
+    """
+
+    def __init__(self, period: int):
+        """
+        Инициализация.
+
+        period: Размер окна.
+        """
+        if period < 1:
+            raise ValueError(f"period must be >= 1, got {period}")
+
+        self.period = period
+        self.count = 0
+        self._window: deque = deque(maxlen=period)
+        self._sum = 0.0
+
+    def update(self, value: float) -> float:
+        """
+        Добавить новое значение.
+
+        value: Новое значение.
+
+        Возвращает: Текущее среднее (NaN пока не накопилось period значений).
+        """
+        window = self._window
+
+        if len(window) == self.period:
+            # deque(maxlen) сам выбросит самое старое значение
+            self._sum -= window[0]
+        window.append(value)
+        self._sum += value
+
+        self.count += 1
+
+        # Периодический точный пересчет (amortized O(1))
+        if self.count % self.period == 0:
+            self._sum = math.fsum(window)
+
+        return self.value
+
+    @property
+    def value(self) -> float:
+        """Среднее за последние period значений (NaN если их меньше)."""
+        if self.count < self.period:
+            return math.nan
+        return self._sum / self.period
+
+    def __repr__(self) -> str:
+        """Строковое представление."""
+        return f"RollingMean(period={self.period}, value={self.value})"
+
+
+class AverageTrueRange:
+    """
+    ATR = rolling среднее True Range.
+
+    True Range = max(high - low, |high - prev_close|, |low - prev_close|).
+    Для первой свечи (нет prev_close) True Range = high - low,
+    как в TortoiseStrategy._calculate_atr.
+    """
+
+    def __init__(self, period: int):
+        """
+        Инициализация.
+
+        period: Период ATR.
+        """
+        self.period = period
+        self.prev_close = None
+        self._mean = RollingMean(period)
+
+    def update(self, high: float, low: float, close: float) -> float:
+        """
+        Добавить новую свечу.
+
+        high, low, close: Цены свечи.
+
+        Возвращает: Текущий ATR (NaN пока не накопилось period свечей).
+        """
+        true_range = high - low
+        if self.prev_close is not None:
+            true_range = max(
+                true_range,
+                abs(high - self.prev_close),
+                abs(low - self.prev_close)
+            )
+
+        self.prev_close = close
+
+        return self._mean.update(true_range)
+
+    @property
+    def count(self) -> int:
+        """Сколько свечей видели всего."""
+        return self._mean.count
+
+    @property
+    def value(self) -> float:
+        """Текущий ATR."""
+        return self._mean.value
+
+    def __repr__(self) -> str:
+        """Строковое представление."""
+        return f"AverageTrueRange(period={self.period}, value={self.value})"
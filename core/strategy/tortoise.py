@@ -20,8 +20,9 @@ import pandas as pd
 import numpy as np
 
 # Импортируем базовые классы из нашего framework
-from .base import IStrategy, Signal, BarContext, SignalSide
-from typing import List, Dict, Any
+from .base import IStrategy, Signal, BarContext, SignalSide, SignalArrays
+from .indicators import RollingMax, RollingMin, AverageTrueRange
+from typing import List, Dict, Any, Optional, Tuple
 
 
 # ===== TORTOISE STRATEGY CLASS =====
@@ -70,6 +71,10 @@ class TortoiseStrategy(IStrategy):
         # Словарь для хранения состояния trailing stops
         # market -> {'price': float, 'side': str}
         self.trailing_stops: Dict[str, Dict[str, Any]] = {}
+        
+        # Инкрементальные индикаторы для on_bar (по рынкам)
+        # market -> _TortoiseIndicators
+        self._indicators: Dict[str, '_TortoiseIndicators'] = {}
     
     def markets(self) -> List[str]:
         """
@@ -80,6 +85,19 @@ class TortoiseStrategy(IStrategy):
         """
         return self._markets
     
+    def required_history(self) -> int:
+        """
+        Минимальное окно истории дающее те же сигналы что и полная история.
+        
+        Donchian берется на предпоследней свече (нужно period + 1 свечей),
+        ATR на последней (нужно trail_atr_len + 1 свечей чтобы у каждого
+        True Range был prev_close).
+        
+        Returns:
+            Количество свечей
+        """
+        return max(self.don_break, self.don_exit, self.trail_atr_len) + 1
+    
     def _calculate_atr(self, df: pd.DataFrame, period: int = 14) -> pd.Series:
         """
         Расчет Average True Range (ATR) - мера волатильности.
@@ -161,39 +179,38 @@ class TortoiseStrategy(IStrategy):
         """
         signals = []
         
-        # --- 1) ПРОВЕРКИ ---
+        # --- 1) РАСЧЕТ ИНДИКАТОРОВ (инкрементально, O(1) на бар) ---
         
-        # Проверяем что у нас достаточно истории для расчетов
-        # Нужно минимум don_break + 1 свеча (для расчета канала и проверки прорыва)
-        min_history = max(self.don_break, self.trail_atr_len) + 1
-        if len(history) < min_history:
-            # Недостаточно данных - возвращаем пустой список
+        # Пустая история - считать нечего
+        if len(history) == 0:
             return signals
         
-        # --- 2) РАСЧЕТ ИНДИКАТОРОВ ---
+        # Состояние индикаторов по всем свечам history КРОМЕ текущей
+        # + значения текущей свечи (high, low, close, timestamp)
+        indicators, current_bar = self._sync_indicators(ctx, history)
         
-        # Рассчитываем Donchian каналы для breakout (20-period)
-        don_upper_20, don_lower_20 = self._calculate_donchian(history, self.don_break)
+        # Берем ПРЕДЫДУЩИЕ значения каналов (до добавления текущей свечи).
+        # Индикаторы считаем на ЗАКРЫТЫХ свечах:
+        # текущая свеча (может быть еще не закрыта) в канал не входит.
+        prev_upper_20 = indicators.break_upper.value
+        prev_lower_20 = indicators.break_lower.value
+        prev_upper_10 = indicators.exit_upper.value
+        prev_lower_10 = indicators.exit_lower.value
         
-        # Рассчитываем Donchian каналы для exit (10-period)
-        don_upper_10, don_lower_10 = self._calculate_donchian(history, self.don_exit)
+        # Добавляем текущую свечу (ATR считается включая ее)
+        indicators.update(*current_bar)
+        current_atr = indicators.atr.value
         
-        # Рассчитываем ATR для trailing stop
-        atr = self._calculate_atr(history, self.trail_atr_len)
+        # --- 2) ПРОВЕРКИ ---
         
-        # --- 3) ПОЛУЧАЕМ ЗНАЧЕНИЯ ДЛЯ АНАЛИЗА ---
-        
-        # Берем ПРЕДЫДУЩИЕ значения каналов ([-2])
-        # Почему -2 а не -1? Потому что индикаторы считаем на ЗАКРЫТЫХ свечах.
-        # -1 = текущая свеча (может быть еще не закрыта)
-        # -2 = предыдущая закрытая свеча
+        # Проверяем что у нас достаточно истории для расчетов
+        # Нужно минимум don_break + 1 свеча (для расчета канала и проверки прорыва)
+        min_history = max(self.don_break, self.trail_atr_len) + 1
+        if len(history) < min_history:
+            # Недостаточно данных - возвращаем пустой список
+            return signals
         
-        # .iloc[-2] берет предпоследний элемент из Series
-        prev_upper_20 = don_upper_20.iloc[-2] if len(don_upper_20) > 1 else None
-        prev_lower_20 = don_lower_20.iloc[-2] if len(don_lower_20) > 1 else None
-        prev_upper_10 = don_upper_10.iloc[-2] if len(don_upper_10) > 1 else None
-        prev_lower_10 = don_lower_10.iloc[-2] if len(don_lower_10) > 1 else None
-        current_atr = atr.iloc[-1] if len(atr) > 0 else None
+        # --- 3) ПРОВЕРЯЕМ ЗНАЧЕНИЯ ДЛЯ АНАЛИЗА ---
         
         # Проверяем что все индикаторы рассчитались (не NaN)
         # pd.isna() проверяет является ли значение NaN (Not a Number)
@@ -320,6 +337,143 @@ class TortoiseStrategy(IStrategy):
         
         return signals
     
+    def generate_signals(self, market: str, history: pd.DataFrame) -> Optional[SignalArrays]:
+        """
+        Vectorized версия on_bar: сигналы для всех баров за один проход.
+        
+        Индикаторы считаются один раз по всей истории. Rolling окна
+        causal (значение на баре i зависит только от баров <= i), поэтому
+        результат совпадает с on_bar вызванным на каждом префиксе истории.
+        
+        Что делать с сигналами (открыта ли позиция) решает BacktestEngine -
+        он знает состояние позиций так же как trailing_stops в on_bar.
+        
+        Args:
+            market: Рынок
+            history: Вся история (pandas DataFrame)
+        
+        Returns:
+            SignalArrays или None если on_bar переопределен в наследнике
+        """
+        # Наследник с другой логикой on_bar - bulk сигналы могут не совпасть
+        if type(self).on_bar is not TortoiseStrategy.on_bar:
+            return None
+        
+        n_bars = len(history)
+        close = history['close'].to_numpy(dtype=np.float64)
+        
+        # --- 1) ИНДИКАТОРЫ (один раз на всю историю) ---
+        don_upper_20, don_lower_20 = self._calculate_donchian(history, self.don_break)
+        don_upper_10, don_lower_10 = self._calculate_donchian(history, self.don_exit)
+        atr = self._calculate_atr(history, self.trail_atr_len)
+        
+        # shift(1) = значение на предыдущей закрытой свече (как .iloc[-2] в on_bar)
+        prev_upper_20 = don_upper_20.shift(1).to_numpy(dtype=np.float64)
+        prev_lower_20 = don_lower_20.shift(1).to_numpy(dtype=np.float64)
+        prev_upper_10 = don_upper_10.shift(1).to_numpy(dtype=np.float64)
+        prev_lower_10 = don_lower_10.shift(1).to_numpy(dtype=np.float64)
+        current_atr = atr.to_numpy(dtype=np.float64)
+        
+        # --- 2) БАРЫ НА КОТОРЫХ on_bar НЕ ВЫХОДИТ РАНО ---
+        # Достаточно истории + все индикаторы рассчитались (не NaN)
+        min_history = max(self.don_break, self.trail_atr_len) + 1
+        ready = (
+            (np.arange(1, n_bars + 1) >= min_history) &
+            ~np.isnan(prev_upper_20) &
+            ~np.isnan(prev_lower_20) &
+            ~np.isnan(current_atr)
+        )
+        
+        # --- 3) ENTRY (long имеет приоритет, как if/elif в on_bar) ---
+        with np.errstate(invalid='ignore'):
+            is_long = ready & (close > prev_upper_20)
+            is_short = ready & ~is_long & (close < prev_lower_20)
+        
+        entry = close
+        stop = np.where(is_long, prev_lower_20, prev_upper_20)
+        risk_distance = np.abs(entry - stop)
+        target = np.where(is_long, entry + 2.0 * risk_distance, entry - 2.0 * risk_distance)
+        
+        # Те же проверки что validate_signal
+        with np.errstate(invalid='ignore'):
+            valid_long = (stop < entry) & (target > entry)
+            valid_short = (stop > entry) & (target < entry)
+        
+        side = np.zeros(n_bars, dtype=np.int8)
+        side[is_long & valid_long] = 1
+        side[is_short & valid_short] = -1
+        
+        # --- 4) EXIT (пробой exit канала) ---
+        with np.errstate(invalid='ignore'):
+            exit_long = ready & (close < prev_lower_10)
+            exit_short = ready & (close > prev_upper_10)
+        
+        return SignalArrays(
+            side=side,
+            entry=entry,
+            stop=stop,
+            target=target,
+            exit_long=exit_long,
+            exit_short=exit_short,
+            exit_price=close
+        )
+    
+    def _sync_indicators(
+        self,
+        ctx: BarContext,
+        history: pd.DataFrame
+    ) -> Tuple['_TortoiseIndicators', Tuple[float, float, float, Optional[int]]]:
+        """
+        Получить состояние индикаторов для всех свечей history кроме последней.
+        
+        Если on_bar вызывается последовательно (как в BacktestEngine),
+        предпоследняя свеча history = последняя свеча которую мы уже видели,
+        а последняя свеча = ctx. Тогда состояние просто продолжается - O(1).
+        
+        Иначе (первый вызов, другой кусок данных, API запрос) состояние
+        строится заново по хвосту history длиной required_history() - O(окно),
+        а не O(вся история).
+        
+        Args:
+            ctx: Контекст текущей свечи
+            history: История свечей (последняя = текущая)
+        
+        Returns:
+            Tuple (state, current_bar):
+                state: _TortoiseIndicators без текущей свечи
+                current_bar: (high, low, close, timestamp) текущей свечи
+        """
+        state = self._indicators.get(ctx.market)
+        
+        if (state is not None and state.last_timestamp is not None and
+                len(history) >= 2 and 'timestamp' in history.columns):
+            timestamps = history['timestamp']
+            
+            if (state.last_timestamp == _timestamp_ms(timestamps.iat[-2]) and
+                    ctx.timestamp == _timestamp_ms(timestamps.iat[-1])):
+                return state, (ctx.high, ctx.low, ctx.close, ctx.timestamp)
+        
+        # Перестраиваем по хвосту истории (без текущей свечи)
+        state = _TortoiseIndicators(self.don_break, self.don_exit, self.trail_atr_len)
+        
+        start = max(0, len(history) - 1 - self.required_history())
+        bars = history.iloc[start:]
+        
+        highs = bars['high'].tolist()
+        lows = bars['low'].tolist()
+        closes = bars['close'].tolist()
+        if 'timestamp' in bars.columns:
+            timestamps = [_timestamp_ms(value) for value in bars['timestamp'].tolist()]
+        else:
+            timestamps = [None] * len(bars)
+        
+        bars = list(zip(highs, lows, closes, timestamps))
+        for bar in bars[:-1]:
+            state.update(*bar)
+        
+        self._indicators[ctx.market] = state
+        return state, bars[-1]
+    
     def register_position(self, market: str, side: str):
         """
         Зарегистрировать открытую позицию для tracking.
@@ -357,3 +511,62 @@ class TortoiseStrategy(IStrategy):
             f")"
         )
 
+
+def _timestamp_ms(value: Any) -> int:
+    """
+    Timestamp свечи в epoch ms.
+    
+    Args:
+        value: int (уже ms), pd.Timestamp/datetime или строка с датой
+    
+    Returns:
+        int epoch ms (naive время считается UTC)
+    """
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    
+    # Timestamp.value - наносекунды UTC
+    return pd.Timestamp(value).value // 1_000_000
+
+
+class _TortoiseIndicators:
+    """
+    Состояние инкрементальных индикаторов TortoiseStrategy для одного рынка.
+    
+    Хранит только окна нужной длины (bounded state):
+    - breakout канал (don_break)
+    - exit канал (don_exit)
+    - ATR (trail_atr_len)
+    """
+    
+    def __init__(self, don_break: int, don_exit: int, trail_atr_len: int):
+        """
+        Args:
+            don_break: Период breakout канала
+            don_exit: Период exit канала
+            trail_atr_len: Период ATR
+        """
+        self.break_upper = RollingMax(don_break)
+        self.break_lower = RollingMin(don_break)
+        self.exit_upper = RollingMax(don_exit)
+        self.exit_lower = RollingMin(don_exit)
+        self.atr = AverageTrueRange(trail_atr_len)
+        
+        # Timestamp последней добавленной свечи (для проверки непрерывности)
+        self.last_timestamp: Optional[int] = None
+    
+    def update(self, high: float, low: float, close: float, timestamp: Optional[int]):
+        """
+        Добавить закрытую свечу во все индикаторы - O(1).
+        
+        Args:
+            high, low, close: Цены свечи
+            timestamp: Время свечи (epoch ms) или None
+        """
+        self.break_upper.update(high)
+        self.break_lower.update(low)
+        self.exit_upper.update(high)
+        self.exit_lower.update(low)
+        self.atr.update(high, low, close)
+        
+        self.last_timestamp = timestamp
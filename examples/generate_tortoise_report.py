@@ -19,6 +19,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from core.data.manager import DataManager
 from core.strategy.tortoise import TortoiseStrategy
 from core.backtest.engine import BacktestEngine
+from core.backtest.cache import BacktestCache
 from core.research.walk_forward import WalkForwardSplitter, WalkForwardAnalyzer
 from core.research.monte_carlo import MonteCarloSimulator
 from core.research.advanced_metrics import AdvancedMetricsCalculator
@@ -49,10 +50,14 @@ def main():
     }
     strategy = TortoiseStrategy(params)
     
+    # Повторный запуск на тех же данных берет backtests из кэша
+    cache = BacktestCache(directory='data/cache/backtests')
+    
     engine = BacktestEngine(
         strategy=strategy,
         initial_capital=10000.0,
-        risk_per_trade=1.0
+        risk_per_trade=1.0,
+        cache=cache
     )
     
     backtest_results = engine.run_backtest('BTC-PERP', btc_data)
@@ -65,7 +70,7 @@ def main():
     # 3. Walk-Forward analysis
     print("\n🔄 Running Walk-Forward analysis...")
     splitter = WalkForwardSplitter(train_days=90, test_days=30)
-    analyzer = WalkForwardAnalyzer(strategy=strategy)
+    analyzer = WalkForwardAnalyzer(strategy=strategy, cache=cache)
     
     wf_results = analyzer.run_analysis('BTC-PERP', btc_data, splitter)
     print(f"   OOS Consistency: {wf_results['summary']['oos_consistency']:.1f}%")
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+⏱ Benchmark BacktestEngine - пропускная способность (bars/sec).
+
+Гоняет BacktestEngine на синтетических 1m свечах (random walk) разного размера
+и печатает bars/sec. При линейной сложности bars/sec не должен падать с ростом
+числа баров.
+
+Usage:
+    python scripts/benchmark_backtest.py
+    python scripts/benchmark_backtest.py --bars 10000,100000,1000000
+    python scripts/benchmark_backtest.py --strategy tortoise --bars 10000,50000
+    python scripts/benchmark_backtest.py --strategy tortoise --bar-by-bar --bars 5000
+"""
+
+import sys
+from pathlib import Path
+import argparse
+import contextlib
+import io
+import time
+
+import pandas as pd
+
+# Add project root to path
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from core.backtest.engine import BacktestEngine
+from core.strategy.base import IStrategy, BarContext, Signal
+from core.strategy.tortoise import TortoiseStrategy
+from core.backtest.synthetic import make_candles
+
+
+class LastBarStrategy(IStrategy):
+    """
+    Минимальная стратегия: только читает history (без сигналов).
+
+    Показывает накладные расходы самого engine на один бар.
+    """
+
+    def on_bar(self, ctx: BarContext, history: pd.DataFrame) -> list[Signal]:
+        # Трогаем history как это делает реальная стратегия
+        _ = len(history)
+        return []
+
+    def required_history(self) -> int:
+        return 50
+
+    def markets(self) -> list[str]:
+        return ['BTC-PERP']
+
+
+def make_strategy(name: str) -> IStrategy:
+    """Создать стратегию по имени."""
+    if name == 'tortoise':
+        return TortoiseStrategy({'markets': ['BTC-PERP']})
+    return LastBarStrategy({'markets': ['BTC-PERP']})
+
+
+def run_benchmark(n_bars: int, strategy_name: str, vectorized: bool = True) -> float:
+    """
+    Один прогон backtest.
+
+    Args:
+        n_bars: Количество свечей
+        strategy_name: 'noop' или 'tortoise'
+        vectorized: Разрешить engine vectorized сигналы (generate_signals)
+
+    Returns:
+        bars/sec
+    """
+    # 1m свечи (geometric random walk)
+    data = make_candles(
+        n_bars,
+        freq='min',
+        start='2020-01-01',
+        price=50000.0,
+        volatility=0.001,
+        spread=0.0005,
+        volume=(1.0, 100.0)
+    )
+    engine = BacktestEngine(
+        strategy=make_strategy(strategy_name),
+        initial_capital=10000.0,
+        risk_per_trade=1.0,
+        vectorized=vectorized
+    )
+
+    # Глушим print'ы engine чтобы не мешали таблице
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        engine.run_backtest('BTC-PERP', data)
+        elapsed = time.perf_counter() - start
+
+    return n_bars / elapsed if elapsed > 0 else float('inf')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark BacktestEngine throughput')
+    parser.add_argument(
+        '--bars',
+        type=str,
+        default='10000,100000,1000000',
+        help='Comma-separated bar counts (default: 10000,100000,1000000)'
+    )
+    parser.add_argument(
+        '--strategy',
+        choices=['noop', 'tortoise'],
+        default='noop',
+        help='Strategy to run (noop = engine overhead only)'
+    )
+    parser.add_argument(
+        '--bar-by-bar',
+        action='store_true',
+        help='Force on_bar on every bar (disable generate_signals)'
+    )
+    args = parser.parse_args()
+
+    sizes = [int(x) for x in args.bars.split(',') if x.strip()]
+
+    mode = 'bar-by-bar' if args.bar_by_bar else 'auto'
+    print(f"\n⏱ BacktestEngine benchmark (strategy={args.strategy}, mode={mode})")
+    print(f"{'bars':>12s} | {'bars/sec':>12s} | {'µs/bar':>8s}")
+    print("-" * 38)
+
+    for n_bars in sizes:
+        bars_per_sec = run_benchmark(n_bars, args.strategy, vectorized=not args.bar_by_bar)
+        print(f"{n_bars:>12,d} | {bars_per_sec:>12,.0f} | {1e6 / bars_per_sec:>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,14 @@
+"""
+Общие helpers для тестов.
+
+make_candles - синтетические свечи (geometric random walk), реализация в
+core.backtest.synthetic (ее же использует scripts/benchmark_backtest.py):
+
+    from tests.conftest import make_candles
+
+    data = make_candles(300, seed=2)
+"""
+
+from core.backtest.synthetic import make_candles
+
+__all__ = ['make_candles']
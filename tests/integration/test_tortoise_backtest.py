@@ -320,3 +320,36 @@ class TestTortoiseBacktest:
                 avg_loss = sum(t['pnl'] for t in losers) / len(losers)
                 print(f"   Avg Loss: ${avg_loss:.2f}")
 
+    
+    @pytest.mark.parametrize('dataset', ['btc_data', 'eth_data'])
+    def test_vectorized_matches_bar_by_bar(self, dataset, request):
+        """
+        Тест: vectorized сигналы (generate_signals) дают те же сделки
+        что и bar-by-bar on_bar на реальных данных.
+        """
+        from core.strategy.tortoise import TortoiseStrategy
+        from core.backtest.engine import BacktestEngine
+        
+        data = request.getfixturevalue(dataset)
+        market = 'BTC-PERP' if dataset == 'btc_data' else 'ETH-PERP'
+        
+        results = {}
+        for vectorized in (True, False):
+            strategy = TortoiseStrategy({
+                'don_break': 20,
+                'don_exit': 10,
+                'trail_atr_len': 20,
+                'markets': [market]
+            })
+            engine = BacktestEngine(
+                strategy=strategy,
+                initial_capital=10000.0,
+                risk_per_trade=1.0,
+                vectorized=vectorized
+            )
+            results[vectorized] = engine.run_backtest(market, data)
+        
+        print(f"\n🔁 Parity {market}: {len(results[True]['trades'])} сделок")
+        
+        assert results[True]['trades'] == results[False]['trades']
+        assert results[True]['equity_curve'] == results[False]['equity_curve']
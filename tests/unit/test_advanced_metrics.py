@@ -269,3 +269,178 @@ class TestAdvancedMetricsCalculator:
         # (нет downside risk)
         assert var_95 >= 0
 
+
+
+class TestVectorizedRollingMetrics:
+    """Rolling метрики за O(n) vs расчет по каждому окну."""
+    
+    @pytest.fixture
+    def long_returns(self):
+        """Returns с постоянным участком (нулевая std в окне)."""
+        rng = np.random.default_rng(0)
+        returns = rng.normal(0.05, 1.0, 1500)
+        returns[200:260] = 0.4
+        return returns
+    
+    def test_rolling_sharpe_matches_window_loop(self, long_returns):
+        """Тест: cumsum rolling Sharpe совпадает с mean/std каждого окна."""
+        from core.research.advanced_metrics import AdvancedMetricsCalculator
+        
+        window = 30
+        expected = []
+        for i in range(len(long_returns) - window + 1):
+            window_returns = long_returns[i:i + window]
+            std = np.std(window_returns, ddof=1)
+            expected.append(np.mean(window_returns) / std if std > 1e-12 else 0.0)
+        
+        rolling = AdvancedMetricsCalculator().rolling_sharpe(long_returns.tolist(), window=window)
+        
+        np.testing.assert_allclose(rolling, expected, rtol=1e-9, atol=1e-9)
+        assert np.all(rolling[200:231] == 0.0)
+    
+    def test_rolling_sortino_matches_sortino_ratio(self, long_returns):
+        """Тест: каждое значение rolling Sortino = sortino_ratio окна."""
+        from core.research.advanced_metrics import AdvancedMetricsCalculator
+        
+        calculator = AdvancedMetricsCalculator()
+        window = 20
+        
+        expected = [
+            calculator.sortino_ratio(long_returns[i:i + window])
+            for i in range(len(long_returns) - window + 1)
+        ]
+        rolling = calculator.rolling_sortino(long_returns, window=window)
+        
+        np.testing.assert_allclose(rolling, expected, rtol=1e-9)
+
+    def test_mixed_volatility_matches_window_loop(self):
+        """Тест: спокойные окна рядом с волатильными не теряют точность."""
+        from core.research.advanced_metrics import AdvancedMetricsCalculator
+
+        calculator = AdvancedMetricsCalculator()
+        rng = np.random.default_rng(2)
+        calm = 0.01 + rng.normal(0, 0.0007, 1000)
+        returns = np.concatenate([
+            rng.normal(0, 5.0, 1000),
+            calm,
+            rng.normal(0, 500.0, 1000),
+            calm
+        ])
+        window = 30
+
+        expected_sharpe = []
+        expected_sortino = []
+        for i in range(len(returns) - window + 1):
+            window_returns = returns[i:i + window]
+            expected_sharpe.append(np.mean(window_returns) / np.std(window_returns, ddof=1))
+            expected_sortino.append(calculator.sortino_ratio(window_returns))
+
+        rolling_sharpe = calculator.rolling_sharpe(returns, window=window)
+        rolling_sortino = calculator.rolling_sortino(returns, window=window)
+
+        np.testing.assert_allclose(rolling_sharpe, expected_sharpe, rtol=1e-9)
+        np.testing.assert_allclose(rolling_sortino, expected_sortino, rtol=1e-9)
+        # Спокойные окна: Sharpe ~ 14, не обнулен
+        assert np.all(rolling_sharpe[1000:1971] > 5)
+
+    @pytest.mark.parametrize('window', [1, 2, 7, 64])
+    def test_rolling_max_drawdown_matches_window_max_drawdown(self, window):
+        """Тест: каждое значение = max_drawdown своего окна."""
+        from core.research.advanced_metrics import AdvancedMetricsCalculator
+        
+        calculator = AdvancedMetricsCalculator()
+        rng = np.random.default_rng(1)
+        equity = 10000 + np.cumsum(rng.normal(0, 25, 700))
+        
+        expected = [
+            calculator.max_drawdown(list(equity[i:i + window]))
+            for i in range(len(equity) - window + 1)
+        ]
+        rolling = calculator.rolling_max_drawdown(equity, window=window)
+        
+        np.testing.assert_array_equal(rolling, expected)
+        assert np.all(rolling <= 0)
+    
+    def test_rolling_max_drawdown_inside_window(self):
+        """Тест: просадка внутри окна, даже если окно закончилось на пике."""
+        from core.research.advanced_metrics import AdvancedMetricsCalculator
+        
+        rolling = AdvancedMetricsCalculator().rolling_max_drawdown([100, 50, 100, 120, 60], window=3)
+        
+        np.testing.assert_array_equal(rolling, [-50.0, 0.0, -50.0])
+    
+    def test_array_inputs_match_list_inputs(self, long_returns):
+        """Тест: numpy массивы и списки дают одинаковые метрики."""
+        from core.research.advanced_metrics import AdvancedMetricsCalculator
+        
+        calculator = AdvancedMetricsCalculator()
+        equity = 10000 + np.cumsum(long_returns * 10)
+        
+        from_arrays = calculator.calculate_all(equity, long_returns)
+        from_lists = calculator.calculate_all(equity.tolist(), long_returns.tolist())
+        
+        assert from_arrays == pytest.approx(from_lists)
+    
+    def test_cvar_is_mean_of_tail(self, long_returns):
+        """Тест: CVaR = среднее returns не лучше VaR (np.percentile linear)."""
+        from core.research.advanced_metrics import AdvancedMetricsCalculator
+        
+        calculator = AdvancedMetricsCalculator()
+        
+        var = np.percentile(long_returns, (1 - 0.95) * 100)
+        cvar = calculator.conditional_var(long_returns, confidence=0.95)
+        
+        assert calculator.value_at_risk(long_returns, confidence=0.95) == var
+        assert cvar == pytest.approx(long_returns[long_returns <= var].mean())
+
+
+class TestBatchMetrics:
+    """calculate_batch: метрики многих curves одним вызовом."""
+    
+    @pytest.fixture
+    def curves(self):
+        """Матрицы returns и equity, включая граничные случаи."""
+        rng = np.random.default_rng(5)
+        returns = rng.normal(0.1, 1.0, (50, 40))
+        returns[1] = np.abs(returns[1])  # нет downside
+        returns[2] = -1.0                # постоянный downside
+        returns[3] = 0.0                 # flat
+        
+        growth = np.concatenate([np.zeros((50, 1)), returns / 100], axis=1)
+        equity = 10000 * np.cumprod(1 + growth, axis=1)
+        
+        return equity, returns
+    
+    def test_matches_calculate_all_per_curve(self, curves):
+        """Тест: каждая строка таблицы = calculate_all этой curve."""
+        from core.research.advanced_metrics import AdvancedMetricsCalculator
+        
+        equity, returns = curves
+        calculator = AdvancedMetricsCalculator()
+        
+        table = calculator.calculate_batch(equity, returns)
+        
+        assert len(table) == len(equity)
+        for i in range(len(equity)):
+            expected = calculator.calculate_all(equity[i], returns[i])
+            
+            assert list(table.columns) == list(expected)
+            assert table.iloc[i].to_dict() == pytest.approx(expected, rel=1e-12, abs=1e-12)
+    
+    def test_table_can_be_sorted_and_filtered(self, curves):
+        """Тест: результат - таблица для sort/filter без циклов."""
+        from core.research.advanced_metrics import AdvancedMetricsCalculator
+        
+        equity, returns = curves
+        table = AdvancedMetricsCalculator().calculate_batch(equity, returns)
+        
+        best = table.sort_values('sharpe_ratio', ascending=False)
+        assert best['sharpe_ratio'].is_monotonic_decreasing
+        assert (table[table['max_drawdown'] > -1.0]['max_drawdown'] <= 0).all()
+    
+    def test_mismatched_rows_raise(self):
+        """Тест: разное количество строк equity и returns -> ValueError."""
+        from core.research.advanced_metrics import AdvancedMetricsCalculator
+        
+        with pytest.raises(ValueError):
+            AdvancedMetricsCalculator().calculate_batch(np.ones((3, 5)), np.ones((2, 4)))
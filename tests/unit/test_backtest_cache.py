@@ -0,0 +1,250 @@
+"""
+Unit tests для BacktestCache.
+
+Тестируем:
+- Ключ: зависит от params / настроек / содержимого данных, не от индекса
+- LRU в памяти и дисковый уровень с вытеснением по размеру
+- BacktestEngine / TortoiseSweep / ParameterOptimizer с кэшем
+- Обновление данных инвалидирует только затронутые окна
+"""
+
+import os
+import pytest
+
+from tests.conftest import make_candles
+
+
+@pytest.fixture
+def candles():
+    """Свечи для тестов."""
+    return make_candles(300, seed=2)
+
+
+class TestCacheKey:
+    """Тесты для BacktestCache.make_key."""
+
+    def test_key_depends_on_params_settings_and_data(self, candles):
+        """Тест: любое изменение входов дает другой ключ."""
+        from core.backtest.cache import BacktestCache
+        from core.strategy.tortoise import TortoiseStrategy
+
+        strategy = TortoiseStrategy({'don_break': 20})
+        key = BacktestCache.make_key(strategy, candles, {'fee_rate': 0.0005})
+
+        assert key == BacktestCache.make_key(TortoiseStrategy({'don_break': 20}), candles, {'fee_rate': 0.0005})
+        assert key != BacktestCache.make_key(TortoiseStrategy({'don_break': 30}), candles, {'fee_rate': 0.0005})
+        assert key != BacktestCache.make_key(strategy, candles, {'fee_rate': 0.001})
+
+        changed = candles.copy()
+        changed.loc[150, 'close'] += 1e-9
+        assert key != BacktestCache.make_key(strategy, changed, {'fee_rate': 0.0005})
+
+    def test_key_ignores_index(self, candles):
+        """Тест: окно iloc и тот же кусок с новым индексом - один ключ."""
+        from core.backtest.cache import data_fingerprint
+
+        window = candles.iloc[100:200]
+
+        assert data_fingerprint(window) == data_fingerprint(window.reset_index(drop=True))
+        assert data_fingerprint(window) != data_fingerprint(candles.iloc[100:201])
+
+
+class TestCacheTiers:
+    """Тесты для уровней памяти и диска."""
+
+    def test_memory_lru_eviction(self):
+        """Тест: в памяти остаются последние использованные записи."""
+        from core.backtest.cache import BacktestCache
+
+        cache = BacktestCache(max_memory_items=2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        cache.get('a')
+        cache.put('c', 3)
+
+        assert cache.get('a') == 1
+        assert cache.get('b') is None
+        assert cache.get('c') == 3
+
+    def test_get_returns_independent_copy(self):
+        """Тест: изменение результата не портит кэш."""
+        from core.backtest.cache import BacktestCache
+
+        cache = BacktestCache()
+        cache.put('key', {'trades': [1, 2]})
+
+        cache.get('key')['trades'].append(3)
+
+        assert cache.get('key') == {'trades': [1, 2]}
+
+    def test_disk_tier_shared_between_instances(self, tmp_path):
+        """Тест: новый экземпляр (другой процесс) читает записи с диска."""
+        from core.backtest.cache import BacktestCache
+
+        BacktestCache(directory=str(tmp_path)).put('key', {'value': 42})
+
+        cache = BacktestCache(directory=str(tmp_path))
+
+        assert cache.get('key') == {'value': 42}
+        assert cache.stats()['hits'] == 1
+
+    def test_disk_size_eviction_removes_oldest(self, tmp_path):
+        """Тест: при превышении max_disk_bytes удаляются самые старые файлы."""
+        from core.backtest.cache import BacktestCache
+
+        cache = BacktestCache(directory=str(tmp_path), max_disk_bytes=2500)
+
+        for i, key in enumerate(['a', 'b', 'c']):
+            cache.put(key, b'x' * 1000)
+            # mtime по порядку записи (разрешение mtime бывает грубым)
+            os.utime(tmp_path / f"{key}.pkl", (i, i))
+
+        cache.put('d', b'x' * 1000)
+
+        assert sorted(os.listdir(tmp_path)) == ['c.pkl', 'd.pkl']
+        assert cache.stats()['disk_bytes'] <= 2500
+
+    def test_put_does_not_rescan_directory(self, tmp_path, monkeypatch):
+        """
+        Тест: put не сканирует директорию пока бюджет не превышен - стоимость
+        put не растет с числом записей, вытеснение идет до low-water mark.
+        """
+        import pickle
+        from core.backtest import cache as cache_module
+        from core.backtest.cache import BacktestCache, DISK_LOW_WATER
+
+        cache = BacktestCache(directory=str(tmp_path), max_disk_bytes=100_000)
+
+        scans = []
+        original_scandir = os.scandir
+        monkeypatch.setattr(cache_module.os, 'scandir', lambda path: scans.append(path) or original_scandir(path))
+
+        for i in range(200):
+            cache.put(f"key{i}", b'x' * 100)
+
+        assert scans == []
+        assert cache._disk_bytes == sum(entry.stat().st_size for entry in original_scandir(tmp_path))
+
+        # Превышение бюджета: скан на каждое вытеснение, а вытеснение
+        # освобождает (1 - DISK_LOW_WATER) бюджета - сканов не больше чем
+        # записанных байт / освобождаемый объем
+        for i in range(1000):
+            cache.put(f"big{i}", b'x' * 1000)
+
+        written = 1000 * len(pickle.dumps(b'x' * 1000, protocol=pickle.HIGHEST_PROTOCOL))
+
+        disk_bytes = sum(entry.stat().st_size for entry in original_scandir(tmp_path))
+        assert 0 < len(scans) <= written / ((1 - DISK_LOW_WATER) * 100_000) + 1
+        assert disk_bytes <= 100_000
+        assert cache._disk_bytes == disk_bytes
+
+        # Новый экземпляр считает размер с диска
+        assert BacktestCache(directory=str(tmp_path))._disk_bytes == disk_bytes
+
+
+class TestCachedBacktests:
+    """BacktestEngine / TortoiseSweep / optimizer с кэшем."""
+
+    def test_engine_second_run_from_cache(self, candles):
+        """Тест: повторный backtest возвращает тот же результат из кэша."""
+        from core.backtest.cache import BacktestCache
+        from core.backtest.engine import BacktestEngine
+        from core.strategy.tortoise import TortoiseStrategy
+
+        cache = BacktestCache()
+        params = {'don_break': 10, 'don_exit': 5}
+
+        first = BacktestEngine(TortoiseStrategy(dict(params)), cache=cache).run_backtest('TEST-PERP', candles)
+        engine = BacktestEngine(TortoiseStrategy(dict(params)), cache=cache)
+        second = engine.run_backtest('TEST-PERP', candles)
+
+        assert second == first
+        assert cache.hits == 1
+        assert engine.equity == first['metrics']['final_equity']
+
+        # Другие настройки engine - другой результат, не из кэша
+        BacktestEngine(TortoiseStrategy(dict(params)), risk_per_trade=2.0, cache=cache).run_backtest(
+            'TEST-PERP', candles
+        )
+        assert cache.hits == 1
+
+    def test_mock_strategy_not_cached(self, candles):
+        """Тест: Mock стратегии (не IStrategy) идут мимо кэша."""
+        from unittest.mock import Mock
+        from core.backtest.cache import BacktestCache
+        from core.backtest.engine import BacktestEngine
+
+        strategy = Mock()
+        strategy.on_bar.return_value = []
+        cache = BacktestCache()
+
+        BacktestEngine(strategy, vectorized=False, cache=cache).run_backtest('TEST-PERP', candles.iloc[:20])
+
+        assert cache.stats()['memory_items'] == 0
+
+    def test_sweep_runs_only_missing_combinations(self, candles):
+        """Тест: sweep берет из кэша готовые комбинации, результат тот же."""
+        from core.backtest.cache import BacktestCache
+        from core.backtest.sweep import TortoiseSweep
+
+        cache = BacktestCache()
+        sweep = TortoiseSweep(cache=cache)
+
+        first = sweep.run(candles, [{'don_break': 10}, {'don_break': 20}])
+        second = sweep.run(candles, [{'don_break': 20}, {'don_break': 30}])
+
+        assert second[0] == first[1]
+        assert second[1] == TortoiseSweep().run(candles, [{'don_break': 30}])[0]
+        assert cache.hits == 1
+
+    def test_data_update_invalidates_only_affected_windows(self):
+        """Тест: новые свечи в конце - старые WF окна остаются в кэше."""
+        from core.backtest.cache import BacktestCache
+        from core.research.walk_forward import WalkForwardSplitter, WalkForwardAnalyzer
+        from core.strategy.tortoise import TortoiseStrategy
+
+        data = make_candles(400, seed=4)
+        cache = BacktestCache()
+        splitter = WalkForwardSplitter(train_days=150, test_days=50, step_days=50)
+
+        def run(candles):
+            analyzer = WalkForwardAnalyzer(TortoiseStrategy({'don_break': 10}), cache=cache)
+            return analyzer.run_analysis('TEST-PERP', candles, splitter)
+
+        run(data.iloc[:350])
+        misses_before = cache.misses
+
+        updated = run(data)
+
+        # 4 окна на старых данных из кэша, новый split (train + test) посчитан
+        assert cache.hits == 8
+        assert cache.misses - misses_before == 2
+        assert updated == WalkForwardAnalyzer(TortoiseStrategy({'don_break': 10})).run_analysis(
+            'TEST-PERP', data, splitter
+        )
+
+    def test_optimizer_rerun_uses_cache(self, candles):
+        """Тест: повторный optimize с кэшем дает те же результаты."""
+        from core.backtest.cache import BacktestCache
+        from core.research.parameter_optimizer import ParameterOptimizer
+        from core.strategy.tortoise import TortoiseStrategy
+
+        kwargs = dict(
+            strategy_class=TortoiseStrategy,
+            market='TEST-PERP',
+            data=candles,
+            param_grid={'don_break': [10, 20]},
+            wf_train_days=100,
+            wf_test_days=50,
+            wf_step_days=50
+        )
+
+        cache = BacktestCache()
+        optimizer = ParameterOptimizer(cache=cache)
+
+        first = optimizer.optimize(**kwargs)
+        second = optimizer.optimize(**kwargs)
+
+        assert second['all_results'] == first['all_results']
+        assert second['all_results'] == ParameterOptimizer().optimize(**kwargs)['all_results']
+        assert cache.hits > 0
@@ -245,3 +245,91 @@ class TestBacktestEngine:
         # Должен начинаться с initial_capital
         assert results['equity_curve'][0] == engine.initial_capital
 
+    
+    def test_history_is_growing_prefix_by_default(self, engine, sample_history, mock_strategy):
+        """
+        Тест: без lookback стратегия получает всю историю до текущего бара.
+        """
+        lengths = []
+        
+        def on_bar_mock(ctx, history):
+            lengths.append(len(history))
+            return []
+        
+        mock_strategy.on_bar.side_effect = on_bar_mock
+        
+        engine.run_backtest('BTC-PERP', sample_history)
+        
+        assert lengths == [1, 2, 3, 4, 5]
+    
+    def test_history_window_bounded_by_lookback(self, mock_strategy, sample_history):
+        """
+        Тест: с lookback history не длиннее окна и заканчивается текущим баром.
+        """
+        from core.backtest.engine import BacktestEngine
+        
+        engine = BacktestEngine(strategy=mock_strategy, lookback=2)
+        seen = []
+        
+        def on_bar_mock(ctx, history):
+            seen.append((len(history), history['close'].iloc[-1], ctx.close))
+            return []
+        
+        mock_strategy.on_bar.side_effect = on_bar_mock
+        
+        engine.run_backtest('BTC-PERP', sample_history)
+        
+        assert [length for length, _, _ in seen] == [1, 2, 2, 2, 2]
+        for _, last_close, ctx_close in seen:
+            assert last_close == ctx_close
+    
+    def test_history_is_zero_copy_view(self, engine, sample_history, mock_strategy):
+        """
+        Тест: history - view на исходные данные, а не копия.
+        """
+        import numpy as np
+        
+        source = sample_history['close'].to_numpy()
+        shares = []
+        
+        def on_bar_mock(ctx, history):
+            shares.append(np.shares_memory(history['close'].to_numpy(), source))
+            return []
+        
+        mock_strategy.on_bar.side_effect = on_bar_mock
+        
+        engine.run_backtest('BTC-PERP', sample_history)
+
+        assert all(shares)
+
+    def test_strategy_writes_do_not_touch_source(self, engine, sample_history, mock_strategy):
+        """
+        Тест: запись стратегии в history не меняет исходные данные и следующие бары.
+        """
+        source = sample_history.copy()
+        seen = []
+
+        def on_bar_mock(ctx, history):
+            seen.append(history['close'].iloc[0])
+            history.iloc[0, history.columns.get_loc('close')] = -1.0
+            history['close'] = 0.0
+            return []
+
+        mock_strategy.on_bar.side_effect = on_bar_mock
+
+        engine.run_backtest('BTC-PERP', sample_history)
+
+        pd.testing.assert_frame_equal(sample_history, source)
+        assert seen == [50500.0] * len(source)
+
+    def test_lookback_defaults_to_strategy_required_history(self, sample_history):
+        """
+        Тест: engine берет окно из strategy.required_history().
+        """
+        from core.backtest.engine import BacktestEngine
+        from core.strategy.tortoise import TortoiseStrategy
+        
+        strategy = TortoiseStrategy({'don_break': 3, 'don_exit': 2, 'trail_atr_len': 2})
+        engine = BacktestEngine(strategy=strategy)
+        
+        assert engine._history_window() == 4
@@ -0,0 +1,186 @@
+"""
+Unit tests для CandleCache (кэш свечей API в памяти процесса).
+
+Тестируем:
+- Повторный запрос из памяти, (df, from_cache) на каждый запрос
+- TTL по interval, force_refresh и invalidate
+- LRU вытеснение по бюджету байтов
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def linear_candles(n_bars: int) -> pd.DataFrame:
+    """Свечи для тестов."""
+    close = np.linspace(100.0, 110.0, n_bars)
+
+    return pd.DataFrame({
+        'timestamp': pd.date_range('2024-01-01', periods=n_bars, freq='h'),
+        'open': close,
+        'high': close + 1.0,
+        'low': close - 1.0,
+        'close': close,
+        'volume': np.full(n_bars, 1000.0)
+    })
+
+
+class CountingDataManager:
+    """DataManager для тестов: считает загрузки."""
+
+    def __init__(self, n_bars: int = 100):
+        self.n_bars = n_bars
+        self.calls = []
+        # Как у настоящего DataManager: общий флаг, CandleCache его не читает
+        self.last_from_cache = True
+
+    def get_candles(self, market, interval, days_back, force_refresh=False):
+        self.calls.append((market, interval, days_back, force_refresh))
+        return linear_candles(self.n_bars)
+
+
+class FakeClock:
+    """Управляемое время для TTL."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestCandleCache:
+    """Тесты для CandleCache."""
+
+    def test_second_request_served_from_memory(self):
+        """Тест: повторный запрос не идет в DataManager, данные те же."""
+        from apps.api.candle_cache import CandleCache
+
+        cache = CandleCache()
+        manager = CountingDataManager()
+
+        first, first_from_cache = cache.get_candles(manager, 'BTC-PERP', '1h', 7)
+        second, second_from_cache = cache.get_candles(manager, 'BTC-PERP', '1h', 7)
+
+        assert len(manager.calls) == 1
+        assert first_from_cache is False
+        assert second_from_cache is True
+        pd.testing.assert_frame_equal(first, second)
+        assert cache.stats()['hits'] == 1
+        assert cache.stats()['misses'] == 1
+
+    def test_get_returns_frame_and_flag(self):
+        """Тест: get возвращает (df, from_cache) без состояния между вызовами."""
+        from apps.api.candle_cache import CandleCache
+
+        cache = CandleCache()
+        key = ('BTC-PERP', '1h', 7)
+
+        assert cache.get(key) == (None, False)
+
+        cache.put(key, linear_candles(10))
+        df, from_cache = cache.get(key)
+
+        assert from_cache is True
+        pd.testing.assert_frame_equal(df, linear_candles(10))
+        assert cache.get(('ETH-PERP', '1h', 7)) == (None, False)
+
+    def test_returned_frame_is_independent_copy(self):
+        """Тест: изменение результата не портит кэш."""
+        from apps.api.candle_cache import CandleCache
+
+        cache = CandleCache()
+        manager = CountingDataManager()
+
+        df, _ = cache.get_candles(manager, 'BTC-PERP', '1h', 7)
+        df.loc[0, 'close'] = -1.0
+
+        cached, _ = cache.get_candles(manager, 'BTC-PERP', '1h', 7)
+        assert cached.loc[0, 'close'] == 100.0
+
+    def test_key_includes_interval_and_range(self):
+        """Тест: другой interval / days_back - отдельная запись."""
+        from apps.api.candle_cache import CandleCache
+
+        cache = CandleCache()
+        manager = CountingDataManager()
+
+        cache.get_candles(manager, 'BTC-PERP', '1h', 7)
+        cache.get_candles(manager, 'BTC-PERP', '1h', 30)
+        cache.get_candles(manager, 'BTC-PERP', '1d', 7)
+        cache.get_candles(manager, 'ETH-PERP', '1h', 7)
+
+        assert len(manager.calls) == 4
+        assert cache.stats()['items'] == 4
+
+    def test_ttl_depends_on_interval(self):
+        """Тест: 1m устаревает через десятки секунд, 1d - нет."""
+        from apps.api.candle_cache import CandleCache
+
+        clock = FakeClock()
+        cache = CandleCache(clock=clock)
+        manager = CountingDataManager()
+
+        cache.get_candles(manager, 'BTC-PERP', '1m', 1)
+        cache.get_candles(manager, 'BTC-PERP', '1d', 365)
+
+        clock.now = 120.0
+        cache.get_candles(manager, 'BTC-PERP', '1m', 1)
+        _, from_cache = cache.get_candles(manager, 'BTC-PERP', '1d', 365)
+
+        assert [call[1] for call in manager.calls] == ['1m', '1d', '1m']
+        assert from_cache is True
+
+    def test_force_refresh_and_invalidate(self):
+        """Тест: force_refresh идет мимо кэша, invalidate удаляет записи рынка."""
+        from apps.api.candle_cache import CandleCache
+
+        cache = CandleCache()
+        manager = CountingDataManager()
+
+        cache.get_candles(manager, 'BTC-PERP', '1h', 7)
+        _, from_cache = cache.get_candles(manager, 'BTC-PERP', '1h', 7, force_refresh=True)
+
+        assert from_cache is False
+        assert manager.calls[-1][3] is True
+
+        cache.get_candles(manager, 'ETH-PERP', '1h', 7)
+        cache.invalidate(market='BTC-PERP')
+
+        cache.get_candles(manager, 'BTC-PERP', '1h', 7)
+        cache.get_candles(manager, 'ETH-PERP', '1h', 7)
+
+        assert [call[0] for call in manager.calls] == ['BTC-PERP', 'BTC-PERP', 'ETH-PERP', 'BTC-PERP']
+
+    def test_lru_eviction_by_bytes(self):
+        """Тест: при превышении max_bytes вытесняется самая давно использованная запись."""
+        from apps.api.candle_cache import CandleCache
+
+        frame_bytes = int(linear_candles(100).memory_usage(index=True, deep=True).sum())
+        cache = CandleCache(max_bytes=frame_bytes * 2)
+        manager = CountingDataManager()
+
+        cache.get_candles(manager, 'A', '1h', 7)
+        cache.get_candles(manager, 'B', '1h', 7)
+        cache.get_candles(manager, 'A', '1h', 7)
+        cache.get_candles(manager, 'C', '1h', 7)
+
+        assert cache.stats()['items'] == 2
+        assert cache.stats()['bytes'] <= frame_bytes * 2
+
+        cache.get_candles(manager, 'A', '1h', 7)
+        cache.get_candles(manager, 'B', '1h', 7)
+
+        assert [call[0] for call in manager.calls] == ['A', 'B', 'C', 'B']
+
+    def test_empty_result_not_cached(self):
+        """Тест: пустой ответ не кэшируется."""
+        from apps.api.candle_cache import CandleCache
+
+        cache = CandleCache()
+        manager = CountingDataManager(n_bars=0)
+
+        cache.get_candles(manager, 'BTC-PERP', '1h', 7)
+        cache.get_candles(manager, 'BTC-PERP', '1h', 7)
+
+        assert len(manager.calls) == 2
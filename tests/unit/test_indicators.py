@@ -0,0 +1,170 @@
+"""
+Unit tests для инкрементальных индикаторов.
+
+Тестируем:
+- Parity RollingMax/RollingMin/RollingMean/ATR с pandas rolling
+- Bounded state (окно не растет)
+- Инкрементальный on_bar TortoiseStrategy vs pandas индикаторы
+"""
+
+import pytest
+import numpy as np
+
+from tests.conftest import make_candles
+
+
+@pytest.fixture
+def sample_candles():
+    """Синтетические свечи (random walk)."""
+    return make_candles(500, seed=7, freq='h')
+
+
+class TestIncrementalIndicators:
+    """Parity инкрементальных индикаторов с pandas."""
+
+    @pytest.mark.parametrize('period', [1, 5, 20, 55])
+    def test_rolling_max_min_match_pandas(self, sample_candles, period):
+        """Тест: RollingMax/RollingMin совпадают с rolling().max()/min() точно."""
+        from core.strategy.indicators import RollingMax, RollingMin
+
+        rolling_max = RollingMax(period)
+        rolling_min = RollingMin(period)
+
+        maxes = [rolling_max.update(v) for v in sample_candles['high'].tolist()]
+        mins = [rolling_min.update(v) for v in sample_candles['low'].tolist()]
+
+        expected_max = sample_candles['high'].rolling(window=period).max().to_numpy()
+        expected_min = sample_candles['low'].rolling(window=period).min().to_numpy()
+
+        np.testing.assert_array_equal(np.array(maxes), expected_max)
+        np.testing.assert_array_equal(np.array(mins), expected_min)
+
+    @pytest.mark.parametrize('period', [1, 14, 20])
+    def test_rolling_mean_matches_pandas(self, sample_candles, period):
+        """Тест: RollingMean совпадает с rolling().mean()."""
+        from core.strategy.indicators import RollingMean
+
+        rolling_mean = RollingMean(period)
+        means = [rolling_mean.update(v) for v in sample_candles['close'].tolist()]
+
+        expected = sample_candles['close'].rolling(window=period).mean().to_numpy()
+
+        np.testing.assert_allclose(np.array(means), expected, rtol=1e-12, equal_nan=True)
+
+    @pytest.mark.parametrize('period', [14, 20])
+    def test_atr_matches_tortoise_pandas_atr(self, sample_candles, period):
+        """Тест: AverageTrueRange совпадает с TortoiseStrategy._calculate_atr."""
+        from core.strategy.indicators import AverageTrueRange
+        from core.strategy.tortoise import TortoiseStrategy
+
+        atr = AverageTrueRange(period)
+        values = [
+            atr.update(h, l, c)
+            for h, l, c in zip(
+                sample_candles['high'].tolist(),
+                sample_candles['low'].tolist(),
+                sample_candles['close'].tolist()
+            )
+        ]
+
+        expected = TortoiseStrategy({})._calculate_atr(sample_candles, period).to_numpy()
+
+        np.testing.assert_allclose(np.array(values), expected, rtol=1e-12, equal_nan=True)
+
+    def test_state_is_bounded_by_window(self, sample_candles):
+        """Тест: индикаторы хранят не больше period значений."""
+        from core.strategy.indicators import RollingMax, RollingMean
+
+        rolling_max = RollingMax(10)
+        rolling_mean = RollingMean(10)
+
+        for value in sample_candles['close'].tolist():
+            rolling_max.update(value)
+            rolling_mean.update(value)
+            assert len(rolling_max._window) <= 10
+            assert len(rolling_mean._window) <= 10
+
+    def test_invalid_period_raises(self):
+        """Тест: period < 1 вызывает ValueError."""
+        from core.strategy.indicators import RollingMax, RollingMean
+
+        with pytest.raises(ValueError):
+            RollingMax(0)
+        with pytest.raises(ValueError):
+            RollingMean(0)
+
+
+class TestTortoiseIncrementalOnBar:
+    """Инкрементальный on_bar TortoiseStrategy vs pandas индикаторы."""
+
+    def _ctx(self, row, market='TEST-PERP'):
+        from core.strategy.base import BarContext
+
+        return BarContext(
+            timestamp=int(row['timestamp'].timestamp() * 1000),
+            market=market,
+            open=row['open'],
+            high=row['high'],
+            low=row['low'],
+            close=row['close'],
+            volume=row['volume']
+        )
+
+    def test_on_bar_channels_match_pandas(self, sample_candles):
+        """
+        Тест: каналы в metadata сигналов совпадают с pandas rolling.
+
+        on_bar вызывается последовательно (инкрементальный путь).
+        """
+        from core.strategy.tortoise import TortoiseStrategy
+
+        strategy = TortoiseStrategy({'don_break': 20, 'don_exit': 10, 'trail_atr_len': 20})
+
+        upper, lower = strategy._calculate_donchian(sample_candles, 20)
+        atr = strategy._calculate_atr(sample_candles, 20)
+
+        checked = 0
+        for i in range(len(sample_candles)):
+            history = sample_candles.iloc[:i + 1]
+            signals = strategy.on_bar(self._ctx(sample_candles.iloc[i]), history)
+
+            for signal in signals:
+                if signal.metadata.get('reason', '').startswith('donchian_breakout'):
+                    assert signal.metadata['don_upper'] == upper.iloc[i - 1]
+                    assert signal.metadata['don_lower'] == lower.iloc[i - 1]
+                    assert signal.metadata['atr'] == pytest.approx(atr.iloc[i], rel=1e-12)
+                    checked += 1
+
+        assert checked > 0
+
+    def test_on_bar_out_of_order_calls_rebuild_state(self, sample_candles):
+        """
+        Тест: непоследовательные вызовы (API, другой кусок данных)
+        дают тот же результат что и свежая стратегия.
+        """
+        from core.strategy.tortoise import TortoiseStrategy
+
+        params = {'don_break': 10, 'don_exit': 5, 'trail_atr_len': 10}
+        reused = TortoiseStrategy(params)
+
+        for i in [400, 120, 121, 350, 30, 31, 32, 499]:
+            history = sample_candles.iloc[:i + 1]
+            ctx = self._ctx(sample_candles.iloc[i])
+
+            fresh_signals = TortoiseStrategy(params).on_bar(ctx, history)
+            reused_signals = reused.on_bar(ctx, history)
+
+            assert [(s.side, s.entry, s.stop) for s in reused_signals] == \
+                [(s.side, s.entry, s.stop) for s in fresh_signals]
+
+    def test_on_bar_without_timestamp_column(self, sample_candles):
+        """Тест: history без timestamp (API) работает через пересчет окна."""
+        from core.strategy.tortoise import TortoiseStrategy
+
+        strategy = TortoiseStrategy({'don_break': 10, 'don_exit': 5, 'trail_atr_len': 10})
+        history = sample_candles.drop(columns=['timestamp']).iloc[:200]
+
+        ctx = self._ctx(sample_candles.iloc[199])
+        signals = strategy.on_bar(ctx, history)
+
+        assert isinstance(signals, list)
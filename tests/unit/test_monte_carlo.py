@@ -281,3 +281,513 @@ class TestMonteCarloSimulator:
         # Вероятность прибыли должна быть 1.0
         assert results['stats']['prob_profit'] == 1.0
 
+
+
+class TestVectorizedMonteCarlo:
+    """Тесты для matrix (vectorized) движка MonteCarloSimulator."""
+    
+    @pytest.fixture
+    def random_trades(self):
+        """50 сделок со случайным PnL."""
+        rng = np.random.default_rng(0)
+        return [{'pnl': float(pnl)} for pnl in rng.normal(5.0, 100.0, 50)]
+    
+    def test_equity_curves_match_sequential_sum(self, random_trades):
+        """
+        Тест: каждая equity curve = последовательная сумма своей permutation.
+        """
+        from core.research.monte_carlo import MonteCarloSimulator
+        
+        simulator = MonteCarloSimulator(n_simulations=20, seed=1)
+        results = simulator.run_simulation(random_trades)
+        
+        original = sorted(t['pnl'] for t in random_trades)
+        
+        for sim in results['simulations']:
+            assert sorted(sim['shuffled_pnl']) == original
+            
+            equity = simulator.initial_capital
+            expected_curve = [equity]
+            for pnl in sim['shuffled_pnl']:
+                equity += pnl
+                expected_curve.append(equity)
+            
+            assert sim['equity_curve'] == expected_curve
+            assert sim['final_equity'] == expected_curve[-1]
+    
+    def test_same_seed_same_results(self, random_trades):
+        """Тест: одинаковый seed -> одинаковые симуляции."""
+        from core.research.monte_carlo import MonteCarloSimulator
+        
+        first = MonteCarloSimulator(n_simulations=50, seed=7).run_simulation(random_trades)
+        second = MonteCarloSimulator(n_simulations=50, seed=7).run_simulation(random_trades)
+        other = MonteCarloSimulator(n_simulations=50, seed=8).run_simulation(random_trades)
+        
+        assert first == second
+        assert first['percentiles'] != other['percentiles']
+    
+    def test_percentiles_match_stacked_curves(self, random_trades):
+        """Тест: percentiles = np.percentile по всем equity curves."""
+        from core.research.monte_carlo import MonteCarloSimulator
+        
+        results = MonteCarloSimulator(n_simulations=200, seed=3).run_simulation(random_trades)
+        
+        equity_matrix = np.array([sim['equity_curve'] for sim in results['simulations']])
+        
+        for name, q in (('p5', 5), ('p50', 50), ('p95', 95)):
+            expected = np.percentile(equity_matrix, q, axis=0)
+            np.testing.assert_allclose(results['percentiles'][name], expected, rtol=1e-12)
+
+    def test_percentiles_chunked_by_steps(self):
+        """Тест: percentiles по кускам шагов = np.percentile по всей матрице, матрица не меняется."""
+        from core.research.monte_carlo import MonteCarloSimulator
+
+        rng = np.random.default_rng(4)
+        equity_matrix = 10000 + np.cumsum(rng.normal(0, 50, (300, 41)), axis=1)
+        original = equity_matrix.copy()
+
+        simulator = MonteCarloSimulator()
+        # 1000 значений -> куски по 3 шага, последний неполный
+        simulator.PERCENTILE_CHUNK_VALUES = 1000
+        percentiles = simulator._calculate_percentiles(equity_matrix)
+
+        for name, q in (('p5', 5), ('p25', 25), ('p50', 50), ('p75', 75), ('p95', 95)):
+            np.testing.assert_array_equal(percentiles[name], np.percentile(original, q, axis=0))
+        np.testing.assert_array_equal(equity_matrix, original)
+
+    def test_without_simulations_list(self, random_trades):
+        """
+        Тест: return_simulations=False - те же percentiles/stats без списка симуляций.
+        """
+        from core.research.monte_carlo import MonteCarloSimulator
+        
+        full = MonteCarloSimulator(n_simulations=100, seed=5).run_simulation(random_trades)
+        light = MonteCarloSimulator(n_simulations=100, seed=5).run_simulation(
+            random_trades, return_simulations=False
+        )
+        
+        assert light['simulations'] == []
+        assert light['n_simulations'] == 100
+        assert light['percentiles'] == full['percentiles']
+        assert light['stats'] == full['stats']
+
+    def test_risk_stats_opt_in(self, random_trades):
+        """Тест: risk stats путей только при risk_stats=True, остальные stats те же."""
+        from core.research.monte_carlo import MonteCarloSimulator
+
+        plain = MonteCarloSimulator(n_simulations=300, seed=5).run_simulation(random_trades)['stats']
+        with_risk = MonteCarloSimulator(n_simulations=300, seed=5).run_simulation(
+            random_trades, risk_stats=True
+        )['stats']
+
+        assert 'prob_ruin' not in plain and 'worst_max_drawdown' not in plain
+        assert 'prob_ruin' in with_risk and 'worst_max_drawdown' in with_risk
+        assert {key: with_risk[key] for key in plain} == plain
+
+    def test_sketch_percentiles(self, random_trades):
+        """Тест: exact_percentiles=False - гистограммы по блокам, как run_streaming."""
+        from core.research.monte_carlo import MonteCarloSimulator
+
+        kwargs = dict(n_simulations=3000, seed=6, block_size=1000)
+        exact = MonteCarloSimulator(**kwargs).run_simulation(random_trades, return_simulations=False)
+        sketch = MonteCarloSimulator(**kwargs).run_simulation(
+            random_trades, return_simulations=False, exact_percentiles=False
+        )
+        # Пилот run_streaming = блок 0 -> те же бины и те же счетчики
+        streaming = MonteCarloSimulator(**kwargs).run_streaming(random_trades)
+
+        assert sketch['stats'] == exact['stats']
+        assert sketch['percentiles'] == streaming['percentiles']
+        for name in ('p5', 'p50', 'p95'):
+            np.testing.assert_allclose(sketch['percentiles'][name], exact['percentiles'][name], rtol=1e-3)
+
+
+class TestStreamingMonteCarlo:
+    """Тесты для run_streaming и StepQuantileSketch."""
+    
+    @pytest.fixture
+    def random_trades(self):
+        """200 сделок со случайным PnL."""
+        rng = np.random.default_rng(1)
+        return [{'pnl': float(pnl)} for pnl in rng.normal(5.0, 100.0, 200)]
+    
+    def test_sketch_quantiles_close_to_exact(self):
+        """Тест: квантили sketch отличаются от np.percentile не больше ширины бина."""
+        from core.research.monte_carlo import StepQuantileSketch
+        
+        rng = np.random.default_rng(2)
+        matrix = np.cumsum(rng.normal(0, 1, (5000, 30)), axis=1)
+        
+        sketch = StepQuantileSketch(n_bins=1024)
+        for start in range(0, len(matrix), 700):
+            sketch.update(matrix[start:start + 700])
+        
+        approx = sketch.quantiles([5, 50, 95])
+        exact = np.percentile(matrix, [5, 50, 95], axis=0)
+        
+        assert sketch.count == 5000
+        assert np.all(np.abs(approx - exact) <= sketch.width)
+    
+    def test_streaming_matches_full_simulation(self, random_trades):
+        """
+        Тест: тот же seed -> те же пути; точные stats совпадают,
+        percentiles совпадают с точностью sketch.
+        """
+        from core.research.monte_carlo import MonteCarloSimulator
+        
+        full = MonteCarloSimulator(n_simulations=3000, seed=4).run_simulation(random_trades)
+        streaming = MonteCarloSimulator(n_simulations=3000, seed=4).run_streaming(
+            random_trades, chunk_size=512, n_sample_paths=3
+        )
+        
+        for key in ('prob_profit', 'worst_case_return', 'best_case_return'):
+            assert streaming['stats'][key] == full['stats'][key]
+        assert streaming['stats']['mean_return'] == pytest.approx(full['stats']['mean_return'])
+        
+        # Сохраненные пути - первые симуляции
+        assert streaming['simulations'] == full['simulations'][:3]
+        assert streaming['n_simulations'] == 3000
+        
+        spread = np.array(full['percentiles']['p95']) - np.array(full['percentiles']['p5'])
+        for name in ('p5', 'p50', 'p95'):
+            error = np.abs(np.array(streaming['percentiles'][name]) - np.array(full['percentiles'][name]))
+            assert np.all(error <= 0.01 * spread.max())
+    
+    def test_streaming_memory_does_not_grow_with_simulations(self, random_trades):
+        """Тест: без sample paths список simulations пустой при любом n."""
+        from core.research.monte_carlo import MonteCarloSimulator
+        
+        results = MonteCarloSimulator(n_simulations=5000, seed=0).run_streaming(
+            random_trades, chunk_size=1000
+        )
+        
+        assert results['simulations'] == []
+        assert len(results['percentiles']['p50']) == len(random_trades) + 1
+        assert results['percentiles']['p50'][0] == 10000.0
+    
+    def test_streaming_empty_trades(self):
+        """Тест: пустой список сделок обрабатывается как в run_simulation."""
+        from core.research.monte_carlo import MonteCarloSimulator
+        
+        simulator = MonteCarloSimulator(n_simulations=10)
+        
+        assert simulator.run_streaming([]) == simulator.run_simulation([])
+
+
+class TestParallelMonteCarlo:
+    """Seed блоки (SeedSequence.spawn) и run_streaming с n_jobs > 1."""
+    
+    @pytest.fixture
+    def random_trades(self):
+        """Сделки со случайным PnL."""
+        rng = np.random.default_rng(21)
+        return [{'pnl': float(pnl), 'return_pct': 0.0} for pnl in rng.normal(5, 50, 60)]
+    
+    def test_parallel_identical_to_serial(self, random_trades):
+        """Тест: результат бит-в-бит одинаковый при n_jobs=1 и n_jobs=2."""
+        from core.research.monte_carlo import MonteCarloSimulator
+        
+        kwargs = dict(chunk_size=300, n_sample_paths=5)
+        
+        serial = MonteCarloSimulator(n_simulations=4000, seed=8, block_size=1000).run_streaming(
+            random_trades, n_jobs=1, **kwargs
+        )
+        parallel = MonteCarloSimulator(n_simulations=4000, seed=8, block_size=1000).run_streaming(
+            random_trades, n_jobs=2, **kwargs
+        )
+        
+        assert parallel == serial
+
+    def test_parallel_splits_small_run(self, random_trades, monkeypatch):
+        """Тест: n_jobs=2 делит run из 4000 симуляций на 2 задачи, все блоки в пуле."""
+        from concurrent.futures import ThreadPoolExecutor
+        from core.research import monte_carlo
+        from core.research.monte_carlo import MonteCarloSimulator
+
+        submitted = []
+
+        class RecordingExecutor(ThreadPoolExecutor):
+            def map(self, fn, *iterables, **kwargs):
+                tasks = list(iterables[0])
+                submitted.extend(tasks)
+                return super().map(fn, tasks, **kwargs)
+
+        # Потоки вместо процессов - только чтобы посмотреть на задачи
+        monkeypatch.setattr(monte_carlo, 'ProcessPoolExecutor', RecordingExecutor)
+
+        serial = MonteCarloSimulator(n_simulations=4000, seed=4).run_streaming(
+            random_trades, n_sample_paths=3, n_jobs=1
+        )
+        assert submitted == []
+
+        parallel = MonteCarloSimulator(n_simulations=4000, seed=4).run_streaming(
+            random_trades, n_sample_paths=3, n_jobs=2
+        )
+
+        assert [len(task[2]) for task in submitted] == [2, 2]
+        assert parallel == serial
+
+    def test_blocks_match_full_simulation(self, random_trades):
+        """Тест: пути из нескольких блоков те же что в run_simulation."""
+        from core.research.monte_carlo import MonteCarloSimulator
+        
+        full = MonteCarloSimulator(n_simulations=2500, seed=3, block_size=1000).run_simulation(random_trades)
+        streaming = MonteCarloSimulator(n_simulations=2500, seed=3, block_size=1000).run_streaming(
+            random_trades, chunk_size=700, n_sample_paths=2500, n_jobs=2
+        )
+        
+        assert streaming['simulations'] == full['simulations']
+        assert streaming['stats']['worst_case_return'] == full['stats']['worst_case_return']
+        assert streaming['stats']['prob_profit'] == full['stats']['prob_profit']
+    
+    def test_global_random_state_untouched(self, random_trades):
+        """Тест: simulator не трогает глобальные random / np.random."""
+        import random
+        from core.research.monte_carlo import MonteCarloSimulator
+        
+        np_state = np.random.get_state()
+        py_state = random.getstate()
+        
+        simulator = MonteCarloSimulator(n_simulations=200, seed=42)
+        simulator.run_simulation(random_trades)
+        simulator.run_streaming(random_trades)
+        
+        assert random.getstate() == py_state
+        restored = np.random.get_state()
+        assert restored[0] == np_state[0]
+        np.testing.assert_array_equal(restored[1], np_state[1])
+        assert restored[2:] == np_state[2:]
+    
+    def test_repeated_runs_differ_but_reproducible(self, random_trades):
+        """Тест: повторный запуск дает новые пути, та же последовательность для seed."""
+        from core.research.monte_carlo import MonteCarloSimulator
+        
+        first = MonteCarloSimulator(n_simulations=50, seed=5)
+        second = MonteCarloSimulator(n_simulations=50, seed=5)
+        
+        a1, a2 = first.run_simulation(random_trades), first.run_simulation(random_trades)
+        b1, b2 = second.run_simulation(random_trades), second.run_simulation(random_trades)
+        
+        assert a1['simulations'] != a2['simulations']
+        assert a1 == b1
+        assert a2 == b2
+
+
+class TestResamplingMethods:
+    """Режимы bootstrap / block_bootstrap / jitter."""
+    
+    @pytest.fixture
+    def random_trades(self):
+        """Сделки со случайным PnL."""
+        rng = np.random.default_rng(33)
+        return [{'pnl': float(pnl), 'return_pct': 0.0} for pnl in rng.normal(5, 50, 40)]
+    
+    @pytest.mark.parametrize('method', ['bootstrap', 'block_bootstrap', 'jitter'])
+    def test_final_returns_vary(self, random_trades, method):
+        """Тест: в отличие от shuffle финальный equity разный у симуляций."""
+        from core.research.monte_carlo import MonteCarloSimulator
+        
+        results = MonteCarloSimulator(n_simulations=500, seed=1, method=method).run_simulation(random_trades)
+        
+        stats = results['stats']
+        assert stats['worst_case_return'] < stats['median_return'] < stats['best_case_return']
+        
+        # PnL каждой симуляции - сделки из исходного списка (или 0 для jitter)
+        pnl_values = {t['pnl'] for t in random_trades} | {0.0}
+        for simulation in results['simulations'][:20]:
+            assert set(simulation['shuffled_pnl']) <= pnl_values
+    
+    def test_block_bootstrap_keeps_consecutive_trades(self):
+        """Тест: внутри блока сделки идут подряд, средняя длина ~ block_length."""
+        from core.research.monte_carlo import MonteCarloSimulator
+        
+        simulator = MonteCarloSimulator(method='block_bootstrap', block_length=8.0)
+        indices = simulator._stationary_indices(2000, 100, np.random.default_rng(0))
+        
+        assert indices.min() >= 0 and indices.max() < 100
+        
+        continues = (indices[:, 1:] - indices[:, :-1]) % 100 == 1
+        mean_block = 1.0 / (1.0 - continues.mean())
+        assert 7.0 < mean_block < 9.0
+    
+    def test_jitter_trade_counts_in_range(self, random_trades):
+        """Тест: количество сделок пути в [n·(1 - jitter), n·(1 + jitter)]."""
+        from core.research.monte_carlo import MonteCarloSimulator
+        
+        results = MonteCarloSimulator(n_simulations=300, seed=2, method='jitter', jitter=0.25).run_simulation(
+            random_trades
+        )
+        
+        n_steps = len(results['percentiles']['p50']) - 1
+        assert n_steps == 50
+        
+        for simulation in results['simulations']:
+            pnl = np.array(simulation['shuffled_pnl'])
+            n_trades = np.flatnonzero(pnl)[-1] + 1
+            assert n_trades <= 50
+            assert np.all(pnl[n_trades:] == 0)
+            assert simulation['final_equity'] == simulation['equity_curve'][n_trades]
+
+    def test_jitter_risk_ignores_padding(self, random_trades):
+        """Тест: jitter - time under water / streak / drawdown только по сделкам пути."""
+        from core.research.monte_carlo import MonteCarloSimulator
+
+        # Убыточные сделки: пути заканчиваются ниже пика, дополнение нулями
+        # продлило бы time under water
+        trades = [{'pnl': pnl - 20.0, 'return_pct': 0.0} for pnl in (t['pnl'] for t in random_trades)]
+        simulator = MonteCarloSimulator(n_simulations=2000, seed=3, method='jitter', jitter=0.3)
+        pnl = np.array([t['pnl'] for t in trades])
+
+        equity = np.empty((2000, simulator._n_steps(len(pnl)) + 1))
+        counts = simulator._fill_resampled(equity, pnl, np.random.default_rng(0))
+        np.cumsum(equity, axis=1, out=equity)
+
+        risk = simulator._path_risk(equity, counts)
+
+        assert np.all(risk['time_under_water'] <= counts)
+        assert np.all(risk['losing_streak'] <= counts)
+
+        # Совпадает с путями, обрезанными до своих сделок
+        for i in range(0, 2000, 97):
+            truncated = simulator._path_risk(equity[i:i + 1, :counts[i] + 1])
+            for key in ('max_drawdown', 'time_under_water', 'losing_streak'):
+                assert risk[key][i] == truncated[key][0]
+
+    @pytest.mark.parametrize('method', ['bootstrap', 'block_bootstrap'])
+    def test_streaming_matches_full_simulation(self, random_trades, method):
+        """Тест: run_streaming дает те же пути для всех режимов."""
+        from core.research.monte_carlo import MonteCarloSimulator
+        
+        full = MonteCarloSimulator(n_simulations=1500, seed=9, method=method).run_simulation(random_trades)
+        streaming = MonteCarloSimulator(n_simulations=1500, seed=9, method=method).run_streaming(
+            random_trades, chunk_size=400, n_sample_paths=1500
+        )
+        
+        assert streaming['simulations'] == full['simulations']
+    
+    def test_invalid_method_raises(self):
+        """Тест: неизвестный method / неверные параметры -> ValueError."""
+        from core.research.monte_carlo import MonteCarloSimulator
+        
+        with pytest.raises(ValueError):
+            MonteCarloSimulator(method='permute')
+        with pytest.raises(ValueError):
+            MonteCarloSimulator(method='block_bootstrap', block_length=0.5)
+        with pytest.raises(ValueError):
+            MonteCarloSimulator(method='jitter', jitter=1.5)
+    
+    def test_block_bootstrap_first_trade_uniform(self):
+        """Тест: первая сделка пути выбирается равномерно."""
+        from core.research.monte_carlo import MonteCarloSimulator
+        
+        simulator = MonteCarloSimulator(method='block_bootstrap', block_length=5.0)
+        indices = simulator._stationary_indices(20000, 10, np.random.default_rng(1))
+        
+        frequencies = np.bincount(indices[:, 0], minlength=10) / 20000
+        np.testing.assert_allclose(frequencies, 0.1, atol=0.01)
+
+
+class TestRiskDistribution:
+    """Max drawdown / time under water / losing streak / ruin по путям."""
+    
+    @pytest.fixture
+    def volatile_trades(self):
+        """Сделки с большим разбросом (часть путей уходит в ruin)."""
+        rng = np.random.default_rng(44)
+        return [{'pnl': float(pnl), 'return_pct': 0.0} for pnl in rng.normal(0, 400, 80)]
+    
+    def _reference(self, simulation, ruin_level):
+        """Risk метрики пути обычным циклом."""
+        equity = simulation['equity_curve']
+        
+        peak = equity[0]
+        max_drawdown = 0.0
+        under_water = longest_under_water = 0
+        losing = longest_losing = 0
+        
+        for previous, value in zip(equity[:-1], equity[1:]):
+            losing = losing + 1 if value < previous else 0
+            longest_losing = max(longest_losing, losing)
+            
+            peak = max(peak, value)
+            max_drawdown = max(max_drawdown, (peak - value) / peak * 100)
+            under_water = under_water + 1 if value < peak else 0
+            longest_under_water = max(longest_under_water, under_water)
+        
+        return max_drawdown, longest_under_water, longest_losing, min(equity) <= ruin_level
+    
+    def test_path_stats_match_loop(self, volatile_trades):
+        """Тест: vectorized stats совпадают с циклом по каждому пути."""
+        from core.research.monte_carlo import MonteCarloSimulator
+        
+        simulator = MonteCarloSimulator(n_simulations=300, seed=6, method='bootstrap', ruin_threshold=0.3)
+        results = simulator.run_simulation(volatile_trades, risk_stats=True)
+        
+        reference = np.array([self._reference(s, 7000.0) for s in results['simulations']])
+        stats = results['stats']
+        
+        assert stats['median_max_drawdown'] == pytest.approx(np.median(reference[:, 0]))
+        assert stats['worst_max_drawdown'] == pytest.approx(reference[:, 0].max())
+        assert stats['median_time_under_water'] == np.median(reference[:, 1])
+        assert stats['max_time_under_water'] == reference[:, 1].max()
+        assert stats['median_losing_streak'] == np.median(reference[:, 2])
+        assert stats['max_losing_streak'] == reference[:, 2].max()
+        assert stats['prob_ruin'] == reference[:, 3].mean()
+        assert 0 < stats['prob_ruin'] < 1
+    
+    def test_streaming_risk_stats_match_full(self, volatile_trades):
+        """Тест: run_streaming - точные счетчики, drawdown с точностью бина."""
+        from core.research.monte_carlo import MonteCarloSimulator
+        
+        kwargs = dict(n_simulations=2000, seed=2, method='block_bootstrap', block_length=4.0)
+        full = MonteCarloSimulator(**kwargs).run_simulation(volatile_trades, risk_stats=True)['stats']
+        streaming = MonteCarloSimulator(**kwargs).run_streaming(volatile_trades, chunk_size=300)['stats']
+        
+        for key in ('worst_max_drawdown', 'median_time_under_water', 'max_time_under_water',
+                    'median_losing_streak', 'max_losing_streak', 'prob_ruin'):
+            assert streaming[key] == full[key]
+        
+        assert streaming['median_max_drawdown'] == pytest.approx(full['median_max_drawdown'], abs=0.01)
+    
+    def test_shuffle_only_winning_trades_no_drawdown(self):
+        """Тест: только прибыльные сделки -> drawdown 0, серий убытков нет."""
+        from core.research.monte_carlo import MonteCarloSimulator
+        
+        trades = [{'pnl': 10.0 * (i + 1), 'return_pct': 0.1} for i in range(10)]
+        stats = MonteCarloSimulator(n_simulations=50, seed=0).run_simulation(trades, risk_stats=True)['stats']
+        
+        assert stats['worst_max_drawdown'] == 0.0
+        assert stats['max_time_under_water'] == 0
+        assert stats['max_losing_streak'] == 0
+        assert stats['prob_ruin'] == 0.0
+
+    def test_streaming_no_drawdown_percentiles_zero(self):
+        """Тест: run_streaming без просадки - percentiles drawdown 0, не центр бина."""
+        from core.research.monte_carlo import MonteCarloSimulator
+
+        trades = [{'pnl': 10.0 * (i + 1), 'return_pct': 0.1} for i in range(10)]
+        stats = MonteCarloSimulator(n_simulations=200, seed=0).run_streaming(trades, chunk_size=50)['stats']
+
+        assert stats['worst_max_drawdown'] == 0.0
+        assert stats['median_max_drawdown'] == 0.0
+        assert stats['p95_max_drawdown'] == 0.0
+
+    def test_streaming_drawdown_percentiles_within_worst(self, volatile_trades):
+        """Тест: percentiles drawdown из гистограммы не больше worst."""
+        from core.research.monte_carlo import MonteCarloSimulator
+
+        stats = MonteCarloSimulator(n_simulations=500, seed=3).run_streaming(volatile_trades)['stats']
+
+        assert 0.0 <= stats['median_max_drawdown'] <= stats['p95_max_drawdown'] <= stats['worst_max_drawdown']
+
+    def test_longest_true_run(self):
+        """Тест: самая длинная серия True в каждой строке."""
+        from core.research.monte_carlo import _longest_true_run
+        
+        mask = np.array([
+            [True, True, False, True, True, True],
+            [False, False, False, False, False, False],
+            [True, True, True, True, True, True],
+        ])
+        
+        np.testing.assert_array_equal(_longest_true_run(mask), [3, 0, 6])
@@ -0,0 +1,126 @@
+"""
+Unit tests для parallel helpers и параллельного ParameterOptimizer.
+
+Тестируем:
+- SharedFrame: round-trip DataFrame через memory-mapped файл
+- chunk_indices / resolve_n_jobs
+- optimize(n_jobs=2) дает те же результаты в том же порядке
+"""
+
+import os
+import pytest
+import numpy as np
+import pandas as pd
+
+from tests.conftest import make_candles
+
+
+@pytest.fixture
+def sample_candles():
+    """Синтетические дневные свечи (volume целый - разные dtypes колонок)."""
+    candles = make_candles(400, seed=11)
+    candles['volume'] = candles['volume'].astype(np.int64)
+    return candles
+
+
+class TestSharedFrame:
+    """Тесты для SharedFrame."""
+
+    def test_round_trip_preserves_data(self, sample_candles):
+        """Тест: DataFrame из файла равен исходному (dtypes тоже)."""
+        from core.research.parallel import SharedFrame, load_shared_frame
+
+        with SharedFrame(sample_candles) as shared:
+            loaded = load_shared_frame(shared.spec)
+
+            pd.testing.assert_frame_equal(loaded, sample_candles)
+
+    def test_columns_are_read_only_views(self, sample_candles):
+        """Тест: колонки не копируются в память процесса (read-only mmap)."""
+        from core.research.parallel import SharedFrame, load_shared_frame
+
+        with SharedFrame(sample_candles) as shared:
+            close = load_shared_frame(shared.spec)['close'].to_numpy()
+
+            assert not close.flags.writeable
+
+    def test_tz_aware_timestamp_and_index(self, sample_candles):
+        """Тест: tz-aware timestamp и не-RangeIndex восстанавливаются."""
+        from core.research.parallel import SharedFrame, load_shared_frame
+
+        data = sample_candles.iloc[100:150].copy()
+        data['timestamp'] = data['timestamp'].dt.tz_localize('Europe/Moscow')
+
+        with SharedFrame(data) as shared:
+            loaded = load_shared_frame(shared.spec)
+
+            pd.testing.assert_frame_equal(loaded, data)
+
+    def test_close_removes_file(self, sample_candles):
+        """Тест: файл удаляется при выходе из with."""
+        from core.research.parallel import SharedFrame
+
+        with SharedFrame(sample_candles) as shared:
+            path = shared.spec.path
+            assert os.path.exists(path)
+
+        assert not os.path.exists(path)
+
+    def test_object_columns_rejected(self, sample_candles):
+        """Тест: строковые колонки не поддерживаются."""
+        from core.research.parallel import SharedFrame
+
+        data = sample_candles.assign(market='BTC-PERP')
+
+        with pytest.raises(TypeError):
+            SharedFrame(data)
+
+
+class TestParallelHelpers:
+    """Тесты для chunk_indices и resolve_n_jobs."""
+
+    def test_chunk_indices_cover_range_in_order(self):
+        """Тест: куски покрывают все индексы по порядку."""
+        from core.research.parallel import chunk_indices
+
+        chunks = chunk_indices(10, 3)
+
+        assert len(chunks) == 3
+        assert sum(chunks, []) == list(range(10))
+        assert chunk_indices(2, 8) == [[0], [1]]
+
+    def test_resolve_n_jobs(self):
+        """Тест: -1 = все ядра, положительные числа как есть."""
+        from core.research.parallel import resolve_n_jobs
+
+        assert resolve_n_jobs(1) == 1
+        assert resolve_n_jobs(4) == 4
+        assert resolve_n_jobs(-1) == (os.cpu_count() or 1)
+
+
+class TestParallelOptimizer:
+    """ParameterOptimizer с n_jobs > 1."""
+
+    @pytest.mark.parametrize('batched', [True, False])
+    def test_parallel_matches_serial(self, sample_candles, batched):
+        """Тест: параллельный optimize дает те же результаты в том же порядке."""
+        from core.research.parameter_optimizer import ParameterOptimizer
+        from core.strategy.tortoise import TortoiseStrategy
+
+        kwargs = dict(
+            strategy_class=TortoiseStrategy,
+            market='TEST-PERP',
+            data=sample_candles,
+            param_grid={'don_break': [10, 20], 'don_exit': [5, 10]},
+            wf_train_days=150,
+            wf_test_days=50,
+            wf_step_days=50,
+            batched=batched
+        )
+
+        optimizer = ParameterOptimizer()
+        serial = optimizer.optimize(**kwargs)
+        parallel = optimizer.optimize(n_jobs=2, **kwargs)
+
+        assert parallel['all_results'] == serial['all_results']
+        assert parallel['sensitivity'] == serial['sensitivity']
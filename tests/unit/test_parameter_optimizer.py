@@ -6,6 +6,8 @@ Unit tests для Parameter Optimizer.
 - Walk-Forward validation
 - Ranking по OOS метрикам
 - Parameter sensitivity
+- Random / LHS выборка, successive halving / Hyperband
+- Nested Walk-Forward Optimization
 """
 
 import pytest
@@ -253,3 +255,205 @@ class TestParameterOptimizer:
         assert 'don_break' in sensitivity
         assert 'don_exit' in sensitivity
 
+
+
+@pytest.fixture
+def trending_candles():
+    """Синтетические дневные свечи (random walk) на 8 WF splits."""
+    from tests.conftest import make_candles
+    
+    return make_candles(1000, seed=21, start='2022-01-01')
+
+
+class TestAdaptiveSearch:
+    """Random / LHS выборка и early stopping в ParameterOptimizer."""
+    
+    WF_PARAMS = dict(wf_train_days=200, wf_test_days=100, wf_step_days=100)
+    
+    def test_random_search_samples_unique_grid_points(self):
+        """Тест: random = n_trials разных точек grid, воспроизводимо по seed."""
+        import numpy as np
+        from core.research.parameter_optimizer import ParameterOptimizer
+        
+        optimizer = ParameterOptimizer()
+        grid = {'a': list(range(20)), 'b': list(range(30)), 'c': [0.5, 1.0]}
+        
+        sample = optimizer._sample_random(grid, 50, np.random.default_rng(1))
+        
+        assert len(sample) == 50
+        assert len({tuple(p.values()) for p in sample}) == 50
+        assert all(p['a'] in grid['a'] and p['c'] in grid['c'] for p in sample)
+        assert sample == optimizer._sample_random(grid, 50, np.random.default_rng(1))
+        
+        # Бюджет больше grid - весь grid
+        small = {'a': [1, 2], 'b': [3]}
+        assert optimizer._sample_random(small, 10, np.random.default_rng(1)) == \
+            optimizer._generate_param_combinations(small)
+    
+    def test_latin_hypercube_covers_each_value(self):
+        """Тест: LHS с n_trials = числу значений использует каждое значение один раз."""
+        import numpy as np
+        from core.research.parameter_optimizer import ParameterOptimizer
+        
+        grid = {'a': list(range(10)), 'b': list(range(100, 110))}
+        
+        sample = ParameterOptimizer()._sample_latin_hypercube(grid, 10, np.random.default_rng(3))
+        
+        assert sorted(p['a'] for p in sample) == grid['a']
+        assert sorted(p['b'] for p in sample) == grid['b']
+    
+    def test_halving_promotes_top_candidates(self, trending_candles):
+        """
+        Тест: halving оценивает всех кандидатов, на всех splits - только
+        лучшие, и их результат как у полного grid.
+        """
+        from core.research.parameter_optimizer import ParameterOptimizer
+        from core.strategy.tortoise import TortoiseStrategy
+        
+        kwargs = dict(
+            strategy_class=TortoiseStrategy,
+            market='TEST-PERP',
+            data=trending_candles,
+            param_grid={'don_break': [10, 20, 30, 40, 50], 'don_exit': [5, 10, 15]},
+            **self.WF_PARAMS
+        )
+        
+        full = ParameterOptimizer().optimize(**kwargs)
+        halving = ParameterOptimizer().optimize(early_stopping='halving', eta=3, min_splits=3, **kwargs)
+        
+        assert set(halving) == set(full)
+        assert len(halving['all_results']) == 15
+        
+        # 15 кандидатов на 3 splits -> лучшие 5 на всех 8 splits
+        num_splits = [result['num_splits'] for result in halving['all_results']]
+        assert num_splits == [8] * 5 + [3] * 10
+        
+        full_by_params = {tuple(r['params'].items()): r for r in full['all_results']}
+        for result in halving['all_results'][:5]:
+            assert result == full_by_params[tuple(result['params'].items())]
+        
+        assert halving['best_params'] == halving['all_results'][0]['params']
+        assert halving['top_n'] == halving['all_results'][:5]
+    
+    def test_hyperband_deterministic_and_complete(self, trending_candles):
+        """Тест: hyperband с seed воспроизводим, лучший оценен на всех splits."""
+        from core.research.parameter_optimizer import ParameterOptimizer
+        from core.strategy.tortoise import TortoiseStrategy
+        
+        kwargs = dict(
+            strategy_class=TortoiseStrategy,
+            market='TEST-PERP',
+            data=trending_candles,
+            param_grid={'don_break': [10, 20, 30, 40], 'don_exit': [5, 10, 15]},
+            search='lhs',
+            n_trials=12,
+            early_stopping='hyperband',
+            eta=2,
+            min_splits=1,
+            seed=7,
+            **self.WF_PARAMS
+        )
+        
+        first = ParameterOptimizer().optimize(**kwargs)
+        second = ParameterOptimizer().optimize(**kwargs)
+        
+        assert first == second
+        assert first['all_results'][0]['num_splits'] == 8
+        assert min(r['num_splits'] for r in first['all_results']) == 1
+    
+    @pytest.mark.parametrize('kwargs', [
+        {'search': 'bayes'},
+        {'search': 'random'},
+        {'early_stopping': 'median'},
+        {'early_stopping': 'halving', 'eta': 1},
+        {'early_stopping': 'halving', 'min_splits': 0},
+    ])
+    def test_invalid_search_settings(self, trending_candles, kwargs):
+        """Тест: неизвестные режимы и некорректные параметры -> ValueError."""
+        from core.research.parameter_optimizer import ParameterOptimizer
+        from core.strategy.tortoise import TortoiseStrategy
+        
+        with pytest.raises(ValueError):
+            ParameterOptimizer().optimize(
+                strategy_class=TortoiseStrategy,
+                market='TEST-PERP',
+                data=trending_candles,
+                param_grid={'don_break': [10, 20]},
+                **kwargs
+            )
+
+
+class TestNestedWalkForward:
+    """ParameterOptimizer.optimize_walk_forward (параметры заново на каждом split)."""
+    
+    GRID = {'don_break': [10, 20, 30], 'don_exit': [5, 10]}
+    
+    def run(self, data, **kwargs):
+        from core.research.parameter_optimizer import ParameterOptimizer
+        from core.strategy.tortoise import TortoiseStrategy
+        
+        settings = dict(wf_train_days=200, wf_test_days=100, wf_step_days=100)
+        settings.update(kwargs)
+        
+        return ParameterOptimizer().optimize_walk_forward(
+            TortoiseStrategy, 'TEST-PERP', data, self.GRID, **settings
+        )
+    
+    @pytest.mark.parametrize('batched', [True, False])
+    def test_winner_selected_in_sample_and_tested_oos(self, trending_candles, batched):
+        """Тест: победитель = лучший по sharpe на train, метрики как у обычного WF."""
+        from core.research.walk_forward import WalkForwardAnalyzer, WalkForwardSplitter
+        from core.research.parameter_optimizer import ParameterOptimizer
+        from core.strategy.tortoise import TortoiseStrategy
+        
+        results = self.run(trending_candles, batched=batched)
+        splitter = WalkForwardSplitter(train_days=200, test_days=100, step_days=100)
+        
+        assert len(results['splits']) == 8
+        assert results['summary']['num_splits'] == 8
+        
+        for split in results['splits']:
+            # Обычный WF с параметрами победителя на том же split
+            per_params = {}
+            for params in ParameterOptimizer()._generate_param_combinations(self.GRID):
+                analyzer = WalkForwardAnalyzer(TortoiseStrategy(dict(params, markets=['TEST-PERP'])))
+                per_params[tuple(params.values())] = analyzer.run_analysis(
+                    'TEST-PERP', trending_candles, splitter, split_ids=[split['split_id']]
+                )['splits'][0]
+            
+            best_sharpe = max(r['train_metrics']['sharpe_ratio'] for r in per_params.values())
+            expected = per_params[tuple(split['best_params'].values())]
+            
+            assert split['train_metrics'] == expected['train_metrics']
+            assert split['test_metrics'] == expected['test_metrics']
+            assert split['train_metrics']['sharpe_ratio'] == best_sharpe
+    
+    def test_identical_windows_computed_once(self, trending_candles, monkeypatch):
+        """Тест: test окно = следующее train окно -> backtest победителя не повторяется."""
+        from core.research.parameter_optimizer import ParameterOptimizer
+        
+        computed = []
+        original = ParameterOptimizer._run_window_grid
+        
+        def count(self, strategy_class, market, window, param_sets, batched):
+            computed.extend((window.index[0], window.index[-1], tuple(p.values())) for p in param_sets)
+            return original(self, strategy_class, market, window, param_sets, batched)
+        
+        monkeypatch.setattr(ParameterOptimizer, '_run_window_grid', count)
+        
+        # train = test = step: test окно split k = train окно split k+1
+        results = self.run(trending_candles, wf_train_days=100, wf_test_days=100, wf_step_days=100)
+        
+        n_splits = len(results['splits'])
+        
+        assert len(computed) == len(set(computed))
+        assert len(computed) == results['summary']['num_backtests']
+        # Все test окна кроме последнего уже посчитаны как train окна
+        assert len(computed) == n_splits * len(ParameterOptimizer()._generate_param_combinations(self.GRID)) + 1
+    
+    def test_parallel_matches_serial(self, trending_candles):
+        """Тест: n_jobs=2 дает те же splits и summary."""
+        serial = self.run(trending_candles)
+        parallel = self.run(trending_candles, n_jobs=2)
+        
+        assert parallel == serial
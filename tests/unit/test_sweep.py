@@ -0,0 +1,112 @@
+"""
+Unit tests для TortoiseSweep (batched parameter sweep).
+
+Тестируем:
+- Parity: метрики sweep == BacktestEngine для каждой комбинации
+- Порядок результатов и дубликаты комбинаций
+- supports() для Mock/других стратегий
+- ParameterOptimizer batched == обычный режим
+"""
+
+import pytest
+from itertools import product
+from unittest.mock import Mock
+
+from tests.conftest import make_candles
+
+
+class TestTortoiseSweep:
+    """Тесты для TortoiseSweep."""
+
+    @pytest.mark.parametrize('seed', [0, 1])
+    def test_metrics_match_backtest_engine(self, seed):
+        """Тест: метрики каждой комбинации ИДЕНТИЧНЫ BacktestEngine."""
+        from core.backtest.sweep import TortoiseSweep
+        from core.backtest.engine import BacktestEngine
+        from core.strategy.tortoise import TortoiseStrategy
+
+        data = make_candles(300, seed=seed)
+        grid = [
+            {'don_break': b, 'don_exit': e, 'trail_atr_len': a}
+            for b, e, a in product([5, 20], [3, 20], [7, 20])
+        ]
+
+        sweep_metrics = TortoiseSweep(initial_capital=5000.0, risk_per_trade=2.0).run(data, grid)
+
+        for params, metrics in zip(grid, sweep_metrics):
+            engine = BacktestEngine(
+                strategy=TortoiseStrategy(dict(params)),
+                initial_capital=5000.0,
+                risk_per_trade=2.0
+            )
+            expected = engine.run_backtest('TEST-PERP', data)['metrics']
+
+            assert metrics == expected
+
+    def test_duplicate_combinations_keep_order(self):
+        """Тест: результаты в порядке param_sets, trail_mult не влияет."""
+        from core.backtest.sweep import TortoiseSweep
+
+        data = make_candles(200, seed=3)
+        grid = [
+            {'don_break': 10, 'trail_mult': 1.5},
+            {'don_break': 30},
+            {'don_break': 10, 'trail_mult': 3.0},
+        ]
+
+        metrics = TortoiseSweep().run(data, grid)
+
+        assert len(metrics) == 3
+        assert metrics[0] == metrics[2]
+        assert metrics[0] is not metrics[2]
+
+    def test_no_signals_returns_empty_metrics(self):
+        """Тест: данных меньше чем нужно индикаторам -> сделок нет."""
+        from core.backtest.sweep import TortoiseSweep
+
+        metrics = TortoiseSweep().run(make_candles(15, seed=0), [{'don_break': 20}])
+
+        assert metrics[0]['total_trades'] == 0
+        assert metrics[0]['final_equity'] == 10000.0
+
+    def test_supports_only_tortoise(self):
+        """Тест: Mock и наследники с другим on_bar не поддерживаются."""
+        from core.backtest.sweep import TortoiseSweep
+        from core.strategy.tortoise import TortoiseStrategy
+
+        class CustomTortoise(TortoiseStrategy):
+            def on_bar(self, ctx, history):
+                return []
+
+        assert TortoiseSweep.supports(TortoiseStrategy)
+        assert not TortoiseSweep.supports(CustomTortoise)
+        assert not TortoiseSweep.supports(Mock())
+
+
+class TestBatchedOptimizer:
+    """ParameterOptimizer с batched sweep."""
+
+    def test_batched_matches_per_combination(self):
+        """Тест: batched режим дает те же результаты что backtest на комбинацию."""
+        from core.research.parameter_optimizer import ParameterOptimizer
+        from core.strategy.tortoise import TortoiseStrategy
+
+        data = make_candles(400, seed=5)
+        param_grid = {'don_break': [10, 20], 'don_exit': [5, 10]}
+
+        kwargs = dict(
+            strategy_class=TortoiseStrategy,
+            market='TEST-PERP',
+            data=data,
+            param_grid=param_grid,
+            wf_train_days=150,
+            wf_test_days=50,
+            wf_step_days=50
+        )
+
+        optimizer = ParameterOptimizer()
+        batched = optimizer.optimize(batched=True, **kwargs)
+        sequential = optimizer.optimize(batched=False, **kwargs)
+
+        assert batched['all_results'] == sequential['all_results']
+        assert batched['best_params'] == sequential['best_params']
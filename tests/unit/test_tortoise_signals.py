@@ -0,0 +1,202 @@
+"""
+Unit tests для vectorized сигналов TortoiseStrategy.
+
+Тестируем:
+- generate_signals возвращает массивы нужной длины
+- Parity: vectorized backtest дает те же сделки что bar-by-bar
+- Event-driven исполнение: первый бар выхода, приоритеты на одном баре
+- Fallback на on_bar для стратегий без generate_signals
+"""
+
+import pytest
+import numpy as np
+import pandas as pd
+
+from tests.conftest import make_candles
+
+
+def run_backtest(params, data, vectorized):
+    """Backtest TortoiseStrategy в заданном режиме."""
+    from core.strategy.tortoise import TortoiseStrategy
+    from core.backtest.engine import BacktestEngine
+
+    strategy = TortoiseStrategy(dict(params, markets=['TEST-PERP']))
+    engine = BacktestEngine(
+        strategy=strategy,
+        initial_capital=10000.0,
+        risk_per_trade=1.0,
+        vectorized=vectorized
+    )
+
+    return engine.run_backtest('TEST-PERP', data)
+
+
+class TestTortoiseVectorizedSignals:
+    """Тесты для TortoiseStrategy.generate_signals."""
+
+    def test_generate_signals_returns_arrays_per_bar(self):
+        """Тест: массивы сигналов имеют длину = количеству баров."""
+        from core.strategy.tortoise import TortoiseStrategy
+
+        data = make_candles(120, seed=0)
+        strategy = TortoiseStrategy({'don_break': 10, 'don_exit': 5, 'trail_atr_len': 10})
+
+        arrays = strategy.generate_signals('TEST-PERP', data)
+
+        assert arrays is not None
+        assert len(arrays) == 120
+        # До прогрева индикаторов сигналов быть не может
+        assert not arrays.side[:10].any()
+        assert set(np.unique(arrays.side)) <= {-1, 0, 1}
+
+    @pytest.mark.parametrize('seed', [0, 1, 2])
+    @pytest.mark.parametrize('params', [
+        {'don_break': 20, 'don_exit': 10, 'trail_atr_len': 20},
+        {'don_break': 10, 'don_exit': 25, 'trail_atr_len': 30},
+        {'don_break': 5, 'don_exit': 3, 'trail_atr_len': 7},
+    ])
+    def test_vectorized_matches_bar_by_bar(self, params, seed):
+        """
+        Тест: vectorized режим дает ИДЕНТИЧНЫЕ сделки и equity curve.
+        """
+        data = make_candles(300, seed=seed)
+
+        vectorized = run_backtest(params, data, vectorized=True)
+        bar_by_bar = run_backtest(params, data, vectorized=False)
+
+        assert len(bar_by_bar['trades']) > 0
+        assert vectorized['trades'] == bar_by_bar['trades']
+        assert vectorized['equity_curve'] == bar_by_bar['equity_curve']
+        assert vectorized['metrics'] == bar_by_bar['metrics']
+
+    @pytest.mark.parametrize('params', [
+        {'don_break': 55, 'don_exit': 20},
+        {'don_break': 100, 'don_exit': 50, 'trail_atr_len': 50},
+    ])
+    def test_long_trades_match_bar_by_bar(self, params):
+        """
+        Тест: сделки длиннее первого куска scan (FIRST_TOUCH_CHUNK) - тот же результат.
+        """
+        from core.backtest.engine import FIRST_TOUCH_CHUNK
+
+        data = make_candles(3000, seed=5)
+
+        vectorized = run_backtest(params, data, vectorized=True)
+        bar_by_bar = run_backtest(params, data, vectorized=False)
+
+        durations = [trade['duration'] // 86_400_000 for trade in vectorized['trades']]
+        assert max(durations) > FIRST_TOUCH_CHUNK
+        assert vectorized['trades'] == bar_by_bar['trades']
+        assert vectorized['equity_curve'] == bar_by_bar['equity_curve']
+
+    def test_subclass_overriding_on_bar_falls_back(self):
+        """Тест: наследник с другим on_bar не использует bulk сигналы."""
+        from core.strategy.tortoise import TortoiseStrategy
+
+        class CustomTortoise(TortoiseStrategy):
+            def on_bar(self, ctx, history):
+                return []
+
+        strategy = CustomTortoise({})
+
+        assert strategy.generate_signals('TEST-PERP', make_candles(50, seed=0)) is None
+
+    def test_engine_falls_back_to_on_bar(self):
+        """Тест: стратегия без generate_signals работает через on_bar."""
+        from core.strategy.base import IStrategy
+        from core.backtest.engine import BacktestEngine
+
+        calls = []
+
+        class CountingStrategy(IStrategy):
+            def on_bar(self, ctx, history):
+                calls.append(ctx.timestamp)
+                return []
+
+            def markets(self):
+                return ['TEST-PERP']
+
+        engine = BacktestEngine(strategy=CountingStrategy({}))
+        engine.run_backtest('TEST-PERP', make_candles(30, seed=0))
+
+        assert len(calls) == 30
+
+
+class TestFirstTouchExecution:
+    """Тесты для event-driven исполнения сигналов (BacktestEngine._first_exit)."""
+
+    def run_arrays(self, bars, entry_bar, side, stop, target, exit_bars=()):
+        """Backtest стратегии с одним сигналом на entry_bar."""
+        from core.strategy.base import IStrategy, SignalArrays
+        from core.backtest.engine import BacktestEngine
+
+        n_bars = len(bars)
+        sides = np.zeros(n_bars, dtype=np.int8)
+        sides[entry_bar] = side
+        exit_flags = np.zeros(n_bars, dtype=bool)
+        exit_flags[list(exit_bars)] = True
+
+        data = pd.DataFrame({
+            'timestamp': pd.date_range('2023-01-01', periods=n_bars, freq='D'),
+            'open': [bar[0] for bar in bars],
+            'high': [bar[1] for bar in bars],
+            'low': [bar[2] for bar in bars],
+            'close': [bar[3] for bar in bars],
+            'volume': 1.0
+        })
+
+        class FixedSignals(IStrategy):
+            def on_bar(self, ctx, history):
+                return []
+
+            def markets(self):
+                return ['TEST-PERP']
+
+            def generate_signals(self, market, history):
+                return SignalArrays(
+                    side=sides,
+                    entry=data['close'].to_numpy(),
+                    stop=np.full(n_bars, stop),
+                    target=np.full(n_bars, target),
+                    exit_long=exit_flags if side > 0 else np.zeros(n_bars, dtype=bool),
+                    exit_short=exit_flags if side < 0 else np.zeros(n_bars, dtype=bool),
+                    exit_price=data['close'].to_numpy()
+                )
+
+        engine = BacktestEngine(strategy=FixedSignals({}))
+        return engine.run_backtest('TEST-PERP', data)
+
+    def test_jumps_to_first_touch(self):
+        """Тест: выход на первом баре касания target, equity curve на каждый бар."""
+        flat = (100.0, 101.0, 99.0, 100.0)
+        bars = [flat] * 200 + [(100.0, 112.0, 99.0, 111.0)] + [flat] * 50
+
+        results = self.run_arrays(bars, entry_bar=10, side=1, stop=90.0, target=110.0)
+
+        trade = results['trades'][0]
+        assert trade['reason'] == 'target_hit'
+        assert trade['exit'] == 110.0
+        assert trade['exit_time'] - trade['entry_time'] == 190 * 86_400_000
+        assert len(results['equity_curve']) == len(bars) + 1
+        assert results['equity_curve'][200] == 10000.0
+        assert results['equity_curve'][201] == results['metrics']['final_equity']
+
+    def test_stop_before_target_on_same_bar(self):
+        """Тест: бар задевает и stop и target - закрытие по stop (как bar-by-bar)."""
+        bars = [(100.0, 101.0, 99.0, 100.0)] * 5 + [(100.0, 120.0, 80.0, 100.0)] * 2
+
+        trade = self.run_arrays(bars, entry_bar=2, side=1, stop=90.0, target=110.0)['trades'][0]
+
+        assert trade['reason'] == 'stop_loss'
+        assert trade['exit'] == 90.0
+
+    def test_exit_signal_ignored_on_entry_bar(self):
+        """Тест: EXIT на баре entry не закрывает новую позицию, на следующем - закрывает."""
+        bars = [(100.0, 101.0, 99.0, 100.0)] * 10
+
+        trade = self.run_arrays(
+            bars, entry_bar=3, side=-1, stop=110.0, target=90.0, exit_bars=(3, 6)
+        )['trades'][0]
+
+        assert trade['reason'] == 'strategy_exit'
+        assert trade['exit_time'] - trade['entry_time'] == 3 * 86_400_000
@@ -0,0 +1,162 @@
+"""
+Unit tests для TrialJournal и resume ParameterOptimizer.
+
+Тестируем:
+- record / load round-trip, ключи study и params
+- Повторный optimize пропускает уже посчитанные комбинации
+- Результат resume совпадает с запуском с нуля
+- Параллельный optimize пишет все комбинации в journal
+"""
+
+import pytest
+import numpy as np
+
+from tests.conftest import make_candles
+
+
+@pytest.fixture
+def candles():
+    """Свечи для тестов."""
+    return make_candles(300, seed=5)
+
+
+def optimize_kwargs(data, param_grid, **overrides):
+    """Аргументы optimize для тестов."""
+    from core.strategy.tortoise import TortoiseStrategy
+
+    kwargs = dict(
+        strategy_class=TortoiseStrategy,
+        market='TEST-PERP',
+        data=data,
+        param_grid=param_grid,
+        wf_train_days=100,
+        wf_test_days=50,
+        wf_step_days=50
+    )
+    kwargs.update(overrides)
+    return kwargs
+
+
+class TestTrialJournal:
+    """Тесты для хранения trials."""
+
+    def test_record_load_round_trip(self, tmp_path):
+        """Тест: записанный trial читается новым экземпляром журнала."""
+        from core.research.trial_journal import TrialJournal
+
+        path = str(tmp_path / 'trials.sqlite')
+        result = {'params': {'don_break': 20}, 'oos_sharpe': np.float64(1.5)}
+
+        with TrialJournal(path) as journal:
+            journal.record('study', {'don_break': 20}, result)
+
+        with TrialJournal(path) as journal:
+            loaded = journal.load('study')
+
+            assert loaded == {TrialJournal.params_key({'don_break': 20}): {
+                'params': {'don_break': 20}, 'oos_sharpe': 1.5
+            }}
+            assert journal.load('other') == {}
+            assert journal.count() == 1
+
+    def test_params_key_ignores_order(self):
+        """Тест: порядок ключей params не влияет на ключ."""
+        from core.research.trial_journal import TrialJournal
+
+        assert TrialJournal.params_key({'a': 1, 'b': 2}) == TrialJournal.params_key({'b': 2, 'a': 1})
+        assert TrialJournal.params_key({'a': np.int64(1)}) == TrialJournal.params_key({'a': 1})
+
+    def test_study_key_depends_on_data_and_settings(self, candles):
+        """Тест: другие данные или настройки WF = другой study."""
+        from core.research.trial_journal import TrialJournal
+        from core.strategy.tortoise import TortoiseStrategy
+
+        key = TrialJournal.study_key(TortoiseStrategy, 'TEST-PERP', candles, {'train_days': 100})
+
+        changed = candles.copy()
+        changed.loc[10, 'close'] += 1e-9
+
+        assert key == TrialJournal.study_key(TortoiseStrategy, 'TEST-PERP', candles, {'train_days': 100})
+        assert key != TrialJournal.study_key(TortoiseStrategy, 'TEST-PERP', changed, {'train_days': 100})
+        assert key != TrialJournal.study_key(TortoiseStrategy, 'TEST-PERP', candles, {'train_days': 150})
+        assert key != TrialJournal.study_key(TortoiseStrategy, 'ETH-PERP', candles, {'train_days': 100})
+
+
+class TestOptimizerResume:
+    """ParameterOptimizer с journal."""
+
+    @pytest.mark.parametrize('batched', [True, False])
+    def test_resume_skips_completed_trials(self, candles, tmp_path, monkeypatch, batched):
+        """Тест: второй запуск считает только новые комбинации, результат как с нуля."""
+        from core.research.parameter_optimizer import ParameterOptimizer
+        from core.research.trial_journal import TrialJournal
+
+        path = str(tmp_path / 'trials.sqlite')
+        optimizer = ParameterOptimizer()
+
+        # Первый запуск (как будто упал после двух комбинаций)
+        with TrialJournal(path) as journal:
+            optimizer.optimize(journal=journal, **optimize_kwargs(
+                candles, {'don_break': [10, 20], 'don_exit': [10]}, batched=batched
+            ))
+
+        computed = []
+        original_batched = ParameterOptimizer._run_walk_forward_batched
+        original_single = ParameterOptimizer._run_walk_forward
+
+        def count_batched(self, param_combinations, **kwargs):
+            computed.extend(param_combinations)
+            return original_batched(self, param_combinations=param_combinations, **kwargs)
+
+        def count_single(self, params, **kwargs):
+            computed.append(params)
+            return original_single(self, params=params, **kwargs)
+
+        monkeypatch.setattr(ParameterOptimizer, '_run_walk_forward_batched', count_batched)
+        monkeypatch.setattr(ParameterOptimizer, '_run_walk_forward', count_single)
+
+        full_grid = {'don_break': [10, 20, 30], 'don_exit': [10]}
+        with TrialJournal(path) as journal:
+            resumed = optimizer.optimize(journal=journal, **optimize_kwargs(
+                candles, full_grid, batched=batched
+            ))
+            assert journal.count() == 3
+
+        assert [params['don_break'] for params in computed] == [30]
+
+        monkeypatch.undo()
+        fresh = ParameterOptimizer().optimize(**optimize_kwargs(candles, full_grid, batched=batched))
+
+        assert resumed['all_results'] == fresh['all_results']
+        assert resumed['top_n'] == fresh['top_n']
+        assert resumed['sensitivity'] == fresh['sensitivity']
+
+    def test_different_data_not_reused(self, candles):
+        """Тест: trials на других данных не подмешиваются."""
+        from core.research.parameter_optimizer import ParameterOptimizer
+        from core.research.trial_journal import TrialJournal
+
+        journal = TrialJournal(':memory:')
+        optimizer = ParameterOptimizer()
+        grid = {'don_break': [10, 20]}
+
+        optimizer.optimize(journal=journal, **optimize_kwargs(candles, grid))
+        other = optimizer.optimize(journal=journal, **optimize_kwargs(make_candles(300, seed=6), grid))
+
+        assert journal.count() == 4
+        assert other['all_results'] == ParameterOptimizer().optimize(
+            **optimize_kwargs(make_candles(300, seed=6), grid)
+        )['all_results']
+
+    def test_parallel_records_all_trials(self, candles):
+        """Тест: n_jobs=2 пишет в journal каждую комбинацию."""
+        from core.research.parameter_optimizer import ParameterOptimizer
+        from core.research.trial_journal import TrialJournal
+
+        journal = TrialJournal(':memory:')
+        grid = {'don_break': [10, 20], 'don_exit': [5, 10]}
+
+        parallel = ParameterOptimizer().optimize(journal=journal, n_jobs=2, **optimize_kwargs(candles, grid))
+
+        assert journal.count() == 4
+        assert parallel['all_results'] == ParameterOptimizer().optimize(**optimize_kwargs(candles, grid))['all_results']
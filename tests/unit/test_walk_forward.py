@@ -202,3 +202,93 @@ class TestWalkForwardSplitter:
         assert 'train_size' in first_info
         assert 'test_size' in first_info
 
+    
+    def test_iter_splits_yields_index_descriptors(self, sample_data):
+        """
+        Тест: iter_splits - ленивый генератор SplitIndices с теми же окнами что split().
+        """
+        import types
+        from core.research.walk_forward import WalkForwardSplitter, SplitIndices
+        
+        for anchored in (False, True):
+            splitter = WalkForwardSplitter(train_days=180, test_days=30, anchored=anchored)
+            
+            lazy = splitter.iter_splits(len(sample_data))
+            assert isinstance(lazy, types.GeneratorType)
+            
+            indices = list(lazy)
+            splits = splitter.split(sample_data)
+            
+            assert len(indices) == len(splits)
+            for split, frames in zip(indices, splits):
+                assert isinstance(split, SplitIndices)
+                assert sample_data.iloc[split.train].equals(frames['train'])
+                assert sample_data.iloc[split.test].equals(frames['test'])
+    
+    def test_iter_splits_raises_before_iteration(self):
+        """Тест: ошибка недостатка данных сразу, а не на первом next()."""
+        from core.research.walk_forward import WalkForwardSplitter
+        
+        splitter = WalkForwardSplitter(train_days=180, test_days=30)
+        
+        with pytest.raises(ValueError, match="Недостаточно данных"):
+            splitter.iter_splits(100)
+    
+    def test_split_windows_are_views(self, sample_data):
+        """
+        Тест: окна split() не копируют данные (память O(n) при любом числе splits).
+        """
+        import numpy as np
+        from core.research.walk_forward import WalkForwardSplitter
+        
+        splitter = WalkForwardSplitter(train_days=180, test_days=30, anchored=True)
+        splits = splitter.split(sample_data)
+        
+        source = sample_data['close'].to_numpy()
+        for split in splits:
+            assert np.shares_memory(split['train']['close'].to_numpy(), source)
+            assert np.shares_memory(split['test']['close'].to_numpy(), source)
+    
+    def test_get_split_info_from_indices(self, sample_data):
+        """
+        Тест: get_split_info по SplitIndices + data совпадает с версией по DataFrame.
+        """
+        from core.research.walk_forward import WalkForwardSplitter
+        
+        splitter = WalkForwardSplitter(train_days=180, test_days=30)
+        
+        from_frames = splitter.get_split_info(splitter.split(sample_data))
+        from_indices = splitter.get_split_info(
+            list(splitter.iter_splits(len(sample_data))),
+            data=sample_data
+        )
+        
+        assert from_indices == from_frames
+        
+        # Без data - позиции строк вместо дат
+        positions = splitter.get_split_info(list(splitter.iter_splits(len(sample_data))))
+        assert positions[0]['train_start'] == 0
+        assert positions[0]['test_start'] == 180
+        assert positions[0]['train_size'] == 180
+    
+    def test_iter_splits_filter_and_count(self, sample_data):
+        """
+        Тест: split_ids оставляет только эти splits (id как без фильтра),
+        count_splits совпадает с числом splits.
+        """
+        from core.research.walk_forward import WalkForwardSplitter
+        
+        splitter = WalkForwardSplitter(train_days=180, test_days=30, step_days=20)
+        
+        all_splits = list(splitter.iter_splits(len(sample_data)))
+        selected = list(splitter.iter_splits(len(sample_data), split_ids=[4, 0]))
+        
+        assert [split.split_id for split in selected] == [0, 4]
+        assert selected == [all_splits[0], all_splits[4]]
+
+        # get_split_info сохраняет split_id отфильтрованных splits
+        info = splitter.get_split_info(selected, data=sample_data)
+        assert [split_info['split_id'] for split_info in info] == [0, 4]
+
+        assert splitter.count_splits(len(sample_data)) == len(all_splits)
+        assert splitter.count_splits(100) == 0
@@ -213,3 +213,71 @@ class TestWalkForwardAnalyzer:
         # Можем проверить есть ли degradation
         # (OOS обычно хуже чем IS)
 
+
+
+class TestParallelWalkForward:
+    """Тесты для параллельного режима WalkForwardAnalyzer."""
+    
+    @pytest.fixture
+    def trending_data(self):
+        """Random walk данные на 400 дней (есть сделки Tortoise)."""
+        from tests.conftest import make_candles
+        
+        return make_candles(400, seed=3, start='2024-01-01')
+    
+    def test_parallel_matches_sequential(self, trending_data):
+        """
+        Тест: n_jobs=2 дает те же splits и summary что последовательный режим.
+        """
+        from core.research.walk_forward import WalkForwardAnalyzer, WalkForwardSplitter
+        from core.strategy.tortoise import TortoiseStrategy
+        
+        analyzer = WalkForwardAnalyzer(
+            strategy=TortoiseStrategy({'don_break': 10, 'don_exit': 5, 'trail_atr_len': 10})
+        )
+        splitter = WalkForwardSplitter(train_days=120, test_days=40)
+        
+        sequential = analyzer.run_analysis('TEST-PERP', trending_data, splitter)
+        parallel = analyzer.run_analysis('TEST-PERP', trending_data, splitter, n_jobs=2)
+        
+        assert len(parallel['splits']) == len(sequential['splits']) > 1
+        assert parallel == sequential
+    
+    def test_parallel_raises_for_insufficient_data(self, trending_data):
+        """Тест: ошибка недостатка данных такая же как в split()."""
+        from core.research.walk_forward import WalkForwardAnalyzer, WalkForwardSplitter
+        from core.strategy.tortoise import TortoiseStrategy
+        
+        analyzer = WalkForwardAnalyzer(strategy=TortoiseStrategy({}))
+        splitter = WalkForwardSplitter(train_days=500, test_days=40)
+        
+        with pytest.raises(ValueError):
+            analyzer.run_analysis('TEST-PERP', trending_data, splitter, n_jobs=2)
+    
+    def test_each_split_gets_fresh_strategy(self, trending_data):
+        """
+        Тест: стратегия копируется на каждый split, оригинал не меняется.
+        """
+        from core.research.walk_forward import WalkForwardAnalyzer, WalkForwardSplitter
+        from core.strategy.tortoise import TortoiseStrategy
+        
+        strategy = TortoiseStrategy({'don_break': 10, 'don_exit': 5, 'trail_atr_len': 10})
+        seen = []
+        
+        analyzer = WalkForwardAnalyzer(strategy=strategy)
+        original_run_backtest = analyzer._run_backtest
+        
+        def spy(market, data, strategy=None):
+            seen.append(strategy)
+            return original_run_backtest(market, data, strategy)
+        
+        analyzer._run_backtest = spy
+        
+        splitter = WalkForwardSplitter(train_days=120, test_days=40)
+        analyzer.run_analysis('TEST-PERP', trending_data, splitter)
+        
+        # train и test одного split - одна копия, у каждого split своя
+        split_strategies = seen[::2]
+        assert all(s is not strategy for s in seen)
+        assert len({id(s) for s in split_strategies}) == len(split_strategies)
+        assert strategy.trailing_stops == {}